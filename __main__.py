@@ -1,17 +1,35 @@
 from swfparser import SWFParser
+from swfparser.server import serve
+from swfparser.stats import Stats
 
-import sys
+import argparse
 
 def main():
-    if len(sys.argv) == 1:
-        print(f"usage: __main__.py SWF_FILE.swf")
+    parser = argparse.ArgumentParser(prog="__main__.py")
+    parser.add_argument("file", metavar="SWF_FILE.swf", nargs="?")
+    parser.add_argument("--stats", action="store_true", help="print per-phase timings and byte counts")
+    parser.add_argument("--serve", metavar="SOCKET", help="answer JSON queries on a Unix socket instead")
+    parser.add_argument("--cache-mb", type=int, default=1024, help="memory budget of the parsed file cache (--serve)")
+    args = parser.parse_args()
+
+    if args.serve:
+        try:
+            serve(args.serve, args.cache_mb << 20)
+        except ValueError as e:
+            parser.error(str(e))
         return
+    if args.file is None:
+        parser.error("a SWF file or --serve is required")
 
-    swf = SWFParser(sys.argv[1])
+    stats = Stats() if args.stats else None
+    swf = SWFParser(args.file, stats=stats)
     swf.parse()
 
     for abc in swf.abcs.values():
         print(abc)
 
+    if stats is not None:
+        print(stats)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
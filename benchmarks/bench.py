@@ -0,0 +1,211 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from swfparser import ABC, SWFParser
+from swfparser._abc.reader import ABCReader
+from swfparser.synth import generate_swf
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+TIERS = {
+	"small": dict(strings=200, multinames=200, classes=20, traits=8, methods=100, body_size=20),
+	"medium": dict(strings=2000, multinames=2000, classes=100, traits=8, methods=1000, body_size=40),
+	"large": dict(strings=10000, multinames=10000, classes=400, traits=12, methods=4000, body_size=80),
+}
+
+def _reference_workload():
+	# fixed pure-Python byte and dict work, independent of swfparser: its
+	# time calibrates the results to the machine running them
+	data = bytes(range(256)) * 256 + b"\x00"
+	counts = {}
+	pos = 0
+	while pos < len(data):
+		value = shift = 0
+		while True:
+			byte = data[pos]
+			pos += 1
+			value |= (byte & 0x7F) << shift
+			shift += 7
+			if not byte & 0x80 or shift > 28:
+				break
+		counts[value & 0xFF] = counts.get(value & 0xFF, 0) + 1
+	return counts
+
+# shortest timed sample: fast cases are looped until a sample takes this long
+MIN_SAMPLE = 0.05
+
+def _sampler(fn):
+	# per-call time of one sample looped to at least MIN_SAMPLE seconds
+	start = time.perf_counter()
+	fn()
+	loops = max(1, int(MIN_SAMPLE / max(time.perf_counter() - start, 1e-6)))
+
+	def sample() -> float:
+		start = time.perf_counter()
+		for _ in range(loops):
+			fn()
+		return (time.perf_counter() - start) / loops
+	return sample
+
+def _measure(fn, repeat: int) -> tuple[float, float, int]:
+	# best wall time, the median ratio to the reference workload and the
+	# allocation peak of one traced run. Every case sample is paired with a
+	# reference sample taken right after it, so that CPU speed changes during
+	# the run (shared or throttled machines) hit both alike
+	case, reference = _sampler(fn), _sampler(_reference_workload)
+	best = float("inf")
+	ratios = []
+	for _ in range(repeat):
+		seconds = case()
+		best = min(best, seconds)
+		ratios.append(seconds / reference())
+
+	tracemalloc.start()
+	try:
+		fn()
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+
+	return best, statistics.median(ratios), peak
+
+def bench_tier(name: str, params: dict, repeat: int, tmp: str) -> dict[str, dict]:
+	# "relative" is the run time in units of the reference workload, the
+	# figure baselines are compared on: it carries over between machines
+	results = {}
+
+	for compress in (False, True):
+		form = "cws" if compress else "fws"
+		path = os.path.join(tmp, f"{name}.{form}.swf")
+		with open(path, "wb") as f:
+			f.write(generate_swf(compress=compress, **params))
+
+		swf = SWFParser(path)
+		swf.parse()
+		abc = next(iter(swf.abcs.values()))
+		abc_data = abc.reader.buf.tobytes()
+		codes = [body["code"] for body in abc.method_bodies]
+		instructions = sum(len(ABCReader.read_instructions(code).instructions) for code in codes)
+		code_bytes = sum(len(code) for code in codes)
+		file_size = os.path.getsize(path)
+
+		def parse():
+			SWFParser(path).parse()
+
+		def abc_read():
+			ABC(abc.name, abc.flags, abc_data).read()
+
+		def read_instructions():
+			for code in codes:
+				ABCReader.read_instructions(code)
+
+		def abc_write():
+			# full re-encode, no raw section reuse
+			abc.mark_dirty()
+			abc.write()
+
+		out = os.path.join(tmp, f"{name}.{form}.out.swf")
+		def swf_write():
+			abc.mark_dirty()
+			swf.write(out)
+
+		# instruction throughput only where instructions are decoded
+		cases = {
+			"parse": (parse, file_size, None),
+			"abc_read": (abc_read, len(abc_data), None),
+			"read_instructions": (read_instructions, code_bytes, instructions),
+			"abc_write": (abc_write, len(abc_data), None),
+			"swf_write": (swf_write, file_size, None),
+		}
+		for case, (fn, size, count) in cases.items():
+			if form == "cws" and case in ("abc_read", "read_instructions", "abc_write"):
+				# independent of the container compression
+				continue
+
+			seconds, relative, peak = _measure(fn, repeat)
+			result = results[f"{name}/{form}/{case}"] = {
+				"seconds": seconds,
+				"relative": relative,
+				"mb_s": size / seconds / 1e6,
+				"peak_bytes": peak,
+			}
+			if count is not None:
+				result["instr_s"] = count / seconds
+
+	return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+	regressions = []
+	for key, result in results.items():
+		base = baseline.get(key)
+		if base is None or "relative" not in base:
+			continue
+		if result["relative"] > base["relative"] * (1 + tolerance):
+			regressions.append(f"{key}: {result['relative']:.2f} units, baseline {base['relative']:.2f} units")
+		if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance):
+			regressions.append(f"{key}: peak {result['peak_bytes']} bytes, baseline {base['peak_bytes']} bytes")
+	return regressions
+
+def main():
+	parser = argparse.ArgumentParser(description="swfparser benchmarks")
+	parser.add_argument("--tier", choices=TIERS, action="append", help="size tier to run, all by default")
+	parser.add_argument("--repeat", type=int, default=5)
+	parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+	parser.add_argument("--baseline", default=BASELINE)
+	parser.add_argument("--update-baseline", action="store_true")
+	parser.add_argument("--output", help="also write the results as JSON to this path")
+	args = parser.parse_args()
+
+	results = {}
+	with tempfile.TemporaryDirectory() as tmp:
+		for name in args.tier or TIERS:
+			results.update(bench_tier(name, TIERS[name], args.repeat, tmp))
+
+	print(f"{'case':40} {'seconds':>10} {'units':>8} {'MB/s':>10} {'instr/s':>14} {'peak KiB':>12}")
+	for key, result in results.items():
+		instr_s = f"{result['instr_s']:14.0f}" if "instr_s" in result else f"{'-':>14}"
+		print(
+			f"{key:40} {result['seconds']:10.4f} {result['relative']:8.2f} {result['mb_s']:10.2f} "
+			f"{instr_s} {result['peak_bytes'] / 1024:12.0f}"
+		)
+
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump(results, f, indent=2)
+
+	if args.update_baseline:
+		baseline = {}
+		if os.path.exists(args.baseline):
+			with open(args.baseline) as f:
+				baseline = json.load(f)
+		# absolute times and throughputs only hold on the machine that measured them
+		baseline.update(
+			(key, {"relative": result["relative"], "peak_bytes": result["peak_bytes"]})
+			for key, result in results.items()
+		)
+		with open(args.baseline, "w") as f:
+			json.dump(baseline, f, indent=2, sort_keys=True)
+		return
+
+	if not os.path.exists(args.baseline):
+		return
+
+	with open(args.baseline) as f:
+		regressions = compare(results, json.load(f), args.tolerance)
+	if regressions:
+		print("\nregressions:")
+		for regression in regressions:
+			print(f"  {regression}")
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -1,9 +1,25 @@
+from ..memory import abc_memory_usage
+from ..reader import ByteReader
+from ..writer import ByteWriter
+
 from .consts import *
 
+from .assembler import Code, Label
+from .cfg import BasicBlock, ControlFlowGraph
+from .diff import Change, Diff, Fingerprint, diff
+from .frame import FrameAnalysis, analyze_frame, compute_limits
+from .hierarchy import ClassNode, Hierarchy
 from .instruction import Instruction, Opcode, Stack
+from .interpreter import MAX_MEMO, Interpreter
+from . import names, optimizer, strip
+from .link import link
+from .patch import PatchSession
 from .reader import ABCReader
+from .view import ABCView
 from .writer import ABCWriter
 
+import threading
+
 class ABC(ABCReader, ABCWriter):
 	def __init__(self, name: str, flags: int, data: bytes):
 		self.name: str = name
@@ -30,9 +46,59 @@ class ABC(ABCReader, ABCWriter):
 		self._multiname_id_index: dict[dict[str, int], int] = {}
 		self._str_index: dict[str, int] = {}
 
+		self._cfg_cache: dict[int, ControlFlowGraph] = {}
+		self._code_cache: dict[int, Code] = {}
+		# guards the two caches above when the ABC is read from several threads
+		self._cache_lock = threading.Lock()
+
 		ABCReader.__init__(self, data)
 		ABCWriter.__init__(self)
 
+	@classmethod
+	def create(cls, name: str, flags: int, minor_version: int = 16, major_version: int = 46) -> "ABC":
+		# empty ABC holding only the implicit entry 0 of every pool
+		abc = cls(name, flags, b"")
+		abc.minor_version = minor_version
+		abc.major_version = major_version
+
+		abc.int_pool = [0]
+		abc.uint_pool = [0]
+		abc.double_pool = [0.0]
+		abc.string_pool = [""]
+		abc.namespace_pool = [{"kind": 0, "name_index": 0}]
+		abc.ns_set_pool = [None]
+		abc.multiname_pool = [{"kind": CONSTANT_QName, "name_index": 0}]
+		abc._reindex()
+		return abc
+
+	def __getstate__(self) -> dict:
+		# memoryviews and id()-keyed tables do not survive pickling
+		state = self.__dict__.copy()
+		state["reader"] = bytes(self.reader.buf)
+		state["writer"] = None
+		state["stats"] = None
+		state["_cfg_cache"] = {}
+		state["_code_cache"] = {}
+		del state["_cache_lock"]
+		state["_body_raw"] = list(self._body_raw.values())
+		del state["_multiname_id_index"]
+		return state
+
+	def __setstate__(self, state: dict):
+		raw = state.pop("reader")
+		body_raw = state.pop("_body_raw")
+		self.__dict__.update(state)
+
+		self.reader = ByteReader(raw)
+		self.writer = ByteWriter()
+		self._cache_lock = threading.Lock()
+		self._body_raw = {id(entry[0]): entry for entry in body_raw}
+		self._multiname_id_index = {id(multiname): i for i, multiname in enumerate(self.multiname_pool)}
+
+	def memory_usage(self, seen: set[int] | None = None) -> dict[str, int]:
+		# estimated retained bytes per pool, entity type and buffer, see swfparser.memory
+		return abc_memory_usage(self, seen)
+
 	def __repr__(self) -> str:
 		return (
 			f"ABC constantpool: ints={len(self.int_pool)}, uints={len(self.uint_pool)}, \
@@ -51,7 +117,7 @@ class ABC(ABCReader, ABCWriter):
 		)
 
 	def ensure_string(self, s: str) -> int:
-		if s not in self.string_pool:
+		if s not in self._str_index:
 			self._str_index[s] = len(self.string_pool)
 			self.string_pool.append(s)
 		return self._str_index[s]
@@ -65,7 +131,7 @@ class ABC(ABCReader, ABCWriter):
 		
 		self.namespace_pool.append({
 			"kind": 0x08,
-			"name_index": len(self.namespace_pool)
+			"name_index": s_index
 		})
 		return len(self.namespace_pool) - 1
 	
@@ -75,12 +141,14 @@ class ABC(ABCReader, ABCWriter):
 			return self._multiname_index[key]
 		except KeyError:
 			idx = len(self.multiname_pool)
-			self.multiname_pool.append({
+			entry = {
 				"kind": CONSTANT_QName,
 				"name_index": name_index,
 				"ns_index": ns_index
-			})
+			}
+			self.multiname_pool.append(entry)
 			self._multiname_index[key] = idx
+			self._multiname_id_index[id(entry)] = idx
 			return idx
 	
 	def find_multiname(self, prop_name: str, namespace: str = "") -> int | None:
@@ -95,4 +163,96 @@ class ABC(ABCReader, ABCWriter):
 					namespace = self.namespace_pool[namespace_index]
 					if namespace["name_index"] == ns_s_index:
 						return index
-		return None
\ No newline at end of file
+		return None
+
+	def resolve_namespace(self, index: int) -> str:
+		return names.resolve_namespace(self, index)
+
+	def resolve_multiname(self, multiname: dict | int) -> str:
+		return names.resolve_multiname(self, multiname)
+
+	def patch(self) -> PatchSession:
+		# batched pool and body edits applied atomically, see PatchSession
+		return PatchSession(self)
+
+	def view(self) -> ABCView:
+		# read-only snapshot safe to share across threads
+		return ABCView(self)
+
+	def fingerprint(self) -> Fingerprint:
+		return Fingerprint([self])
+
+	def hierarchy(self) -> Hierarchy:
+		return Hierarchy([self])
+
+	def interpreter(self, max_steps: int = 1_000_000, max_memo: int = MAX_MEMO) -> Interpreter:
+		# bodies are compiled on first call, edit them before evaluating
+		return Interpreter(self, max_steps, max_memo)
+
+	def get_cfg(self, body_index: int) -> ControlFlowGraph:
+		body = self.method_bodies[body_index]
+
+		# cached graphs are dropped as soon as the body code or exceptions are
+		# replaced; exceptions edited in place are declared with mark_dirty()
+		cfg = self._cfg_cache.get(body_index)
+		if cfg is None or cfg.code is not body["code"] or cfg.exceptions is not body["exceptions"]:
+			# built outside the lock, concurrent readers may build the same graph
+			cfg = ControlFlowGraph.from_code(body["code"], body["exceptions"])
+			with self._cache_lock:
+				self._cfg_cache[body_index] = cfg
+		return cfg
+
+	def get_code(self, body_index: int) -> Code:
+		body = self.method_bodies[body_index]
+
+		# reused across patch rounds: Code.commit() keeps it in sync with the body
+		code = self._code_cache.get(body_index)
+		if code is None or code._raw is not body["code"]:
+			code = Code.from_body(body)
+			with self._cache_lock:
+				# keep an instance another thread created meanwhile: it may already be edited
+				cached = self._code_cache.get(body_index)
+				if cached is not None and cached._raw is body["code"]:
+					return cached
+				self._code_cache[body_index] = code
+		return code
+
+	def analyze_frame(self, body_index: int) -> FrameAnalysis:
+		# stack and scope depth before every instruction, registers used and verifier errors
+		return analyze_frame(self.get_cfg(body_index), self.multiname_pool)
+
+	def update_limits(self, body_index: int):
+		body = self.method_bodies[body_index]
+
+		# init_scope depends on where the method is defined, not on its code: kept
+		frame = self.analyze_frame(body_index)
+		body["max_stack"] = frame.max_stack
+		body["max_scope"] = body["init_scope"] + frame.max_scope
+		body["local_count"] = frame.local_count(self.method_info[body["method_index"]])
+
+	def optimize(self, body_index: int | None = None):
+		indices = range(len(self.method_bodies)) if body_index is None else (body_index,)
+		for index in indices:
+			code = self.get_code(index)
+			optimizer.optimize(code)
+			code.commit(self.method_bodies[index])
+			self.update_limits(index)
+
+	def _reindex(self):
+		# rebuild the lookup tables after pool entries were moved around
+		self._str_index = {"": 0}
+		for index, s in enumerate(self.string_pool):
+			self._str_index[s] = index
+
+		self._multiname_id_index = {}
+		self._multiname_index = {}
+		for index, multiname in enumerate(self.multiname_pool):
+			self._multiname_id_index[id(multiname)] = index
+			if index and multiname["kind"] == CONSTANT_QName:
+				self._multiname_index.setdefault((multiname["name_index"], multiname["ns_index"]), index)
+
+	def strip(self, debug: bool = True) -> dict[str, int]:
+		# release build: drop debug opcodes, then garbage-collect the constant pools
+		removed = {"debug": strip.strip_debug(self) if debug else 0}
+		removed.update(strip.compact_pools(self))
+		return removed
\ No newline at end of file
@@ -0,0 +1,287 @@
+from ..writer import ByteWriter
+
+from .instruction import Instruction, Opcode
+
+from bisect import bisect_left
+
+class Label:
+	__slots__ = ("address",)
+
+	def __init__(self):
+		# resolved on every assemble()
+		self.address: int = -1
+
+	def __repr__(self) -> str:
+		return f"Label(address={self.address})"
+
+def encode_instruction(writer: ByteWriter, instr: Instruction):
+	opcode_val = instr.opcode.value
+	writer.write_u8(opcode_val[0])
+
+	for arg, t in zip(instr.args, opcode_val[1:]):
+		match t:
+			case "u30":
+				writer.write_leb128(arg)
+			case "u8":
+				writer.write_u8(arg)
+			case "u16":
+				writer.write_u16(arg)
+			case "s24":
+				writer.write_s24(arg)
+			case "s24arr":
+				# case_count is stored as the number of cases minus one
+				writer.write_leb128(len(arg) - 1)
+				for case_offset in arg:
+					writer.write_s24(case_offset)
+			case "u32":
+				writer.write_u32(arg)
+			case "s32":
+				writer.write_sleb128(arg)
+			case _:
+				raise ValueError(f"Unknown arg type for assembly: {instr.opcode.name} {t}")
+
+class Code:
+	# Symbolic view of a method body: `items` holds instructions interleaved
+	# with Label markers, branch instructions keep Label objects in `targets`
+	# and exception ranges are Label triples. Offsets are recomputed on
+	# assemble(), only new or touched instructions are re-encoded and runs
+	# of untouched ones are copied from the previous output.
+
+	def __init__(self, items: list[Instruction | Label] = None, exceptions: list[dict] = None):
+		self.items: list[Instruction | Label] = items if items is not None else []
+		self.exceptions: list[dict] = exceptions if exceptions is not None else []
+
+		self._raw: bytes = b""
+		# id(instr) -> (instr, start, end) inside self._raw
+		self._spans: dict[int, tuple[Instruction, int, int]] = {}
+		self._modified: bool = True
+		# ids of the labels placed by the last assemble()
+		self._placed: set[int] = set()
+
+	@classmethod
+	def from_body(cls, body: dict) -> "Code":
+		return cls.from_code(body["code"], body["exceptions"])
+
+	@classmethod
+	def from_code(cls, code: bytes, exceptions: list[dict[str, int]] = ()) -> "Code":
+		from .reader import ABCReader
+
+		instructions = ABCReader.read_instructions(code).instructions
+		addresses = [instr.address for instr in instructions]
+		boundaries = set(addresses)
+
+		labels: dict[int, Label] = {}
+		def label_for(address: int, snap: bool = False) -> Label:
+			if address not in boundaries and address != len(code):
+				if not snap:
+					raise ValueError(f"Branch target {address} is not on an instruction boundary")
+				# exception ranges may cut through an instruction: round up
+				i = bisect_left(addresses, address)
+				address = addresses[i] if i < len(addresses) else len(code)
+			try:
+				return labels[address]
+			except KeyError:
+				labels[address] = label = Label()
+				return label
+
+		for instr in instructions:
+			if instr.targets:
+				instr.targets = [label_for(target) for target in instr.targets]
+
+		code_exceptions = []
+		for exception in exceptions:
+			entry = dict(exception)
+			entry["from"] = label_for(exception["from"], True)
+			entry["to"] = label_for(exception["to"], True)
+			entry["target"] = label_for(exception["target"])
+			code_exceptions.append(entry)
+
+		items = []
+		spans = {}
+		for i, instr in enumerate(instructions):
+			label = labels.get(instr.address)
+			if label is not None:
+				label.address = instr.address
+				items.append(label)
+			items.append(instr)
+
+			end = addresses[i + 1] if i + 1 < len(addresses) else len(code)
+			spans[id(instr)] = (instr, instr.address, end)
+
+		label = labels.get(len(code))
+		if label is not None:
+			label.address = len(code)
+			items.append(label)
+
+		self = cls(items, code_exceptions)
+		self._raw = code
+		self._spans = spans
+		self._placed = {id(label) for label in labels.values()}
+		self._modified = False
+		return self
+
+	def __len__(self):
+		return len(self.items)
+
+	def __iter__(self):
+		return iter(self.items)
+
+	def __repr__(self) -> str:
+		return f"Code(items={len(self.items)}, exceptions={len(self.exceptions)}, size={len(self._raw)})"
+
+	@property
+	def instructions(self) -> list[Instruction]:
+		return [item for item in self.items if item.__class__ is not Label]
+
+	def index(self, item: Instruction | Label) -> int:
+		for i, other in enumerate(self.items):
+			if other is item:
+				return i
+		raise ValueError(f"{item!r} is not part of this code")
+
+	def label(self, index: int) -> Label:
+		# label placed right before items[index], reusing an existing one
+		if index > 0 and self.items[index - 1].__class__ is Label:
+			return self.items[index - 1]
+		if index < len(self.items) and self.items[index].__class__ is Label:
+			return self.items[index]
+
+		label = Label()
+		self.items.insert(index, label)
+		self._modified = True
+		return label
+
+	def insert(self, index: int, *items: Instruction | Label):
+		self.items[index:index] = items
+		self._modified = True
+
+	def append(self, *items: Instruction | Label):
+		self.items.extend(items)
+		self._modified = True
+
+	def remove(self, item: int | Instruction | Label) -> Instruction | Label:
+		index = item if isinstance(item, int) else self.index(item)
+		removed = self.items.pop(index)
+		self._spans.pop(id(removed), None)
+		self._modified = True
+		return removed
+
+	def replace(self, item: int | Instruction, *new: Instruction | Label):
+		index = item if isinstance(item, int) else self.index(item)
+		self._spans.pop(id(self.items[index]), None)
+		self.items[index:index + 1] = new
+		self._modified = True
+
+	def filter(self, keep) -> int:
+		# drop every item for which keep(item) is false, in a single pass
+		kept = [item for item in self.items if keep(item)]
+		removed = len(self.items) - len(kept)
+		if removed:
+			self.items[:] = kept
+			self._modified = True
+		return removed
+
+	def touch(self, instr: Instruction):
+		# the instruction args were edited in place: re-encode it
+		self._spans.pop(id(instr), None)
+		self._modified = True
+
+	def assemble(self) -> bytes:
+		if not self._modified:
+			return self._raw
+
+		raw = self._raw
+		spans = self._spans
+		new_spans = {}
+
+		out = ByteWriter()
+		buf = out.buf
+		run_start = run_end = 0
+		branches = []
+		placed = set()
+
+		for item in self.items:
+			if item.__class__ is Label:
+				item.address = len(buf) + run_end - run_start
+				placed.add(id(item))
+				continue
+
+			span = spans.get(id(item))
+			if span is not None and span[0] is item:
+				_, start, end = span
+				if start != run_end:
+					buf += raw[run_start:run_end]
+					run_start = start
+				run_end = end
+				item.address = len(buf) + run_end - run_start - (end - start)
+			else:
+				if run_end != run_start:
+					buf += raw[run_start:run_end]
+					run_start = run_end = 0
+				item.address = len(buf)
+				if item.targets:
+					self._resolve(item, placeholder=True)
+				encode_instruction(out, item)
+
+			new_spans[id(item)] = (item, item.address, len(buf) + run_end - run_start)
+			if item.targets:
+				branches.append(item)
+
+		buf += raw[run_start:run_end]
+
+		# branch offsets are fixed-width: patch them once every label is placed
+		for instr in branches:
+			for target in instr.targets:
+				if id(target) not in placed:
+					raise ValueError(f"Branch target {target} of {instr.opcode.name} is not in the code")
+			self._resolve(instr)
+			pos = instr.address + 1
+			if instr.opcode is Opcode.lookupswitch:
+				default, cases = instr.args
+				buf[pos:pos + 3] = (default & 0xFFFFFF).to_bytes(3, "little")
+				pos += 3
+				count = len(cases) - 1
+				while True:
+					pos += 1
+					count >>= 7
+					if not count:
+						break
+				for offset in cases:
+					buf[pos:pos + 3] = (offset & 0xFFFFFF).to_bytes(3, "little")
+					pos += 3
+			else:
+				buf[pos:pos + 3] = (instr.args[0] & 0xFFFFFF).to_bytes(3, "little")
+
+		self._raw = bytes(buf)
+		self._spans = new_spans
+		self._placed = placed
+		self._modified = False
+		return self._raw
+
+	def _resolve(self, instr: Instruction, placeholder: bool = False):
+		targets = instr.targets
+		if instr.opcode is Opcode.lookupswitch:
+			# lookupswitch offsets are relative to the instruction itself
+			base = instr.address
+			if placeholder:
+				instr.args = [0, [0] * (len(targets) - 1)]
+			else:
+				instr.args = [targets[0].address - base, [t.address - base for t in targets[1:]]]
+		else:
+			instr.args = [0 if placeholder else targets[0].address - (instr.address + 4)]
+
+	def resolve_exceptions(self) -> list[dict[str, int]]:
+		self.assemble()
+		exceptions = []
+		for exception in self.exceptions:
+			entry = dict(exception)
+			for key in ("from", "to", "target"):
+				if id(exception[key]) not in self._placed:
+					raise ValueError(f"Exception {key} {exception[key]} is not in the code")
+				entry[key] = exception[key].address
+			exceptions.append(entry)
+		return exceptions
+
+	def commit(self, body: dict):
+		body["code"] = self.assemble()
+		body["exceptions"] = self.resolve_exceptions()
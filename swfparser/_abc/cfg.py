@@ -0,0 +1,272 @@
+from dataclasses import dataclass, field
+from bisect import bisect_right
+
+from .instruction import Instruction, Opcode, Stack
+
+# instructions that never fall through to the next one
+TERMINATORS = frozenset((
+	Opcode.jump, Opcode.lookupswitch,
+	Opcode.returnvoid, Opcode.returnvalue, Opcode.throw
+))
+
+@dataclass
+class BasicBlock:
+	index: int
+
+	start: int = 0
+	end: int = 0
+
+	instructions: list[Instruction] = field(default_factory=lambda: [])
+
+	successors: list[int] = field(default_factory=lambda: [])
+	predecessors: list[int] = field(default_factory=lambda: [])
+	# exception edges: handler blocks reachable from this block
+	handlers: list[int] = field(default_factory=lambda: [])
+
+	def __repr__(self):
+		return (
+			f"BasicBlock(index={self.index}, start={self.start}, end={self.end}, "
+			f"instructions={len(self.instructions)}, successors={self.successors}, handlers={self.handlers})"
+		)
+
+class ControlFlowGraph:
+	def __init__(self, stack: Stack, exceptions: list[dict[str, int]] = ()):
+		self.stack: Stack = stack
+		self.code: bytes | None = None
+		self.exceptions: list[dict[str, int]] = exceptions
+
+		self.blocks: list[BasicBlock] = []
+		self._starts: list[int] = []
+
+		self.idom: list[int | None] = []
+		self.loop_headers: set[int] = set()
+		self.reverse_postorder: list[int] = []
+
+		self._pre: list[int] = []
+		self._post: list[int] = []
+
+		self._build_blocks()
+		self._build_edges()
+		self._build_dominators()
+
+	@classmethod
+	def from_code(cls, code: bytes, exceptions: list[dict[str, int]] = ()) -> "ControlFlowGraph":
+		from .reader import ABCReader
+
+		cfg = cls(ABCReader.read_instructions(code), exceptions)
+		cfg.code = code
+		return cfg
+
+	def __len__(self):
+		return len(self.blocks)
+
+	def __iter__(self):
+		return iter(self.blocks)
+
+	def __repr__(self) -> str:
+		edges = sum(len(block.successors) + len(block.handlers) for block in self.blocks)
+		return f"ControlFlowGraph(blocks={len(self.blocks)}, edges={edges}, loops={len(self.loop_headers)})"
+
+	def block_at(self, address: int) -> BasicBlock | None:
+		# block containing the given address
+		i = bisect_right(self._starts, address) - 1
+		if i < 0 or address >= self.blocks[i].end:
+			return None
+		return self.blocks[i]
+
+	def dominates(self, a: int, b: int) -> bool:
+		# O(1) through pre/post-order intervals on the dominator tree
+		if self._pre[a] < 0 or self._pre[b] < 0:
+			return False
+		return self._pre[a] <= self._pre[b] and self._post[b] <= self._post[a]
+
+	def dominators(self, index: int) -> list[int]:
+		result = []
+		node = index
+		while node is not None:
+			result.append(node)
+			node = self.idom[node]
+		return result
+
+	def _build_blocks(self):
+		instructions = self.stack.instructions
+		if not instructions:
+			return
+
+		addresses = {instr.address: i for i, instr in enumerate(instructions)}
+
+		leaders = bytearray(len(instructions))
+		leaders[0] = 1
+		for i, instr in enumerate(instructions):
+			if instr.targets:
+				for target in instr.targets:
+					# targets landing inside an instruction are ignored
+					j = addresses.get(target)
+					if j is not None:
+						leaders[j] = 1
+				if i + 1 < len(instructions):
+					leaders[i + 1] = 1
+			elif instr.opcode in TERMINATORS and i + 1 < len(instructions):
+				leaders[i + 1] = 1
+
+		for exception in self.exceptions:
+			for key in ("from", "to", "target"):
+				j = addresses.get(exception[key])
+				if j is not None:
+					leaders[j] = 1
+
+		code_len = self.stack.code_len or instructions[-1].address + 1
+		start = 0
+		for i in range(1, len(instructions) + 1):
+			if i < len(instructions) and not leaders[i]:
+				continue
+
+			end = instructions[i].address if i < len(instructions) else code_len
+			block = BasicBlock(len(self.blocks), instructions[start].address, end, instructions[start:i])
+			self.blocks.append(block)
+			self._starts.append(block.start)
+			start = i
+
+	def _build_edges(self):
+		blocks = self.blocks
+		index = {block.start: block.index for block in blocks}
+
+		for block in blocks:
+			last = block.instructions[-1]
+
+			succs = []
+			for target in last.targets:
+				j = index.get(target)
+				if j is not None and j not in succs:
+					succs.append(j)
+
+			if last.opcode not in TERMINATORS and block.index + 1 < len(blocks):
+				if block.index + 1 not in succs:
+					succs.append(block.index + 1)
+
+			block.successors = succs
+			for j in succs:
+				blocks[j].predecessors.append(block.index)
+
+		for exception in self.exceptions:
+			handler = index.get(exception["target"])
+			if handler is None:
+				continue
+
+			i = max(bisect_right(self._starts, exception["from"]) - 1, 0)
+			while i < len(blocks) and blocks[i].start < exception["to"]:
+				block = blocks[i]
+				if block.end > exception["from"] and handler not in block.handlers:
+					block.handlers.append(handler)
+					blocks[handler].predecessors.append(block.index)
+				i += 1
+
+	def _build_dominators(self):
+		# Lengauer-Tarjan with path compression, iterative so thousands of
+		# branches do not hit the recursion limit
+		blocks = self.blocks
+		n = len(blocks)
+
+		self.idom = [None] * n
+		self._pre = [-1] * n
+		self._post = [-1] * n
+		if n == 0:
+			return
+
+		dfnum = [-1] * n
+		vertex = []
+		parent = [-1] * n
+		on_stack = bytearray(n)
+		postorder = []
+
+		dfnum[0] = 0
+		vertex.append(0)
+		on_stack[0] = 1
+		work = [(0, iter(blocks[0].successors + blocks[0].handlers))]
+		while work:
+			v, succs = work[-1]
+			for w in succs:
+				if dfnum[w] < 0:
+					dfnum[w] = len(vertex)
+					vertex.append(w)
+					parent[w] = v
+					on_stack[w] = 1
+					work.append((w, iter(blocks[w].successors + blocks[w].handlers)))
+					break
+				elif on_stack[w]:
+					# retreating edge: w heads a (possibly irreducible) loop
+					self.loop_headers.add(w)
+			else:
+				work.pop()
+				on_stack[v] = 0
+				postorder.append(v)
+
+		self.reverse_postorder = postorder[::-1]
+
+		# everything below works on dfs numbers
+		count = len(vertex)
+		semi = list(range(count))
+		label = list(range(count))
+		ancestor = [-1] * count
+		idom = [0] * count
+		bucket = [[] for _ in range(count)]
+		dparent = [dfnum[parent[v]] if parent[v] >= 0 else -1 for v in vertex]
+
+		def evaluate(v: int) -> int:
+			if ancestor[v] < 0:
+				return v
+
+			path = []
+			x = v
+			while ancestor[ancestor[x]] >= 0:
+				path.append(x)
+				x = ancestor[x]
+			for x in reversed(path):
+				a = ancestor[x]
+				if semi[label[a]] < semi[label[x]]:
+					label[x] = label[a]
+				ancestor[x] = ancestor[a]
+			return label[v]
+
+		for w in range(count - 1, 0, -1):
+			for p in blocks[vertex[w]].predecessors:
+				v = dfnum[p]
+				if v < 0:
+					continue
+				u = evaluate(v)
+				if semi[u] < semi[w]:
+					semi[w] = semi[u]
+
+			bucket[semi[w]].append(w)
+			p = dparent[w]
+			ancestor[w] = p
+
+			for v in bucket[p]:
+				u = evaluate(v)
+				idom[v] = u if semi[u] < semi[v] else p
+			bucket[p].clear()
+
+		for w in range(1, count):
+			if idom[w] != semi[w]:
+				idom[w] = idom[idom[w]]
+
+		children = [[] for _ in range(n)]
+		for w in range(1, count):
+			self.idom[vertex[w]] = vertex[idom[w]]
+			children[vertex[idom[w]]].append(vertex[w])
+
+		# pre/post numbering of the dominator tree for O(1) dominance checks
+		clock = 0
+		work = [(0, iter(children[0]))]
+		self._pre[0] = clock
+		while work:
+			v, kids = work[-1]
+			for w in kids:
+				clock += 1
+				self._pre[w] = clock
+				work.append((w, iter(children[w])))
+				break
+			else:
+				work.pop()
+				clock += 1
+				self._post[v] = clock
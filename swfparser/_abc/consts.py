@@ -17,10 +17,40 @@ HAS_OPTIONAL    = 0x08
 SET_DXNS        = 0x40
 HAS_PARAM_NAMES = 0x80
 
+# DoABC tag flags
+DOABC_LAZY_INITIALIZE = 0x01
+
 TRAIT_SLOT     = 0x00
 TRAIT_METHOD   = 0x01
 TRAIT_GETTER   = 0x02
 TRAIT_SETTER   = 0x03
 TRAIT_CLASS    = 0x04
 TRAIT_FUNCTION = 0x05
-TRAIT_CONST    = 0x06
\ No newline at end of file
+TRAIT_CONST    = 0x06
+
+TRAIT_NAMES = {
+	TRAIT_SLOT: "slot", TRAIT_METHOD: "method", TRAIT_GETTER: "getter", TRAIT_SETTER: "setter",
+	TRAIT_CLASS: "class", TRAIT_FUNCTION: "function", TRAIT_CONST: "const",
+}
+
+CONSTANT_Undefined          = 0x00
+CONSTANT_Utf8               = 0x01
+CONSTANT_Int                = 0x03
+CONSTANT_UInt               = 0x04
+CONSTANT_PrivateNs          = 0x05
+CONSTANT_Double             = 0x06
+CONSTANT_Namespace          = 0x08
+CONSTANT_False              = 0x0A
+CONSTANT_True               = 0x0B
+CONSTANT_Null               = 0x0C
+CONSTANT_PackageNamespace   = 0x16
+CONSTANT_PackageInternalNs  = 0x17
+CONSTANT_ProtectedNamespace = 0x18
+CONSTANT_ExplicitNamespace  = 0x19
+CONSTANT_StaticProtectedNs  = 0x1A
+
+NAMESPACE_KINDS = (
+	CONSTANT_Namespace, CONSTANT_PackageNamespace, CONSTANT_PackageInternalNs,
+	CONSTANT_ProtectedNamespace, CONSTANT_ExplicitNamespace, CONSTANT_StaticProtectedNs,
+	CONSTANT_PrivateNs
+)
\ No newline at end of file
@@ -0,0 +1,237 @@
+from .consts import *
+from .instruction import OPERAND_POOLS
+from .reader import ABCReader
+from .strip import DEBUG_OPCODES
+
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+
+import hashlib
+
+_VALUE_KINDS = {
+	CONSTANT_Undefined: "undefined", CONSTANT_False: "false", CONSTANT_True: "true", CONSTANT_Null: "null",
+}
+
+def _digest(value) -> str:
+	return hashlib.blake2b(repr(value).encode(), digest_size=16).hexdigest()
+
+@dataclass
+class Change:
+	kind: str # "class", "trait" or "method"
+	name: str
+	# per-body opcode diff of modified methods, difflib style "-"/"+" lines
+	opcodes: list[str] = field(default_factory=list)
+
+@dataclass
+class Diff:
+	added: list[Change] = field(default_factory=list)
+	removed: list[Change] = field(default_factory=list)
+	modified: list[Change] = field(default_factory=list)
+
+	def __bool__(self) -> bool:
+		return bool(self.added or self.removed or self.modified)
+
+class Fingerprint:
+	# Stable hashes of every class, trait and method of one or more ABCs, keyed
+	# by resolved name. Pool indices are replaced by the values they resolve to
+	# and branch offsets by instruction distances, so unrelated pool growth or
+	# code moves do not change a hash. Debug opcodes are ignored
+
+	def __init__(self, abcs: list):
+		self.entries: dict[str, tuple[str, str]] = {}
+		# method key -> (abc, method index), to rebuild opcode listings on demand
+		self.methods: dict[str, tuple[object, int]] = {}
+		# one hasher per ABC, reused by instructions() with its body index
+		self._hashers: dict[int, _Hasher] = {}
+
+		for abc in abcs:
+			self._hashers[id(abc)] = _Hasher(abc, self)
+			self._hashers[id(abc)].run()
+
+	def add(self, kind: str, key: str, digest: str):
+		self.entries[key] = (kind, digest)
+
+	def instructions(self, key: str) -> list[str]:
+		abc, method = self.methods[key]
+		return self._hashers[id(abc)].instructions(method)
+
+class _Hasher:
+	def __init__(self, abc, fingerprint: Fingerprint):
+		self.abc = abc
+		self.fingerprint = fingerprint
+		self.bodies = {body["method_index"]: body for body in abc.method_bodies}
+		self._method_hashes: dict[int, str] = {}
+
+	def run(self):
+		abc = self.abc
+		for index, instance in enumerate(abc.instance_pool):
+			name = abc.resolve_multiname(instance["name"])
+			klass = abc.class_pool[index]
+
+			members = [
+				self.method(f"{name}/iinit", instance["iinit"]),
+				self.method(f"{name}/cinit", klass["cinit"]),
+				*self.traits(f"{name}/", instance["traits"]),
+				*self.traits(f"{name}/static ", klass["traits"]),
+			]
+			self.fingerprint.add("class", name, _digest((
+				abc.resolve_multiname(instance["super"]),
+				instance["flags"],
+				None if instance["protected_ns"] is None else abc.resolve_namespace(instance["protected_ns"]),
+				[abc.resolve_multiname(interface) for interface in instance["interfaces"]],
+				sorted(members),
+			)))
+
+		for script in abc.script_pool:
+			# script entry points are anonymous: keyed by the traits they declare
+			self.traits("script/", script["traits"])
+			key = "script/" + ",".join(sorted(abc.resolve_multiname(trait["name"]) for trait in script["traits"]))
+			self.method(f"{key}/init", script["init"])
+
+	def traits(self, prefix: str | None, traits: list[dict]) -> list[str]:
+		# prefix None hashes without registering entities (activation traits)
+		abc = self.abc
+		digests = []
+		for trait in traits:
+			kind_tag = trait["kind"] & 0x0F
+			kind = TRAIT_NAMES.get(kind_tag, str(kind_tag))
+			name = f"{kind} {abc.resolve_multiname(trait['name'])}"
+			key = None if prefix is None else prefix + name
+
+			if kind_tag in (TRAIT_SLOT, TRAIT_CONST):
+				value = self.value(trait.get("vkind"), trait["vindex"]) if trait["vindex"] else None
+				content = (trait["slot_id"], abc.resolve_multiname(trait["type_name"]), value)
+			elif kind_tag == TRAIT_CLASS:
+				content = (trait["disp_id"], abc.resolve_multiname(abc.instance_pool[trait["index"]]["name"]))
+			else:
+				content = self.method(key, trait["index"])
+
+			digest = _digest((name, trait["kind"] >> 4, content))
+			if key is not None:
+				self.fingerprint.add("trait", key, digest)
+			digests.append(digest)
+		return digests
+
+	def value(self, kind: int | None, index: int):
+		abc = self.abc
+		if kind == CONSTANT_Int:
+			return abc.int_pool[index]
+		if kind == CONSTANT_UInt:
+			return abc.uint_pool[index]
+		if kind == CONSTANT_Double:
+			return abc.double_pool[index]
+		if kind == CONSTANT_Utf8:
+			return abc.string_pool[index]
+		if kind in NAMESPACE_KINDS:
+			return abc.resolve_namespace(index)
+		return _VALUE_KINDS.get(kind, kind)
+
+	def method(self, key: str | None, index: int) -> str:
+		digest = self.method_hash(index)
+		if key is not None:
+			self.fingerprint.add("method", key, digest)
+			self.fingerprint.methods[key] = (self.abc, index)
+		return digest
+
+	def method_hash(self, index: int) -> str:
+		digest = self._method_hashes.get(index)
+		if digest is not None:
+			return digest
+		# closures referencing themselves hash to their signature only
+		self._method_hashes[index] = ""
+
+		abc = self.abc
+		info = abc.method_info[index]
+		signature = (
+			abc.resolve_multiname(info["return_type"]),
+			[abc.resolve_multiname(param) for param in info["params"]],
+			[self.value(kind, value) for value, kind in info.get("optional_params", ())],
+			info["flags"],
+		)
+		body = self.bodies.get(index)
+		if body is not None:
+			tokens, exceptions = self.decode(body)
+			digest = _digest((signature, tokens, exceptions, self.traits(None, body["traits"])))
+		else:
+			digest = _digest(signature)
+
+		self._method_hashes[index] = digest
+		return digest
+
+	def instructions(self, index: int) -> list[str]:
+		body = self.bodies.get(index)
+		return [] if body is None else self.decode(body)[0]
+
+	def decode(self, body: dict) -> tuple[list[str], list[tuple]]:
+		abc = self.abc
+		instructions = []
+		# address -> index of the first kept instruction at or after it
+		positions = {}
+		for instr in ABCReader.read_instructions(body["code"]).instructions:
+			positions[instr.address] = len(instructions)
+			if instr.opcode not in DEBUG_OPCODES:
+				instructions.append(instr)
+		end = len(instructions)
+
+		tokens = []
+		for i, instr in enumerate(instructions):
+			if instr.targets:
+				# distance in instructions, immune to operand size changes
+				args = [positions.get(target, end) - i for target in instr.targets]
+			else:
+				pools = OPERAND_POOLS.get(instr.opcode)
+				args = instr.args if pools is None else [
+					self.operand(pool, arg) if pool is not None else arg for pool, arg in zip(pools, instr.args)
+				]
+			tokens.append(f"{instr.opcode.name} {' '.join(map(repr, args))}".rstrip())
+
+		exceptions = [
+			(
+				positions.get(exception["from"], end), positions.get(exception["to"], end),
+				positions.get(exception["target"], end),
+				abc.resolve_multiname(exception["exc_type"]), abc.resolve_multiname(exception["var_name"])
+			)
+			for exception in body["exceptions"]
+		]
+		return tokens, exceptions
+
+	def operand(self, pool: str, index: int):
+		abc = self.abc
+		if pool == "multiname":
+			return abc.resolve_multiname(index)
+		if pool == "namespace":
+			return abc.resolve_namespace(index)
+		if pool == "method":
+			return self.method_hash(index)
+		if pool == "class":
+			return abc.resolve_multiname(abc.instance_pool[index]["name"])
+		return getattr(abc, f"{pool}_pool")[index]
+
+def _opcode_diff(old: list[str], new: list[str]) -> list[str]:
+	lines = []
+	for tag, i1, i2, j1, j2 in SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+		if tag == "equal":
+			continue
+		lines.extend(f"-{i1 + k}: {token}" for k, token in enumerate(old[i1:i2]))
+		lines.extend(f"+{j1 + k}: {token}" for k, token in enumerate(new[j1:j2]))
+	return lines
+
+def diff(old: Fingerprint, new: Fingerprint, opcodes: bool = True) -> Diff:
+	# entities are matched by key through the two hash maps: O(n) apart from
+	# the opcode diffs of modified methods
+	result = Diff()
+	for key, (kind, digest) in new.entries.items():
+		previous = old.entries.get(key)
+		if previous is None:
+			result.added.append(Change(kind, key))
+		elif previous[1] != digest:
+			change = Change(kind, key)
+			if opcodes and kind == "method":
+				change.opcodes = _opcode_diff(old.instructions(key), new.instructions(key))
+			result.modified.append(change)
+
+	for key, (kind, _) in old.entries.items():
+		if key not in new.entries:
+			result.removed.append(Change(kind, key))
+
+	return result
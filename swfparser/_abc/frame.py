@@ -0,0 +1,240 @@
+from .cfg import ControlFlowGraph
+from .consts import *
+from .instruction import Instruction, Opcode
+
+from dataclasses import dataclass, field
+
+# (pops, pushes) for opcodes whose effect does not depend on their operands
+STACK_EFFECTS: dict[Opcode, tuple[int, int]] = {}
+
+def _effect(pops: int, pushes: int, *names: str):
+	for name in names:
+		STACK_EFFECTS[Opcode[name]] = (pops, pushes)
+
+_effect(0, 0,
+	"bkpt", "bkptline", "debug", "debugfile", "debugline", "nop", "label",
+	"kill", "inclocal", "inclocal_i", "declocal", "declocal_i", "dxns",
+	"jump", "popscope", "returnvoid", "callsuperid", "unknown_7d"
+)
+_effect(0, 1,
+	"finddef", "getglobalscope", "getglobalslot", "getlex", "getlocal",
+	"getlocal_0", "getlocal_1", "getlocal_2", "getlocal_3", "getouterscope",
+	"getscopeobject", "hasnext2", "newactivation", "newcatch", "newfunction",
+	"pushbyte", "pushconstant", "pushdecimal", "pushdnan", "pushdouble",
+	"pushfalse", "pushint", "pushnamespace", "pushnan", "pushnull", "pushshort",
+	"pushstring", "pushtrue", "pushuint", "pushundefined"
+)
+_effect(1, 0,
+	"pop", "pushscope", "pushwith", "returnvalue", "throw", "setglobalslot",
+	"setlocal", "setlocal_0", "setlocal_1", "setlocal_2", "setlocal_3",
+	"iffalse", "iftrue", "lookupswitch", "dxnslate"
+)
+_effect(1, 1,
+	"bitnot", "negate", "negate_i", "increment", "increment_i", "decrement",
+	"decrement_i", "_not", "typeof", "convert_b", "convert_d", "convert_i",
+	"convert_o", "convert_s", "convert_u", "coerce", "coerce_a", "coerce_b",
+	"coerce_d", "coerce_i", "coerce_o", "coerce_s", "coerce_u", "astype",
+	"istype", "esc_xattr", "esc_xelem", "checkfilter", "sxi1", "sxi8", "sxi16",
+	"li8", "li16", "li32", "lf32", "lf64", "getslot", "newclass"
+)
+_effect(1, 2, "dup")
+_effect(2, 0,
+	"si8", "si16", "si32", "sf32", "sf64", "setslot", "ifeq", "ifne", "iflt",
+	"ifle", "ifgt", "ifge", "ifnlt", "ifnle", "ifngt", "ifnge", "ifstricteq",
+	"ifstrictne"
+)
+_effect(2, 1,
+	"add", "add_d", "add_i", "subtract", "subtract_i", "multiply", "multiply_i",
+	"divide", "modulo", "lshift", "rshift", "urshift", "bitand", "bitor",
+	"bitxor", "equals", "strictequals", "lessthan", "lessequals", "greaterthan",
+	"greaterequals", "instance_of", "istypelate", "astypelate", "_in",
+	"hasnext", "nextname", "nextvalue", "deletepropertylate", "concat"
+)
+_effect(2, 2, "swap")
+_effect(3, 0, "setpropertylate")
+
+SCOPE_EFFECTS: dict[Opcode, int] = {
+	Opcode.pushscope: 1,
+	Opcode.pushwith: 1,
+	Opcode.popscope: -1
+}
+
+_MULTINAME_OPS = frozenset((
+	Opcode.callproperty, Opcode.callproplex, Opcode.callsuper, Opcode.constructprop,
+	Opcode.callinterface, Opcode.callpropvoid, Opcode.callsupervoid, Opcode.getproperty,
+	Opcode.getsuper, Opcode.getdescendants, Opcode.deleteproperty, Opcode.setproperty,
+	Opcode.initproperty, Opcode.setsuper, Opcode.findproperty, Opcode.findpropstrict,
+	Opcode.findpropglobal, Opcode.findpropglobalstrict
+))
+
+def runtime_name_count(multiname: dict | None) -> int:
+	# stack slots consumed by the runtime parts of a multiname
+	if multiname is None:
+		return 0
+	kind = multiname["kind"]
+	if kind in (CONSTANT_RTQName, CONSTANT_RTQNameA, CONSTANT_MultinameL, CONSTANT_MultinameLA):
+		return 1
+	if kind in (CONSTANT_RTQNameL, CONSTANT_RTQNameLA):
+		return 2
+	return 0
+
+def stack_effect(instr: Instruction, multiname_pool: list[dict] = None) -> tuple[int, int]:
+	opcode = instr.opcode
+	try:
+		return STACK_EFFECTS[opcode]
+	except KeyError:
+		pass
+
+	args = instr.args
+	rt = 0
+	if multiname_pool is not None and opcode in _MULTINAME_OPS:
+		index = args[0]
+		rt = runtime_name_count(multiname_pool[index] if index < len(multiname_pool) else None)
+
+	match opcode:
+		case Opcode.call:
+			return args[0] + 2, 1
+		case Opcode.callmethod | Opcode.callstatic | Opcode.construct:
+			return args[-1] + 1, 1
+		case Opcode.constructsuper:
+			return args[0] + 1, 0
+		case Opcode.callproperty | Opcode.callproplex | Opcode.callsuper | Opcode.constructprop | Opcode.callinterface:
+			return args[1] + 1 + rt, 1
+		case Opcode.callpropvoid | Opcode.callsupervoid:
+			return args[1] + 1 + rt, 0
+		case Opcode.getproperty | Opcode.getsuper | Opcode.getdescendants | Opcode.deleteproperty:
+			return 1 + rt, 1
+		case Opcode.setproperty | Opcode.initproperty | Opcode.setsuper:
+			return 2 + rt, 0
+		case Opcode.findproperty | Opcode.findpropstrict | Opcode.findpropglobal | Opcode.findpropglobalstrict:
+			return rt, 1
+		case Opcode.applytype:
+			return args[0] + 1, 1
+		case Opcode.newarray:
+			return args[0], 1
+		case Opcode.newobject:
+			return args[0] * 2, 1
+
+	raise ValueError(f"No stack effect for opcode: {opcode.name}")
+
+# registers addressed by the opcode itself
+FIXED_REGISTERS: dict[Opcode, int] = {
+	**{Opcode[f"getlocal_{i}"]: i for i in range(4)},
+	**{Opcode[f"setlocal_{i}"]: i for i in range(4)},
+}
+
+_REGISTER_OPS = frozenset((
+	Opcode.getlocal, Opcode.setlocal, Opcode.kill, Opcode.inclocal,
+	Opcode.inclocal_i, Opcode.declocal, Opcode.declocal_i
+))
+
+def registers(instr: Instruction) -> tuple[int, ...]:
+	# local registers read or written by an instruction
+	opcode = instr.opcode
+	fixed = FIXED_REGISTERS.get(opcode)
+	if fixed is not None:
+		return (fixed,)
+	if opcode in _REGISTER_OPS:
+		return (instr.args[0],)
+	if opcode is Opcode.hasnext2:
+		return (instr.args[0], instr.args[1])
+	if opcode is Opcode.debug and instr.args[0] == 1: # DI_LOCAL
+		return (instr.args[2],)
+	return ()
+
+def parameter_registers(method_info: dict) -> int:
+	# registers filled on entry: this, the parameters and rest/arguments
+	count = 1 + len(method_info["params"])
+	if method_info["flags"] & (NEED_REST | NEED_ARGUMENTS):
+		count += 1
+	return count
+
+@dataclass
+class FrameAnalysis:
+	# per instruction of cfg.stack, -1 where unreachable
+	stack: list[int] = field(default_factory=lambda: [])
+	scope: list[int] = field(default_factory=lambda: [])
+
+	max_stack: int = 0
+	# local scope depth above init_scope
+	max_scope: int = 0
+	# highest register referenced, -1 if none
+	max_register: int = -1
+
+	# problems the verifier would reject: underflows and paths merging with
+	# different depths. Limits are still computed, from the first path seen
+	errors: list[str] = field(default_factory=lambda: [])
+
+	def local_count(self, method_info: dict) -> int:
+		return max(self.max_register + 1, parameter_registers(method_info))
+
+def analyze_frame(cfg: ControlFlowGraph, multiname_pool: list[dict] = None) -> FrameAnalysis:
+	# single worklist pass over the blocks in flow order: every reachable
+	# block is walked once from the state of the first edge reaching it, the
+	# other edges are only checked against it. Handlers start with the caught
+	# exception on an otherwise empty stack and scope
+	instructions = cfg.stack.instructions
+	positions = {id(instr): i for i, instr in enumerate(instructions)}
+	frame = FrameAnalysis([-1] * len(instructions), [-1] * len(instructions))
+
+	blocks = cfg.blocks
+	if not blocks:
+		return frame
+
+	entry = [None] * len(blocks)
+	entry[0] = (0, 0)
+	errors = frame.errors
+	work = [0]
+
+	def reach(target: int, state: tuple[int, int], source: str):
+		if entry[target] is None:
+			entry[target] = state
+			work.append(target)
+		elif entry[target] != state:
+			errors.append(
+				f"Block at {blocks[target].start}: {source} reaches it with stack/scope {state}, expected {entry[target]}"
+			)
+
+	while work:
+		index = work.pop()
+		block = blocks[index]
+		stack, scope = entry[index]
+
+		for instr in block.instructions:
+			position = positions[id(instr)]
+			frame.stack[position] = stack
+			frame.scope[position] = scope
+
+			pops, pushes = stack_effect(instr, multiname_pool)
+			if pops > stack:
+				errors.append(f"Stack underflow at {instr.address}: {instr.opcode.name} pops {pops} of {stack}")
+			stack = max(stack - pops, 0) + pushes
+			if stack > frame.max_stack:
+				frame.max_stack = stack
+
+			scope += SCOPE_EFFECTS.get(instr.opcode, 0)
+			if scope < 0:
+				errors.append(f"Scope underflow at {instr.address}")
+				scope = 0
+			if scope > frame.max_scope:
+				frame.max_scope = scope
+			if instr.opcode is Opcode.getscopeobject and instr.args[0] >= scope:
+				errors.append(f"Scope {instr.args[0]} out of range at {instr.address}")
+
+			for register in registers(instr):
+				if register > frame.max_register:
+					frame.max_register = register
+
+		for succ in block.successors:
+			reach(succ, (stack, scope), f"block at {block.start}")
+
+		for handler in block.handlers:
+			frame.max_stack = max(frame.max_stack, 1)
+			reach(handler, (1, 0), f"exception edge from {block.start}")
+
+	return frame
+
+def compute_limits(cfg: ControlFlowGraph, multiname_pool: list[dict] = None) -> tuple[int, int]:
+	# (max_stack, max scope depth above init_scope) over every reachable path
+	frame = analyze_frame(cfg, multiname_pool)
+	return frame.max_stack, frame.max_scope
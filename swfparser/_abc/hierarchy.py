@@ -0,0 +1,222 @@
+from .consts import *
+
+from typing import Iterable, Iterator
+
+class ClassNode:
+	__slots__ = ("name", "abc", "index", "interface", "super", "interfaces", "children", "symbols", "pre", "end")
+
+	def __init__(self, name: str, abc=None, index: int | None = None, interface: bool = False):
+		# qualified name in SymbolClass form: "package.Name"
+		self.name: str = name
+		# defining ABC and instance/class pool index, None for external types
+		self.abc = abc
+		self.index: int | None = index
+		self.interface: bool = interface
+
+		self.super: ClassNode | None = None
+		self.interfaces: list[ClassNode] = []
+		self.children: list[ClassNode] = []
+		# character ids bound to this class by SymbolClass tags
+		self.symbols: list[int] = []
+
+		# preorder number and end of the subtree in the preorder list
+		self.pre: int = -1
+		self.end: int = -1
+
+	def __repr__(self) -> str:
+		return f"ClassNode(name={self.name!r}, external={self.external})"
+
+	@property
+	def external(self) -> bool:
+		return self.abc is None
+
+	@property
+	def instance(self) -> dict | None:
+		return None if self.abc is None else self.abc.instance_pool[self.index]
+
+	@property
+	def klass(self) -> dict | None:
+		return None if self.abc is None else self.abc.class_pool[self.index]
+
+def _qualified_names(abc, multiname: dict | None) -> list[str]:
+	# candidate qualified names of a class reference, one per namespace
+	if multiname is None or multiname is abc.multiname_pool[0] or "name_index" not in multiname:
+		return []
+	if multiname["kind"] == CONSTANT_TypeName:
+		return _qualified_names(abc, abc.multiname_pool[multiname["name_index"]])
+
+	name = abc.string_pool[multiname["name_index"]]
+	if "ns_index" in multiname:
+		namespaces = [multiname["ns_index"]]
+	elif "ns_set_index" in multiname:
+		namespaces = abc.ns_set_pool[multiname["ns_set_index"]]
+	else:
+		return [name]
+
+	names = []
+	for ns in namespaces:
+		package = abc.string_pool[abc.namespace_pool[ns]["name_index"]]
+		names.append(f"{package}.{name}" if package else name)
+	return names
+
+class Hierarchy:
+	# Class and interface graph of one or more ABCs, built once. Classes form a
+	# tree through their superclass, numbered in preorder so that subclass
+	# tests are an interval check and subtree listings a slice. Interface sets
+	# are closed transitively on build. Referenced types not defined in any
+	# ABC (player and framework classes) are kept as external nodes
+
+	def __init__(self, abcs: Iterable, symbols: dict[int, str] | None = None):
+		self.nodes: dict[str, ClassNode] = {}
+		self.preorder: list[ClassNode] = []
+
+		# every interface a class or interface is a subtype of
+		self._interfaces: dict[ClassNode, frozenset[ClassNode]] = {}
+		self._implementors: dict[ClassNode, list[ClassNode]] = {}
+		self._symbols: dict[int, ClassNode] = {}
+
+		defined = []
+		for abc in abcs:
+			for index, instance in enumerate(abc.instance_pool):
+				names = _qualified_names(abc, instance["name"])
+				if not names or names[0] in self.nodes:
+					# the first definition wins, as in the player
+					continue
+				node = self.nodes[names[0]] = ClassNode(names[0], abc, index, bool(instance["flags"] & 0x04)) # Interface flag
+				defined.append(node)
+
+		for node in defined:
+			instance = node.instance
+			parent = self._reference(node.abc, instance["super"])
+			if parent is not None and not self._inherits(parent, node):
+				node.super = parent
+				parent.children.append(node)
+			node.interfaces = [
+				interface for interface in (self._reference(node.abc, multiname) for multiname in instance["interfaces"])
+				if interface is not None
+			]
+
+		for character, name in (symbols or {}).items():
+			node = self.nodes.get(name)
+			if node is not None:
+				node.symbols.append(character)
+				self._symbols[character] = node
+
+		self._number()
+		for node in self.nodes.values():
+			for interface in self.interfaces(node):
+				self._implementors.setdefault(interface, []).append(node)
+
+	def _reference(self, abc, multiname: dict | None) -> ClassNode | None:
+		names = _qualified_names(abc, multiname)
+		if not names:
+			return None
+		for name in names:
+			node = self.nodes.get(name)
+			if node is not None:
+				return node
+		node = self.nodes[names[0]] = ClassNode(names[0])
+		return node
+
+	@staticmethod
+	def _inherits(node: ClassNode, ancestor: ClassNode) -> bool:
+		# guards against malformed super cycles while linking
+		while node is not None:
+			if node is ancestor:
+				return True
+			node = node.super
+		return False
+
+	def _number(self):
+		preorder = self.preorder
+		for root in [node for node in self.nodes.values() if node.super is None]:
+			stack = [(root, False)]
+			while stack:
+				node, done = stack.pop()
+				if done:
+					node.end = len(preorder)
+					continue
+				node.pre = len(preorder)
+				preorder.append(node)
+				stack.append((node, True))
+				stack.extend((child, False) for child in reversed(node.children))
+
+	def __len__(self) -> int:
+		return len(self.nodes)
+
+	def __iter__(self) -> Iterator[ClassNode]:
+		return iter(self.preorder)
+
+	def __contains__(self, name: str) -> bool:
+		return name in self.nodes
+
+	def __getitem__(self, name: str) -> ClassNode:
+		node = self.nodes.get(name)
+		if node is None:
+			raise ValueError(f"Unknown class: {name}")
+		return node
+
+	def _node(self, node: ClassNode | str) -> ClassNode:
+		return node if isinstance(node, ClassNode) else self[node]
+
+	def by_symbol(self, character: int) -> ClassNode | None:
+		return self._symbols.get(character)
+
+	def ancestors(self, node: ClassNode | str) -> list[ClassNode]:
+		# superclass chain, nearest first
+		node = self._node(node).super
+		chain = []
+		while node is not None:
+			chain.append(node)
+			node = node.super
+		return chain
+
+	def subclasses(self, node: ClassNode | str, direct: bool = False) -> list[ClassNode]:
+		node = self._node(node)
+		if direct:
+			return list(node.children)
+		return self.preorder[node.pre + 1:node.end]
+
+	def interfaces(self, node: ClassNode | str) -> frozenset[ClassNode]:
+		# interfaces implemented directly, through superclasses or through
+		# interface inheritance
+		node = self._node(node)
+		result = self._interfaces.get(node)
+		if result is not None:
+			return result
+
+		# iterative postorder over super and interface edges; edges back into
+		# the current path (malformed cycles) are ignored
+		visiting = set()
+		stack = [(node, False)]
+		while stack:
+			current, done = stack.pop()
+			if current in self._interfaces:
+				continue
+			edges = [current.super] if current.super is not None else []
+			edges += current.interfaces
+			if not done:
+				if current in visiting:
+					continue
+				visiting.add(current)
+				stack.append((current, True))
+				stack.extend((edge, False) for edge in edges if edge not in self._interfaces and edge not in visiting)
+				continue
+			collected = set(current.interfaces)
+			for edge in edges:
+				collected |= self._interfaces.get(edge, frozenset())
+			self._interfaces[current] = frozenset(collected)
+		return self._interfaces[node]
+
+	def implementors(self, interface: ClassNode | str) -> list[ClassNode]:
+		# classes and interfaces that are subtypes of an interface
+		return list(self._implementors.get(self._node(interface), ()))
+
+	def is_subclass(self, node: ClassNode | str, ancestor: ClassNode | str) -> bool:
+		# a class counts as its own subclass
+		node, ancestor = self._node(node), self._node(ancestor)
+		return ancestor.pre <= node.pre < ancestor.end
+
+	def is_subtype(self, node: ClassNode | str, other: ClassNode | str) -> bool:
+		node, other = self._node(node), self._node(other)
+		return self.is_subclass(node, other) or other in self.interfaces(node)
@@ -8,7 +8,9 @@ class Instruction:
     address: int = -1
 
     args: list[int] = field(default_factory=lambda: [])
-    targets: list[int] = field(default_factory=lambda: [])
+    # absolute branch addresses as read; inside a Code they are replaced by
+    # the Label objects placed at those addresses
+    targets: list["int | Label"] = field(default_factory=lambda: [])
 
     def __repr__(self):
         return f"Instruction(name='{self.opcode.name}', opcode=0x{self.opcode.value[0]:02x}, args={self.args})"
@@ -248,4 +250,30 @@ class Opcode(Enum):
             CODE_TO_OPCODE[code] = member = cls._missing_(code)
             return member
     
-CODE_TO_OPCODE = {m.value[0]: m for m in Opcode}
\ No newline at end of file
+CODE_TO_OPCODE = {m.value[0]: m for m in Opcode}
+
+# constant pool referenced by each operand, None for plain values
+OPERAND_POOLS: dict[Opcode, tuple[str | None, ...]] = {}
+
+for _name in (
+    "astype", "coerce", "istype", "getlex", "finddef", "findproperty", "findpropstrict",
+    "findpropglobal", "findpropglobalstrict", "getproperty", "setproperty", "initproperty",
+    "deleteproperty", "getsuper", "setsuper", "getdescendants", "callproperty", "callproplex",
+    "callpropvoid", "callsuper", "callsupervoid", "constructprop"
+):
+    OPERAND_POOLS[Opcode[_name]] = ("multiname", None)
+
+OPERAND_POOLS.update({
+    Opcode.pushstring: ("string",),
+    Opcode.debugfile: ("string",),
+    Opcode.dxns: ("string",),
+    Opcode.debug: (None, "string", None, None),
+    Opcode.pushint: ("int",),
+    Opcode.pushuint: ("uint",),
+    Opcode.pushdouble: ("double",),
+    Opcode.pushnamespace: ("namespace",),
+    Opcode.newfunction: ("method",),
+    Opcode.callstatic: ("method", None),
+    Opcode.newclass: ("class",),
+})
+del _name
\ No newline at end of file
@@ -0,0 +1,977 @@
+from .consts import *
+from .frame import runtime_name_count
+from .instruction import Opcode
+from .reader import ABCReader
+
+from typing import Callable, Iterable
+
+import math
+import re
+
+class _Undefined:
+	__slots__ = ()
+
+	def __repr__(self) -> str:
+		return "undefined"
+
+UNDEFINED = _Undefined()
+
+class _Global:
+	# the global scope, receiver of top-level functions
+	__slots__ = ()
+
+	def __repr__(self) -> str:
+		return "global"
+
+GLOBAL = _Global()
+
+# longest string or array a sandboxed call may build
+MAX_LENGTH = 1 << 22
+# memoized call results kept per interpreter, oldest dropped first
+MAX_MEMO = 1 << 16
+# integers beyond 2^53 are not exact doubles: arithmetic continues in floats
+_SAFE_INTEGER = 1 << 53
+
+class _ClassRef:
+	__slots__ = ("index",)
+
+	def __init__(self, index: int):
+		self.index = index
+
+class _Intrinsic:
+	# whitelisted builtin class: its members are plain Python callables or values
+	def __init__(self, name: str, members: dict, convert: Callable | None = None):
+		self.name = name
+		self.members = members
+		self.convert = convert
+
+# --- ECMAScript conversions -------------------------------------------------
+
+def _number(value: int | float) -> int | float:
+	if value.__class__ is int and not -_SAFE_INTEGER <= value <= _SAFE_INTEGER:
+		return float(value)
+	return value
+
+def _checked(value):
+	# strings and arrays are capped so a call cannot exhaust memory
+	if (value.__class__ is str or value.__class__ is list) and len(value) > MAX_LENGTH:
+		raise ValueError(f"Result longer than {MAX_LENGTH}")
+	return value
+
+def _to_number(value) -> int | float:
+	if value.__class__ is int or value.__class__ is float:
+		return value
+	if value is True or value is False:
+		return int(value)
+	if isinstance(value, (int, float)):
+		return value
+	if value is None:
+		return 0
+	if isinstance(value, str):
+		text = value.strip()
+		if not text:
+			return 0
+		try:
+			return _number(int(text, 16)) if text[:2].lower() == "0x" else float(text)
+		except ValueError:
+			return math.nan
+	if isinstance(value, list):
+		return _to_number(_to_string(value))
+	return math.nan
+
+def _to_int32(value) -> int:
+	if value.__class__ is int and -0x80000000 <= value <= 0x7FFFFFFF:
+		return value
+	number = _to_number(value)
+	if isinstance(number, float):
+		if math.isnan(number) or math.isinf(number):
+			return 0
+		number = int(number)
+	number &= 0xFFFFFFFF
+	return number - (1 << 32) if number & 0x80000000 else number
+
+def _to_uint32(value) -> int:
+	return _to_int32(value) & 0xFFFFFFFF
+
+_EXPONENT = re.compile(r"e([+-])0*(\d)")
+
+def _number_to_string(number: int | float) -> str:
+	if isinstance(number, int):
+		return str(number)
+	if math.isnan(number):
+		return "NaN"
+	if math.isinf(number):
+		return "Infinity" if number > 0 else "-Infinity"
+	if number.is_integer() and abs(number) < 1e21:
+		return str(int(number))
+	return _EXPONENT.sub(r"e\1\2", repr(number))
+
+def _to_string(value) -> str:
+	if isinstance(value, str):
+		return value
+	if value is True or value is False:
+		return "true" if value else "false"
+	if isinstance(value, (int, float)):
+		return _number_to_string(value)
+	if value is None:
+		return "null"
+	if value is UNDEFINED:
+		return "undefined"
+	if isinstance(value, list):
+		return ",".join("" if item is None or item is UNDEFINED else _to_string(item) for item in value)
+	raise ValueError(f"Cannot convert {value!r} to a string")
+
+def _to_boolean(value) -> bool:
+	if value is True or value is False:
+		return value
+	if isinstance(value, (int, float)):
+		return value != 0 and not (isinstance(value, float) and math.isnan(value))
+	if isinstance(value, str):
+		return value != ""
+	return value is not None and value is not UNDEFINED
+
+def _is_number(value) -> bool:
+	return isinstance(value, (int, float)) and value is not True and value is not False
+
+def _strict_equals(a, b) -> bool:
+	if _is_number(a) and _is_number(b):
+		return a == b
+	if type(a) is not type(b):
+		return False
+	if isinstance(a, (str, bool)):
+		return a == b
+	return a is b
+
+def _equals(a, b) -> bool:
+	if a is None or a is UNDEFINED or b is None or b is UNDEFINED:
+		return (a is None or a is UNDEFINED) and (b is None or b is UNDEFINED)
+	if isinstance(a, str) and isinstance(b, str):
+		return a == b
+	if isinstance(a, (str, bool, int, float)) and isinstance(b, (str, bool, int, float)):
+		return _to_number(a) == _to_number(b)
+	return a is b
+
+def _less_than(a, b) -> bool | None:
+	# None when the comparison is undefined (NaN)
+	if isinstance(a, str) and isinstance(b, str):
+		return a < b
+	x, y = _to_number(a), _to_number(b)
+	if (isinstance(x, float) and math.isnan(x)) or (isinstance(y, float) and math.isnan(y)):
+		return None
+	return x < y
+
+def _add(a, b):
+	if _is_number(a) and _is_number(b):
+		return _number(a + b)
+	if isinstance(a, (str, list)) or isinstance(b, (str, list)):
+		return _checked(_to_string(a) + _to_string(b))
+	return _number(_to_number(a) + _to_number(b))
+
+def _divide(a, b) -> float:
+	x, y = float(_to_number(a)), float(_to_number(b))
+	if y == 0:
+		if x == 0 or math.isnan(x):
+			return math.nan
+		return math.copysign(math.inf, x) * math.copysign(1, y)
+	return x / y
+
+def _modulo(a, b):
+	x, y = _to_number(a), _to_number(b)
+	if isinstance(x, int) and isinstance(y, int) and y:
+		# sign follows the dividend, as in ECMAScript
+		return int(math.copysign(abs(x) % abs(y), x)) if x % y else 0
+	if y == 0 or math.isinf(x) or math.isnan(x) or math.isnan(y):
+		return math.nan
+	return math.fmod(x, y)
+
+# --- whitelisted intrinsics -------------------------------------------------
+
+def _index(value, default: int = 0) -> int:
+	return default if value is UNDEFINED else _to_int32(value)
+
+def _slice(length: int, start, end) -> tuple[int, int]:
+	start = _index(start)
+	end = length if end is UNDEFINED else _to_int32(end)
+	if start < 0:
+		start = max(length + start, 0)
+	if end < 0:
+		end = max(length + end, 0)
+	return min(start, length), min(end, length)
+
+def _parse_int(value, radix=UNDEFINED):
+	text = _to_string(value).strip()
+	radix = _index(radix)
+	sign = -1 if text[:1] == "-" else 1
+	text = text.lstrip("+-")
+	if radix in (0, 16) and text[:2].lower() == "0x":
+		text, radix = text[2:], 16
+	radix = radix or 10
+	digits = re.match(r"[0-9a-z]*", text.lower()).group()
+	value = 0
+	for count, digit in enumerate(digits):
+		digit = int(digit, 36)
+		if digit >= radix:
+			digits = digits[:count]
+			break
+		value = value * radix + digit
+	return sign * value if digits else math.nan
+
+def _char_code_at(s: str, index=UNDEFINED):
+	index = _index(index)
+	return ord(s[index]) if 0 <= index < len(s) else math.nan
+
+def _char_at(s: str, index=UNDEFINED) -> str:
+	index = _index(index)
+	return s[index] if 0 <= index < len(s) else ""
+
+def _substr(s: str, start=UNDEFINED, length=UNDEFINED) -> str:
+	start = _index(start)
+	if start < 0:
+		start = max(len(s) + start, 0)
+	length = len(s) if length is UNDEFINED else _to_int32(length)
+	return s[start:start + max(length, 0)]
+
+def _substring(s: str, start=UNDEFINED, end=UNDEFINED) -> str:
+	start = min(max(_index(start), 0), len(s))
+	end = len(s) if end is UNDEFINED else min(max(_to_int32(end), 0), len(s))
+	return s[min(start, end):max(start, end)]
+
+def _split(s: str, separator=UNDEFINED, limit=UNDEFINED) -> list:
+	if separator is UNDEFINED:
+		parts = [s]
+	elif separator == "":
+		parts = list(s)
+	else:
+		parts = s.split(_to_string(separator))
+	return parts if limit is UNDEFINED else parts[:_to_uint32(limit)]
+
+STRING_METHODS: dict[str, Callable] = {
+	"charCodeAt": _char_code_at,
+	"charAt": _char_at,
+	"substr": _substr,
+	"substring": _substring,
+	"slice": lambda s, start=UNDEFINED, end=UNDEFINED: s.__getitem__(slice(*_slice(len(s), start, end))),
+	"split": _split,
+	"indexOf": lambda s, sub, start=UNDEFINED: s.find(_to_string(sub), max(_index(start), 0)),
+	"lastIndexOf": lambda s, sub: s.rfind(_to_string(sub)),
+	"toUpperCase": lambda s: s.upper(),
+	"toLowerCase": lambda s: s.lower(),
+	"concat": lambda s, *args: s + "".join(_to_string(arg) for arg in args),
+	"replace": lambda s, old, new: s.replace(_to_string(old), _to_string(new), 1),
+	"toString": lambda s: s,
+	"valueOf": lambda s: s,
+}
+
+def _array_push(array: list, *items) -> int:
+	array.extend(items)
+	return len(array)
+
+def _array_unshift(array: list, *items) -> int:
+	array[:0] = items
+	return len(array)
+
+def _array_reverse(array: list) -> list:
+	array.reverse()
+	return array
+
+ARRAY_METHODS: dict[str, Callable] = {
+	"push": _array_push,
+	"pop": lambda array: array.pop() if array else UNDEFINED,
+	"shift": lambda array: array.pop(0) if array else UNDEFINED,
+	"unshift": _array_unshift,
+	"join": lambda array, separator=",": (
+		("," if separator is UNDEFINED else _to_string(separator)).join(
+			"" if item is None or item is UNDEFINED else _to_string(item) for item in array
+		)
+	),
+	"reverse": _array_reverse,
+	"slice": lambda array, start=UNDEFINED, end=UNDEFINED: array[slice(*_slice(len(array), start, end))],
+	"concat": lambda array, *args: array + [item for arg in args for item in (arg if isinstance(arg, list) else [arg])],
+	"indexOf": lambda array, item: next((i for i, value in enumerate(array) if _strict_equals(value, item)), -1),
+	"toString": lambda array: _to_string(array),
+}
+
+def _number_to_radix(number, radix=UNDEFINED) -> str:
+	radix = 10 if radix is UNDEFINED else _to_int32(radix)
+	if not 2 <= radix <= 36:
+		raise ValueError(f"Radix {radix} is out of range")
+	if radix == 10 or not isinstance(number, int) and not float(number).is_integer():
+		return _to_string(number)
+	number = int(number)
+	digits = ""
+	value = abs(number)
+	while True:
+		value, digit = divmod(value, radix)
+		digits = "0123456789abcdefghijklmnopqrstuvwxyz"[digit] + digits
+		if not value:
+			break
+	return "-" + digits if number < 0 else digits
+
+NUMBER_METHODS: dict[str, Callable] = {
+	"toString": _number_to_radix,
+	"valueOf": lambda number: number,
+}
+
+def _pow(base, exponent) -> float:
+	x, y = float(_to_number(base)), float(_to_number(exponent))
+	try:
+		result = x ** y
+	except ZeroDivisionError:
+		# zero to a negative power
+		return math.inf
+	except OverflowError:
+		return -math.inf if x < 0 and y % 2 == 1 else math.inf
+	# negative base to a fractional power
+	return math.nan if isinstance(result, complex) else result
+
+def _round(value) -> int | float:
+	number = float(_to_number(value))
+	return number if math.isnan(number) or math.isinf(number) else math.floor(number + 0.5)
+
+INTRINSICS: dict[str, _Intrinsic] = {
+	"String": _Intrinsic("String", {
+		"fromCharCode": lambda *codes: "".join(chr(_to_uint32(code) & 0xFFFF) for code in codes),
+	}, _to_string),
+	"Math": _Intrinsic("Math", {
+		"floor": lambda value: math.floor(_to_number(value)) if math.isfinite(_to_number(value)) else _to_number(value),
+		"ceil": lambda value: math.ceil(_to_number(value)) if math.isfinite(_to_number(value)) else _to_number(value),
+		"round": _round,
+		"abs": lambda value: abs(_to_number(value)),
+		"min": lambda *values: min((_to_number(value) for value in values), default=math.inf),
+		"max": lambda *values: max((_to_number(value) for value in values), default=-math.inf),
+		"pow": _pow,
+		"sqrt": lambda value: math.sqrt(_to_number(value)) if _to_number(value) >= 0 else math.nan,
+		"PI": math.pi,
+		"E": math.e,
+	}),
+	"int": _Intrinsic("int", {"MAX_VALUE": 0x7FFFFFFF, "MIN_VALUE": -0x80000000}, _to_int32),
+	"uint": _Intrinsic("uint", {"MAX_VALUE": 0xFFFFFFFF, "MIN_VALUE": 0}, _to_uint32),
+	"Number": _Intrinsic("Number", {"NaN": math.nan}, lambda value: _to_number(value)),
+	"Boolean": _Intrinsic("Boolean", {}, _to_boolean),
+	"Array": _Intrinsic("Array", {}, lambda *items: list(items)),
+}
+
+GLOBAL_FUNCTIONS: dict[str, Callable] = {
+	"parseInt": _parse_int,
+	"parseFloat": lambda value: _to_number(re.match(r"\s*[-+]?(\d+\.?\d*(e[-+]?\d+)?|\.\d+)?", _to_string(value), re.I).group() or "x"),
+	"isNaN": lambda value: math.isnan(float(_to_number(value))),
+	"isFinite": lambda value: math.isfinite(float(_to_number(value))),
+}
+
+# --- interpreter --------------------------------------------------------------
+
+class _Return(Exception):
+	pass
+
+class _Frame:
+	__slots__ = ("stack", "locals", "steps", "result")
+
+	def __init__(self, local_values: list, steps: list[int]):
+		self.stack: list = []
+		self.locals: list = local_values
+		# executed instruction count, shared with nested calls
+		self.steps: list[int] = steps
+		self.result = UNDEFINED
+
+def _local_name(abc, multiname: dict) -> str | None:
+	# the unqualified name, None when it is supplied on the stack
+	if multiname["kind"] in (CONSTANT_MultinameL, CONSTANT_MultinameLA, CONSTANT_RTQNameL, CONSTANT_RTQNameLA):
+		return None
+	if multiname["kind"] == CONSTANT_TypeName:
+		return _local_name(abc, abc.multiname_pool[multiname["name_index"]])
+	return abc.string_pool[multiname["name_index"]]
+
+class Interpreter:
+	# Sandboxed evaluator for small pure AVM2 functions: arithmetic, locals,
+	# branches, arrays, strings and the whitelisted intrinsics above. Anything
+	# else (property access on real objects, exceptions, activations...)
+	# raises ValueError. Bodies are compiled once into (handler, operand)
+	# pairs through the dispatch table, and results are memoized by
+	# (method, receiver, typed args)
+
+	def __init__(self, abc, max_steps: int = 1_000_000, max_memo: int = MAX_MEMO):
+		self.abc = abc
+		self.max_steps = max_steps
+		self.max_memo = max_memo
+
+		self._bodies = {body["method_index"]: body for body in abc.method_bodies}
+		self._compiled: dict[int, list[tuple[Callable, object]]] = {}
+		# per compiled method: parameter count and the defaults of its optional tail
+		self._params: dict[int, tuple[int, list]] = {}
+		self._memo: dict[tuple, object] = {}
+
+		# functions callable by name: script level first, then class statics
+		self._functions: dict[str, int] = {}
+		self._class_functions: list[dict[str, int]] = []
+		self._class_constants: list[dict[str, object]] = []
+		self._classes: dict[str, int] = {}
+
+		for script in abc.script_pool:
+			for trait in script["traits"]:
+				kind_tag = trait["kind"] & 0x0F
+				if kind_tag in (TRAIT_METHOD, TRAIT_FUNCTION):
+					self._functions.setdefault(_local_name(abc, trait["name"]), trait["index"])
+				elif kind_tag == TRAIT_CLASS:
+					self._classes[_local_name(abc, trait["name"])] = trait["index"]
+
+		for klass in abc.class_pool:
+			functions, constants = {}, {}
+			for trait in klass["traits"]:
+				kind_tag = trait["kind"] & 0x0F
+				name = _local_name(abc, trait["name"])
+				if kind_tag == TRAIT_METHOD:
+					functions[name] = trait["index"]
+				elif kind_tag == TRAIT_CONST and trait["vindex"]:
+					constants[name] = self._constant(trait.get("vkind"), trait["vindex"])
+			self._class_functions.append(functions)
+			self._class_constants.append(constants)
+		# one reference per class, so memo keys with a class receiver match
+		self._class_refs = [_ClassRef(index) for index in range(len(abc.class_pool))]
+
+	def _constant(self, kind: int | None, index: int):
+		abc = self.abc
+		if kind == CONSTANT_Int:
+			return abc.int_pool[index]
+		if kind == CONSTANT_UInt:
+			return abc.uint_pool[index]
+		if kind == CONSTANT_Double:
+			return abc.double_pool[index]
+		if kind == CONSTANT_Utf8:
+			return abc.string_pool[index]
+		return {CONSTANT_True: True, CONSTANT_False: False, CONSTANT_Null: None}.get(kind, UNDEFINED)
+
+	def call(self, method: int, args: Iterable = (), this=GLOBAL):
+		return self._invoke(method, list(args), this, None)
+
+	def evaluate_many(self, calls: Iterable[tuple[int, Iterable]]) -> list:
+		# batch form of call(): failures are returned as the ValueError raised
+		results = []
+		for method, args in calls:
+			try:
+				results.append(self.call(method, args))
+			except ValueError as e:
+				results.append(e)
+		return results
+
+	def _run(self, method: int, args: list, this, steps: list[int]):
+		code = self._compiled.get(method)
+		if code is None:
+			code = self._compiled[method] = self._compile(method)
+
+		body = self._bodies[method]
+		param_count, defaults = self._params[method]
+		local_values = [this, *args[:param_count]]
+		if len(args) < param_count:
+			missing = param_count - len(args)
+			if missing > len(defaults):
+				raise ValueError(f"Method {method} expects {param_count - len(defaults)} arguments, got {len(args)}")
+			local_values += defaults[-missing:]
+		local_values += [UNDEFINED] * (max(body["local_count"], param_count + 1) - len(local_values))
+		frame = _Frame(local_values, steps)
+
+		# straight-line code is bounded by the body length, so only calls and
+		# taken branches count against the step limit
+		budget = self.max_steps
+		steps[0] += 1
+		pc = 0
+		try:
+			while True:
+				handler, operand = code[pc]
+				pc += 1
+				target = handler(self, frame, operand)
+				if target is not None:
+					pc = target
+					steps[0] += 1
+					if steps[0] > budget:
+						raise ValueError(f"Step limit exceeded in method {method}")
+		except _Return:
+			return frame.result
+		except IndexError:
+			raise ValueError(f"Stack underflow or bad jump in method {method}") from None
+		except RecursionError:
+			raise ValueError(f"Recursion too deep in method {method}") from None
+		except (ArithmeticError, TypeError, MemoryError) as e:
+			raise ValueError(f"{type(e).__name__} in method {method}: {e}") from None
+
+	def _compile(self, method: int) -> list[tuple[Callable, object]]:
+		body = self._bodies.get(method)
+		if body is None:
+			raise ValueError(f"Method {method} has no body")
+		if body["exceptions"]:
+			raise ValueError(f"Method {method} uses exception handlers")
+
+		abc = self.abc
+		info = abc.method_info[method]
+		if info["flags"] & (NEED_REST | NEED_ARGUMENTS):
+			raise ValueError(f"Method {method} uses rest or arguments")
+		defaults = [self._constant(kind, value) for value, kind in info.get("optional_params", ())]
+		self._params[method] = (len(info["params"]), defaults)
+
+		instructions = ABCReader.read_instructions(body["code"]).instructions
+		positions = {instr.address: i for i, instr in enumerate(instructions)}
+
+		code = []
+		for instr in instructions:
+			opcode = instr.opcode
+			handler = DISPATCH.get(opcode)
+			if handler is None:
+				code.append((_unsupported, opcode.name))
+				continue
+
+			if instr.targets:
+				targets = [positions[target] for target in instr.targets]
+				operand = targets if opcode is Opcode.lookupswitch else targets[0]
+			elif opcode is Opcode.pushbyte:
+				operand = instr.args[0] - 256 if instr.args[0] > 127 else instr.args[0]
+			elif opcode is Opcode.pushshort:
+				operand = ((instr.args[0] & 0xFFFF) ^ 0x8000) - 0x8000
+			elif opcode is Opcode.pushint:
+				operand = abc.int_pool[instr.args[0]]
+			elif opcode is Opcode.pushuint:
+				operand = abc.uint_pool[instr.args[0]]
+			elif opcode is Opcode.pushdouble:
+				operand = abc.double_pool[instr.args[0]]
+			elif opcode is Opcode.pushstring:
+				operand = abc.string_pool[instr.args[0]]
+			elif opcode in _MULTINAME_OPS:
+				multiname = abc.multiname_pool[instr.args[0]]
+				operand = (_local_name(abc, multiname), runtime_name_count(multiname), *instr.args[1:])
+			else:
+				operand = instr.args[0] if len(instr.args) == 1 else tuple(instr.args)
+			code.append((handler, operand))
+
+		# falling off the end returns undefined
+		code.append((_returnvoid, None))
+		return code
+
+	def _call_function(self, receiver, name: str, args: list, frame: _Frame):
+		if isinstance(receiver, str):
+			method = STRING_METHODS.get(name)
+		elif isinstance(receiver, list):
+			method = ARRAY_METHODS.get(name)
+		elif _is_number(receiver):
+			method = NUMBER_METHODS.get(name)
+		elif isinstance(receiver, _Intrinsic):
+			method = receiver.members.get(name)
+			if method is not None and not callable(method):
+				method = None
+			if method is not None:
+				return _native(name, method, args)
+		elif receiver is GLOBAL or isinstance(receiver, _ClassRef):
+			if isinstance(receiver, _ClassRef) and name in self._class_functions[receiver.index]:
+				return self._invoke(self._class_functions[receiver.index][name], args, receiver, frame)
+			if name in self._functions:
+				return self._invoke(self._functions[name], args, receiver, frame)
+			if name in GLOBAL_FUNCTIONS:
+				return _native(name, GLOBAL_FUNCTIONS[name], args)
+			intrinsic = INTRINSICS.get(name)
+			if intrinsic is not None and intrinsic.convert is not None:
+				return _native(name, intrinsic.convert, args)
+			method = None
+		else:
+			method = None
+
+		if method is None:
+			raise ValueError(f"Call to {name} is not whitelisted")
+		return _native(name, method, [receiver, *args])
+
+	def _invoke(self, method: int, args: list, this, frame: _Frame | None):
+		# nested ABC calls share the caller's step budget and the memo. Calls
+		# with array arguments or results are not memoized: arrays are mutable.
+		# Types are part of the key: true == 1 in Python, not in String()
+		memo = self._memo
+		try:
+			key = (method, this, tuple([(arg.__class__, arg) for arg in args]))
+			if key in memo:
+				return memo[key]
+		except TypeError:
+			key = None
+
+		result = self._run(method, args, this, [0] if frame is None else frame.steps)
+		if key is not None and not isinstance(result, list):
+			if len(memo) >= self.max_memo:
+				del memo[next(iter(memo))]
+			memo[key] = result
+		return result
+
+	def _get_property(self, receiver, name: str | None, runtime_name):
+		if name is None:
+			if isinstance(receiver, (list, str)):
+				index = _to_number(runtime_name)
+				if isinstance(index, float) and index.is_integer():
+					index = int(index)
+				if isinstance(index, int):
+					return receiver[index] if 0 <= index < len(receiver) else UNDEFINED
+			name = _to_string(runtime_name)
+
+		if name == "length" and isinstance(receiver, (list, str)):
+			return len(receiver)
+		if isinstance(receiver, _Intrinsic) and name in receiver.members:
+			return receiver.members[name]
+		if isinstance(receiver, _ClassRef) and name in self._class_constants[receiver.index]:
+			return self._class_constants[receiver.index][name]
+		if receiver is GLOBAL:
+			return self._lookup(name)
+		raise ValueError(f"Property {name} is not whitelisted")
+
+	def _lookup(self, name: str):
+		if name in INTRINSICS:
+			return INTRINSICS[name]
+		if name in self._classes:
+			return self._class_refs[self._classes[name]]
+		raise ValueError(f"Lookup of {name} is not whitelisted")
+
+def _native(name: str, function: Callable, args: list):
+	# whitelisted Python callables fail with the interpreter's error only
+	try:
+		return _checked(function(*args))
+	except ValueError:
+		raise
+	except Exception as e:
+		raise ValueError(f"{name} failed: {type(e).__name__}: {e}") from None
+
+# --- handlers: (interpreter, frame, operand) -> next pc or None -------------------
+
+def _unsupported(vm: Interpreter, frame: _Frame, name: str):
+	raise ValueError(f"Unsupported opcode: {name}")
+
+def _nop(vm, frame, operand):
+	pass
+
+def _push_operand(vm, frame, operand):
+	frame.stack.append(operand)
+
+def _push_constant(value) -> Callable:
+	def push(vm, frame, operand):
+		frame.stack.append(value)
+	return push
+
+def _pop(vm, frame, operand):
+	frame.stack.pop()
+
+def _dup(vm, frame, operand):
+	frame.stack.append(frame.stack[-1])
+
+def _swap(vm, frame, operand):
+	stack = frame.stack
+	stack[-1], stack[-2] = stack[-2], stack[-1]
+
+def _getlocal(vm, frame, operand):
+	frame.stack.append(frame.locals[operand])
+
+def _setlocal(vm, frame, operand):
+	frame.locals[operand] = frame.stack.pop()
+
+def _fixed_getlocal(index: int) -> Callable:
+	def getlocal(vm, frame, operand):
+		frame.stack.append(frame.locals[index])
+	return getlocal
+
+def _fixed_setlocal(index: int) -> Callable:
+	def setlocal(vm, frame, operand):
+		frame.locals[index] = frame.stack.pop()
+	return setlocal
+
+def _kill(vm, frame, operand):
+	frame.locals[operand] = UNDEFINED
+
+def _local_step(convert: Callable, delta: int) -> Callable:
+	def step(vm, frame, operand):
+		frame.locals[operand] = convert(_to_number(frame.locals[operand]) + delta)
+	return step
+
+def _unary(function: Callable) -> Callable:
+	def apply(vm, frame, operand):
+		stack = frame.stack
+		stack[-1] = function(stack[-1])
+	return apply
+
+def _binary(function: Callable) -> Callable:
+	def apply(vm, frame, operand):
+		stack = frame.stack
+		b = stack.pop()
+		stack[-1] = function(stack[-1], b)
+	return apply
+
+def _branch(condition: Callable) -> Callable:
+	def branch(vm, frame, target):
+		stack = frame.stack
+		b = stack.pop()
+		if condition(stack.pop(), b):
+			return target
+	return branch
+
+def _jump(vm, frame, target):
+	return target
+
+def _iftrue(vm, frame, target):
+	if _to_boolean(frame.stack.pop()):
+		return target
+
+def _iffalse(vm, frame, target):
+	if not _to_boolean(frame.stack.pop()):
+		return target
+
+def _lookupswitch(vm, frame, targets):
+	index = _to_int32(frame.stack.pop())
+	return targets[index + 1] if 0 <= index < len(targets) - 1 else targets[0]
+
+def _returnvalue(vm, frame, operand):
+	frame.result = frame.stack.pop()
+	raise _Return()
+
+def _returnvoid(vm, frame, operand):
+	frame.result = UNDEFINED
+	raise _Return()
+
+def _pop_runtime_name(stack: list, count: int):
+	# the runtime name (if any) is the topmost runtime part
+	if not count:
+		return None
+	name = stack.pop()
+	if count == 2:
+		stack.pop()
+	return name
+
+def _findproperty(vm, frame, operand):
+	_pop_runtime_name(frame.stack, operand[1])
+	frame.stack.append(GLOBAL)
+
+def _getlex(vm, frame, operand):
+	frame.stack.append(vm._lookup(operand[0]))
+
+def _getproperty(vm, frame, operand):
+	stack = frame.stack
+	name, runtime_count = operand
+	runtime_name = _pop_runtime_name(stack, runtime_count)
+	stack[-1] = vm._get_property(stack[-1], name, runtime_name)
+
+def _setproperty(vm, frame, operand):
+	stack = frame.stack
+	name, runtime_count = operand
+	value = stack.pop()
+	runtime_name = _pop_runtime_name(stack, runtime_count)
+	receiver = stack.pop()
+	if isinstance(receiver, list):
+		index = _to_number(runtime_name if name is None else name)
+		if isinstance(index, float) and index.is_integer():
+			index = int(index)
+		if isinstance(index, int) and 0 <= index:
+			if index >= len(receiver):
+				if index >= MAX_LENGTH:
+					raise ValueError(f"Array index {index} is out of range")
+				receiver.extend([UNDEFINED] * (index + 1 - len(receiver)))
+			receiver[index] = value
+			return
+		if name == "length":
+			del receiver[_to_uint32(value):]
+			return
+	raise ValueError(f"Property write to {name} is not whitelisted")
+
+def _callproperty(vm, frame, operand):
+	stack = frame.stack
+	name, runtime_count, argc = operand
+	args = stack[len(stack) - argc:]
+	del stack[len(stack) - argc:]
+	runtime_name = _pop_runtime_name(stack, runtime_count)
+	receiver = stack.pop()
+	stack.append(vm._call_function(receiver, name if name is not None else _to_string(runtime_name), args, frame))
+
+def _callpropvoid(vm, frame, operand):
+	_callproperty(vm, frame, operand)
+	frame.stack.pop()
+
+def _callstatic(vm, frame, operand):
+	stack = frame.stack
+	method, argc = operand
+	args = stack[len(stack) - argc:]
+	del stack[len(stack) - argc:]
+	receiver = stack.pop()
+	stack.append(vm._invoke(method, args, receiver, frame))
+
+def _construct(vm, frame, argc):
+	stack = frame.stack
+	args = stack[len(stack) - argc:]
+	del stack[len(stack) - argc:]
+	receiver = stack.pop()
+	if receiver is INTRINSICS["Array"]:
+		if len(args) == 1 and _is_number(args[0]):
+			length = _to_uint32(args[0])
+			if length > MAX_LENGTH:
+				raise ValueError(f"Array length {length} is out of range")
+			stack.append([UNDEFINED] * length)
+		else:
+			stack.append(list(args))
+	elif receiver is INTRINSICS["String"]:
+		stack.append(_to_string(args[0]) if args else "")
+	else:
+		raise ValueError("Only Array and String can be constructed")
+
+def _constructprop(vm, frame, operand):
+	stack = frame.stack
+	name, runtime_count, argc = operand
+	args = stack[len(stack) - argc:]
+	del stack[len(stack) - argc:]
+	_pop_runtime_name(stack, runtime_count)
+	stack[-1] = vm._get_property(stack[-1], name, None)
+	stack.extend(args)
+	_construct(vm, frame, argc)
+
+def _newarray(vm, frame, count):
+	stack = frame.stack
+	items = stack[len(stack) - count:]
+	del stack[len(stack) - count:]
+	stack.append(items)
+
+def _pushscope(vm, frame, operand):
+	# scopes only matter for name lookup, which is resolved statically here
+	frame.stack.pop()
+
+def _getglobalscope(vm, frame, operand):
+	frame.stack.append(GLOBAL)
+
+def _typeof(value) -> str:
+	if value is UNDEFINED:
+		return "undefined"
+	if value is True or value is False:
+		return "boolean"
+	if _is_number(value):
+		return "number"
+	if isinstance(value, str):
+		return "string"
+	return "object"
+
+def _not_less(a, b) -> bool:
+	return not _less_than(a, b)
+
+def _less_equals(a, b) -> bool:
+	result = _less_than(b, a)
+	return result is not None and not result
+
+def _greater_equals(a, b) -> bool:
+	result = _less_than(a, b)
+	return result is not None and not result
+
+_MULTINAME_OPS = frozenset((
+	Opcode.findproperty, Opcode.findpropstrict, Opcode.getlex, Opcode.getproperty, Opcode.setproperty,
+	Opcode.initproperty, Opcode.callproperty, Opcode.callpropvoid, Opcode.callproplex, Opcode.constructprop,
+	Opcode.coerce,
+))
+
+_int_op = lambda function: _binary(lambda a, b: _to_int32(function(_to_int32(a), _to_int32(b))))
+
+DISPATCH: dict[Opcode, Callable] = {
+	Opcode.nop: _nop,
+	Opcode.label: _nop,
+	Opcode.debug: _nop,
+	Opcode.debugline: _nop,
+	Opcode.debugfile: _nop,
+	Opcode.bkpt: _nop,
+
+	Opcode.pushbyte: _push_operand,
+	Opcode.pushshort: _push_operand,
+	Opcode.pushint: _push_operand,
+	Opcode.pushuint: _push_operand,
+	Opcode.pushdouble: _push_operand,
+	Opcode.pushstring: _push_operand,
+	Opcode.pushtrue: _push_constant(True),
+	Opcode.pushfalse: _push_constant(False),
+	Opcode.pushnull: _push_constant(None),
+	Opcode.pushundefined: _push_constant(UNDEFINED),
+	Opcode.pushnan: _push_constant(math.nan),
+	Opcode.pop: _pop,
+	Opcode.dup: _dup,
+	Opcode.swap: _swap,
+
+	Opcode.getlocal: _getlocal,
+	Opcode.setlocal: _setlocal,
+	**{getattr(Opcode, f"getlocal_{i}"): _fixed_getlocal(i) for i in range(4)},
+	**{getattr(Opcode, f"setlocal_{i}"): _fixed_setlocal(i) for i in range(4)},
+	Opcode.kill: _kill,
+	Opcode.inclocal: _local_step(_number, 1),
+	Opcode.declocal: _local_step(_number, -1),
+	Opcode.inclocal_i: _local_step(_to_int32, 1),
+	Opcode.declocal_i: _local_step(_to_int32, -1),
+
+	Opcode.add: _binary(_add),
+	Opcode.add_i: _int_op(lambda a, b: a + b),
+	Opcode.subtract: _binary(lambda a, b: _number(_to_number(a) - _to_number(b))),
+	Opcode.subtract_i: _int_op(lambda a, b: a - b),
+	Opcode.multiply: _binary(lambda a, b: _number(_to_number(a) * _to_number(b))),
+	Opcode.multiply_i: _int_op(lambda a, b: a * b),
+	Opcode.divide: _binary(_divide),
+	Opcode.modulo: _binary(_modulo),
+	Opcode.negate: _unary(lambda a: -_to_number(a)),
+	Opcode.negate_i: _unary(lambda a: _to_int32(-_to_int32(a))),
+	Opcode.increment: _unary(lambda a: _number(_to_number(a) + 1)),
+	Opcode.increment_i: _unary(lambda a: _to_int32(_to_int32(a) + 1)),
+	Opcode.decrement: _unary(lambda a: _number(_to_number(a) - 1)),
+	Opcode.decrement_i: _unary(lambda a: _to_int32(_to_int32(a) - 1)),
+	Opcode.bitand: _int_op(lambda a, b: a & b),
+	Opcode.bitor: _int_op(lambda a, b: a | b),
+	Opcode.bitxor: _int_op(lambda a, b: a ^ b),
+	Opcode.bitnot: _unary(lambda a: ~_to_int32(a)),
+	Opcode.lshift: _binary(lambda a, b: _to_int32(_to_int32(a) << (_to_uint32(b) & 31))),
+	Opcode.rshift: _binary(lambda a, b: _to_int32(a) >> (_to_uint32(b) & 31)),
+	Opcode.urshift: _binary(lambda a, b: _to_uint32(a) >> (_to_uint32(b) & 31)),
+
+	Opcode.equals: _binary(_equals),
+	Opcode.strictequals: _binary(_strict_equals),
+	Opcode.lessthan: _binary(lambda a, b: _less_than(a, b) is True),
+	Opcode.lessequals: _binary(_less_equals),
+	Opcode.greaterthan: _binary(lambda a, b: _less_than(b, a) is True),
+	Opcode.greaterequals: _binary(_greater_equals),
+	Opcode._not: _unary(lambda a: not _to_boolean(a)),
+	Opcode.typeof: _unary(_typeof),
+
+	Opcode.convert_i: _unary(_to_int32),
+	Opcode.coerce_i: _unary(_to_int32),
+	Opcode.convert_u: _unary(_to_uint32),
+	Opcode.coerce_u: _unary(_to_uint32),
+	Opcode.convert_d: _unary(_to_number),
+	Opcode.coerce_d: _unary(_to_number),
+	Opcode.convert_b: _unary(_to_boolean),
+	Opcode.coerce_b: _unary(_to_boolean),
+	Opcode.convert_s: _unary(_to_string),
+	Opcode.coerce_s: _unary(lambda a: None if a is None or a is UNDEFINED else _to_string(a)),
+	Opcode.convert_o: _nop,
+	Opcode.coerce_o: _nop,
+	Opcode.coerce_a: _nop,
+	Opcode.coerce: _nop,
+
+	Opcode.jump: _jump,
+	Opcode.iftrue: _iftrue,
+	Opcode.iffalse: _iffalse,
+	Opcode.ifeq: _branch(_equals),
+	Opcode.ifne: _branch(lambda a, b: not _equals(a, b)),
+	Opcode.ifstricteq: _branch(_strict_equals),
+	Opcode.ifstrictne: _branch(lambda a, b: not _strict_equals(a, b)),
+	Opcode.iflt: _branch(lambda a, b: _less_than(a, b) is True),
+	Opcode.ifle: _branch(_less_equals),
+	Opcode.ifgt: _branch(lambda a, b: _less_than(b, a) is True),
+	Opcode.ifge: _branch(_greater_equals),
+	Opcode.ifnlt: _branch(lambda a, b: _less_than(a, b) is not True),
+	Opcode.ifnle: _branch(lambda a, b: not _less_equals(a, b)),
+	Opcode.ifngt: _branch(lambda a, b: _less_than(b, a) is not True),
+	Opcode.ifnge: _branch(lambda a, b: not _greater_equals(a, b)),
+	Opcode.lookupswitch: _lookupswitch,
+	Opcode.returnvalue: _returnvalue,
+	Opcode.returnvoid: _returnvoid,
+
+	Opcode.pushscope: _pushscope,
+	Opcode.popscope: _nop,
+	Opcode.getglobalscope: _getglobalscope,
+	Opcode.findproperty: _findproperty,
+	Opcode.findpropstrict: _findproperty,
+	Opcode.getlex: _getlex,
+	Opcode.getproperty: _getproperty,
+	Opcode.setproperty: _setproperty,
+	Opcode.initproperty: _setproperty,
+	Opcode.callproperty: _callproperty,
+	Opcode.callproplex: _callproperty,
+	Opcode.callpropvoid: _callpropvoid,
+	Opcode.callstatic: _callstatic,
+	Opcode.construct: _construct,
+	Opcode.constructprop: _constructprop,
+	Opcode.newarray: _newarray,
+}
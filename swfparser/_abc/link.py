@@ -0,0 +1,110 @@
+from .consts import *
+from .pools import multiname_fields, walk_references
+
+import struct
+
+_DOUBLE = struct.Struct("<d")
+
+class _PoolMerger:
+	# interns constant pool entries of several ABCs into one set of pools
+	# through canonical, hashable keys
+
+	def __init__(self, abc):
+		self.abc = abc
+		self.keys: dict[str, dict] = {pool: {} for pool in ("int", "uint", "double", "string", "namespace", "ns_set", "multiname")}
+
+	def _intern(self, pool: str, key, entries: list, entry) -> int:
+		index = self.keys[pool].get(key)
+		if index is None:
+			index = self.keys[pool][key] = len(entries)
+			entries.append(entry)
+		return index
+
+	def merge(self, src, ordinal: int) -> dict[str, list[int]]:
+		abc = self.abc
+		maps = {}
+
+		maps["int"] = [0] + [self._intern("int", v, abc.int_pool, v) for v in src.int_pool[1:]]
+		maps["uint"] = [0] + [self._intern("uint", v, abc.uint_pool, v) for v in src.uint_pool[1:]]
+		maps["double"] = [0] + [
+			self._intern("double", _DOUBLE.pack(v), abc.double_pool, v) for v in src.double_pool[1:]
+		]
+		maps["string"] = [0] + [self._intern("string", s, abc.string_pool, s) for s in src.string_pool[1:]]
+
+		strings = maps["string"]
+		namespaces = [0]
+		for i in range(1, len(src.namespace_pool)):
+			namespace = src.namespace_pool[i]
+			key = (namespace["kind"], strings[namespace["name_index"]])
+			if namespace["kind"] == CONSTANT_PrivateNs:
+				# private namespaces are unique to the ABC that declares them
+				key += (ordinal, i)
+			entry = {"kind": namespace["kind"], "name_index": key[1]}
+			namespaces.append(self._intern("namespace", key, abc.namespace_pool, entry))
+		maps["namespace"] = namespaces
+
+		ns_sets = [0]
+		for ns_set in src.ns_set_pool[1:]:
+			key = tuple(namespaces[ns] for ns in ns_set)
+			ns_sets.append(self._intern("ns_set", key, abc.ns_set_pool, list(key)))
+		maps["ns_set"] = ns_sets
+
+		# TypeName entries may point forward in the pool: resolve on demand
+		multinames = [None] * len(src.multiname_pool)
+		multinames[0] = 0
+		for i in range(1, len(src.multiname_pool)):
+			self._merge_multiname(src, i, maps, multinames)
+		maps["multiname"] = multinames
+
+		return maps
+
+	def _merge_multiname(self, src, index: int, maps: dict, multinames: list) -> int:
+		if multinames[index] is not None:
+			return multinames[index]
+
+		multiname = src.multiname_pool[index]
+		entry = {"kind": multiname["kind"]}
+		for pool, key in multiname_fields(multiname):
+			if pool == "multiname":
+				entry[key] = self._merge_multiname(src, multiname[key], maps, multinames)
+			else:
+				entry[key] = maps[pool][multiname[key]]
+		if "param_types" in multiname:
+			entry["param_types"] = [self._merge_multiname(src, p, maps, multinames) for p in multiname["param_types"]]
+
+		key = tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in entry.items())
+		multinames[index] = self._intern("multiname", key, self.abc.multiname_pool, entry)
+		return multinames[index]
+
+def link(abcs: list, name: str, flags: int):
+	# The sources are consumed: their entries are rewritten in place and moved
+	# into the linked ABC.
+	# The player runs the last script of an eager ABC on load and every other
+	# script on first use. Scripts are concatenated, so only the last source
+	# keeps an entry script: the others have to be lazily initialized already
+	from . import ABC
+
+	for src in abcs[:-1]:
+		if src.script_pool and not src.flags & DOABC_LAZY_INITIALIZE:
+			raise ValueError(f"Cannot link {src.name!r}: its entry script would no longer run on load")
+
+	first = abcs[0]
+	abc = ABC.create(name, flags, first.minor_version, first.major_version)
+	merger = _PoolMerger(abc)
+
+	for ordinal, src in enumerate(abcs):
+		maps = merger.merge(src, ordinal)
+		maps["method"] = range(len(abc.method_info), len(abc.method_info) + len(src.method_info))
+		maps["class"] = range(len(abc.class_pool), len(abc.class_pool) + len(src.class_pool))
+
+		walk_references(src, lambda pool, index: maps[pool][index], target_pool=abc.multiname_pool)
+
+		abc.method_info.extend(src.method_info)
+		abc.metadata.extend(src.metadata)
+		abc.instance_pool.extend(src.instance_pool)
+		abc.class_pool.extend(src.class_pool)
+		abc.script_pool.extend(src.script_pool)
+		abc.method_bodies.extend(src.method_bodies)
+
+	abc._reindex()
+	return abc
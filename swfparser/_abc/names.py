@@ -0,0 +1,32 @@
+from .consts import *
+
+# name rendering shared by ABC and ABCView: abc is anything holding the pools
+
+def resolve_namespace(abc, index: int) -> str:
+	return abc.string_pool[abc.namespace_pool[index]["name_index"]]
+
+def resolve_multiname(abc, multiname: dict | int) -> str:
+	# readable, pool independent name: "ns::name", "{ns1,ns2}::name", "Vector.<int>",
+	# "[]" for runtime names and "@" for attributes
+	if isinstance(multiname, int):
+		multiname = abc.multiname_pool[multiname]
+	if multiname is None or multiname is abc.multiname_pool[0]:
+		return "*"
+
+	kind = multiname["kind"]
+	if kind == CONSTANT_TypeName:
+		params = ",".join(resolve_multiname(abc, param) for param in multiname["param_types"])
+		return f"{resolve_multiname(abc, multiname['name_index'])}.<{params}>"
+
+	name = abc.string_pool[multiname["name_index"]] if "name_index" in multiname else "[]"
+	if "ns_index" in multiname:
+		namespace = resolve_namespace(abc, multiname["ns_index"])
+		if namespace:
+			name = f"{namespace}::{name}"
+	elif "ns_set_index" in multiname:
+		namespaces = ",".join(resolve_namespace(abc, ns) for ns in abc.ns_set_pool[multiname["ns_set_index"]])
+		name = f"{{{namespaces}}}::{name}"
+
+	if kind in (CONSTANT_QNameA, CONSTANT_RTQNameA, CONSTANT_RTQNameLA, CONSTANT_MultinameA, CONSTANT_MultinameLA):
+		name = "@" + name
+	return name
@@ -0,0 +1,184 @@
+from .assembler import Code, Label
+from .cfg import TERMINATORS
+from .instruction import Instruction, Opcode
+
+_SHORT_LOCALS = {
+	Opcode.getlocal: (Opcode.getlocal_0, Opcode.getlocal_1, Opcode.getlocal_2, Opcode.getlocal_3),
+	Opcode.setlocal: (Opcode.setlocal_0, Opcode.setlocal_1, Opcode.setlocal_2, Opcode.setlocal_3),
+}
+
+_PADDING = frozenset((Opcode.nop, Opcode.label))
+
+# a second conversion to the same type is a no-op
+_CONVERSIONS = {
+	Opcode.convert_b: Opcode.coerce_b, Opcode.coerce_b: Opcode.coerce_b,
+	Opcode.convert_d: Opcode.coerce_d, Opcode.coerce_d: Opcode.coerce_d,
+	Opcode.convert_i: Opcode.coerce_i, Opcode.coerce_i: Opcode.coerce_i,
+	Opcode.convert_u: Opcode.coerce_u, Opcode.coerce_u: Opcode.coerce_u,
+	Opcode.convert_s: Opcode.convert_s, Opcode.coerce_s: Opcode.coerce_s,
+	Opcode.convert_o: Opcode.convert_o, Opcode.coerce_o: Opcode.coerce_o,
+	Opcode.coerce_a: Opcode.coerce_a,
+}
+
+def _is_label(item: Instruction | Label) -> bool:
+	return item.__class__ is Label
+
+def remove_padding(code: Code) -> int:
+	# branches to a removed nop/label slide to the next instruction through their Label
+	return code.filter(lambda item: _is_label(item) or item.opcode not in _PADDING)
+
+def shorten_locals(code: Code) -> int:
+	changed = 0
+	for i, item in enumerate(code.items):
+		if _is_label(item):
+			continue
+		short = _SHORT_LOCALS.get(item.opcode)
+		if short is not None and item.args[0] < 4:
+			code.replace(i, Instruction(short[item.args[0]]))
+			changed += 1
+	return changed
+
+def remove_redundant_conversions(code: Code) -> int:
+	redundant = set()
+	items = code.items
+	for i in range(1, len(items)):
+		item, prev = items[i], items[i - 1]
+		if _is_label(item) or _is_label(prev):
+			continue
+
+		kind = _CONVERSIONS.get(item.opcode)
+		if kind is not None and kind is _CONVERSIONS.get(prev.opcode):
+			redundant.add(id(item))
+		elif item.opcode is Opcode.coerce and prev.opcode is Opcode.coerce and item.args == prev.args:
+			redundant.add(id(item))
+
+	return code.filter(lambda item: id(item) not in redundant)
+
+def _label_positions(code: Code) -> dict[int, int]:
+	return {id(item): i for i, item in enumerate(code.items) if _is_label(item)}
+
+def _next_instruction(items: list, i: int) -> int:
+	while i < len(items) and _is_label(items[i]):
+		i += 1
+	return i
+
+def thread_jumps(code: Code) -> int:
+	items = code.items
+	positions = _label_positions(code)
+
+	def final_target(label: Label) -> Label:
+		seen = set()
+		while id(label) not in seen:
+			seen.add(id(label))
+			j = _next_instruction(items, positions[id(label)])
+			if j >= len(items) or items[j].opcode is not Opcode.jump:
+				break
+			label = items[j].targets[0]
+		return label
+
+	changed = 0
+	for item in items:
+		if _is_label(item) or not item.targets:
+			continue
+
+		targets = [final_target(label) for label in item.targets]
+		if any(new is not old for new, old in zip(targets, item.targets)):
+			item.targets = targets
+			code.touch(item)
+			changed += 1
+
+	# a jump to the very next instruction does nothing
+	useless = set()
+	for i, item in enumerate(items):
+		if _is_label(item) or item.opcode is not Opcode.jump:
+			continue
+		j = i + 1
+		while j < len(items) and _is_label(items[j]):
+			if items[j] is item.targets[0]:
+				useless.add(id(item))
+				break
+			j += 1
+
+	return changed + code.filter(lambda item: id(item) not in useless)
+
+def remove_dead_code(code: Code) -> int:
+	items = code.items
+	positions = _label_positions(code)
+	n = len(items)
+
+	reachable = bytearray(n)
+	work = [0]
+	pending = list(code.exceptions)
+	while work:
+		while work:
+			i = work.pop()
+			while i < n and not reachable[i]:
+				reachable[i] = 1
+				item = items[i]
+				if not _is_label(item):
+					for label in item.targets:
+						work.append(positions[id(label)])
+					if item.opcode in TERMINATORS:
+						break
+				i += 1
+
+		# a handler becomes live once any instruction of its range is
+		still_pending = []
+		for exception in pending:
+			start = positions[id(exception["from"])]
+			end = positions[id(exception["to"])]
+			if any(reachable[start:end]):
+				work.append(positions[id(exception["target"])])
+			else:
+				still_pending.append(exception)
+		pending = still_pending
+
+	# newcatch operands index the exception table: entries still named by
+	# live code are kept, the others are renumbered after the drop
+	catches = [
+		items[i] for i in range(n)
+		if reachable[i] and not _is_label(items[i]) and items[i].opcode is Opcode.newcatch
+	]
+	for instr in catches:
+		if instr.args[0] < len(code.exceptions):
+			pending = [exception for exception in pending if exception is not code.exceptions[instr.args[0]]]
+
+	if pending:
+		dropped = set(id(exception) for exception in pending)
+		renumber = {}
+		kept = []
+		for index, exception in enumerate(code.exceptions):
+			if id(exception) not in dropped:
+				renumber[index] = len(kept)
+				kept.append(exception)
+		code.exceptions = kept
+		for instr in catches:
+			index = renumber.get(instr.args[0], instr.args[0])
+			if index != instr.args[0]:
+				instr.args[0] = index
+				code.touch(instr)
+
+	dead = set(id(items[i]) for i in range(n) if not reachable[i] and not _is_label(items[i]))
+	return code.filter(lambda item: id(item) not in dead)
+
+def remove_unused_labels(code: Code):
+	used = set()
+	for item in code.items:
+		if not _is_label(item):
+			used.update(id(label) for label in item.targets)
+	for exception in code.exceptions:
+		used.update((id(exception["from"]), id(exception["to"]), id(exception["target"])))
+
+	code.filter(lambda item: not _is_label(item) or id(item) in used)
+
+def optimize(code: Code) -> Code:
+	remove_padding(code)
+	shorten_locals(code)
+	remove_redundant_conversions(code)
+
+	# threading and dead code feed each other: run until nothing changes
+	while thread_jumps(code) + remove_dead_code(code):
+		pass
+
+	remove_unused_labels(code)
+	return code
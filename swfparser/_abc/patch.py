@@ -0,0 +1,254 @@
+from .assembler import Code
+from .consts import *
+from .instruction import OPERAND_POOLS
+from .pools import POOLS
+from .reader import ABCReader
+
+from typing import Callable
+
+class PatchSession:
+	# Collects edits of one ABC and applies them in a single commit: new pool
+	# entries are appended in one batch, every affected body is rewritten and
+	# re-assembled once, and everything is restored if any step or the
+	# validation fails. Indices returned before commit() are final.
+	#
+	#	with abc.patch() as patch:
+	#		name = patch.multiname("decrypt", "com.game")
+	#		patch.swap_multiname(old, name)
+	#		patch.rewrite(3, lambda code: ...)
+
+	def __init__(self, abc):
+		self.abc = abc
+		self.closed: bool = False
+
+		self._strings: dict[str, int] = {}
+		self._namespaces: dict[tuple[int, int], int] = {}
+		self._multinames: dict[tuple[int, int], int] = {}
+		self._new_strings: list[str] = []
+		self._new_namespaces: list[dict] = []
+		self._new_multinames: list[dict] = []
+
+		# existing namespaces and QNames, indexed on first use
+		self._namespace_lookup: dict[tuple[int, int], int] | None = None
+		self._multiname_lookup: dict[tuple[int, int], int] | None = None
+
+		self._renames: dict[int, str] = {}
+		self._swaps: dict[int, int] = {}
+		self._rewrites: dict[int, list[Callable[[Code], None]]] = {}
+
+	def __enter__(self) -> "PatchSession":
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		# a commit() failing inside the block has closed the session already
+		if exc_type is not None and not self.closed:
+			self.rollback()
+		elif not self.closed:
+			self.commit()
+
+	def _check_open(self):
+		if self.closed:
+			raise ValueError("Patch session is already closed")
+
+	def string(self, s: str) -> int:
+		self._check_open()
+		index = self.abc._str_index.get(s)
+		if index is None:
+			index = self._strings.get(s)
+		if index is None:
+			index = self._strings[s] = len(self.abc.string_pool) + len(self._new_strings)
+			self._new_strings.append(s)
+		return index
+
+	def namespace(self, name: str | int, kind: int = CONSTANT_Namespace) -> int:
+		self._check_open()
+		abc = self.abc
+		if self._namespace_lookup is None:
+			self._namespace_lookup = {}
+			for index, namespace in enumerate(abc.namespace_pool):
+				self._namespace_lookup.setdefault((namespace["kind"], namespace["name_index"]), index)
+
+		key = (kind, self.string(name) if isinstance(name, str) else name)
+		index = self._namespace_lookup.get(key)
+		if index is None:
+			index = self._namespaces.get(key)
+		if index is None:
+			index = self._namespaces[key] = len(abc.namespace_pool) + len(self._new_namespaces)
+			self._new_namespaces.append({"kind": kind, "name_index": key[1]})
+		return index
+
+	def multiname(self, name: str | int, namespace: str | int = "") -> int:
+		# QName; names and namespaces are given as strings or existing indices.
+		# String namespaces are package namespaces, "" being the public one
+		self._check_open()
+		abc = self.abc
+		if self._multiname_lookup is None:
+			self._multiname_lookup = {}
+			for index, multiname in enumerate(abc.multiname_pool):
+				if index and multiname["kind"] == CONSTANT_QName:
+					self._multiname_lookup.setdefault((multiname["name_index"], multiname["ns_index"]), index)
+
+		key = (
+			self.string(name) if isinstance(name, str) else name,
+			self.namespace(namespace, CONSTANT_PackageNamespace) if isinstance(namespace, str) else namespace
+		)
+		index = self._multiname_lookup.get(key)
+		if index is None:
+			index = self._multinames.get(key)
+		if index is None:
+			index = self._multinames[key] = len(abc.multiname_pool) + len(self._new_multinames)
+			self._new_multinames.append({"kind": CONSTANT_QName, "name_index": key[0], "ns_index": key[1]})
+		return index
+
+	def rename_string(self, string: str | int, new: str):
+		# in place: every namespace, multiname and literal using it follows
+		self._check_open()
+		index = string if isinstance(string, int) else self.abc._str_index.get(string)
+		if index is None or not 0 < index < len(self.abc.string_pool):
+			raise ValueError(f"Unknown string: {string!r}")
+		self._renames[index] = new
+
+	def swap_multiname(self, old: int, new: int):
+		# replaces multiname operands in code; traits keep their names
+		self._check_open()
+		self._swaps[old] = new
+
+	def rewrite(self, body_index: int, edit: Callable[[Code], None]):
+		# edit(code) runs at commit on the body's Code, after the operand swaps
+		self._check_open()
+		if not 0 <= body_index < len(self.abc.method_bodies):
+			raise ValueError(f"Unknown method body: {body_index}")
+		self._rewrites.setdefault(body_index, []).append(edit)
+
+	def rollback(self):
+		# drops every pending edit; committed sessions cannot be rolled back
+		self._check_open()
+		self.closed = True
+
+	def commit(self, validate: Callable[[object], None] | None = None) -> list[int]:
+		# applies all edits, returning the rewritten body indices. validate(abc)
+		# may raise to reject the result, in which case nothing is kept
+		self._check_open()
+		self.closed = True
+
+		abc = self.abc
+		bodies = self._affected_bodies()
+		state = self._snapshot(bodies)
+		try:
+			self._apply_pools()
+			self._apply_bodies(bodies)
+			self._verify(bodies)
+			if validate is not None:
+				validate(abc)
+		except Exception:
+			self._restore(state)
+			raise
+		return bodies
+
+	def _affected_bodies(self) -> list[int]:
+		bodies = set(self._rewrites)
+		if self._swaps:
+			swaps = self._swaps
+			for index, body in enumerate(self.abc.method_bodies):
+				if index in bodies:
+					continue
+				for instr in ABCReader.read_instructions(body["code"]).instructions:
+					pools = OPERAND_POOLS.get(instr.opcode)
+					if pools is not None and any(pool == "multiname" and arg in swaps for pool, arg in zip(pools, instr.args)):
+						bodies.add(index)
+						break
+		return sorted(bodies)
+
+	def _snapshot(self, bodies: list[int]) -> dict:
+		abc = self.abc
+		return {
+			"sizes": (len(abc.string_pool), len(abc.namespace_pool), len(abc.multiname_pool)),
+			"strings": {index: abc.string_pool[index] for index in self._renames},
+			"method_names": [info["name"] for info in abc.method_info] if self._renames else None,
+			"dirty": set(abc._dirty),
+			"bodies": {
+				index: {key: abc.method_bodies[index][key] for key in ("code", "exceptions", "max_stack", "max_scope", "local_count")}
+				for index in bodies
+			},
+		}
+
+	def _restore(self, state: dict):
+		abc = self.abc
+		strings, namespaces, multinames = state["sizes"]
+		del abc.string_pool[strings:]
+		del abc.namespace_pool[namespaces:]
+		del abc.multiname_pool[multinames:]
+		for index, s in state["strings"].items():
+			abc.string_pool[index] = s
+		if state["method_names"] is not None:
+			for info, name in zip(abc.method_info, state["method_names"]):
+				info["name"] = name
+		abc._dirty = state["dirty"]
+
+		for index, fields in state["bodies"].items():
+			abc.method_bodies[index].update(fields)
+			# the cached Code may hold half-applied edits
+			abc._code_cache.pop(index, None)
+		abc._reindex()
+
+	def _apply_pools(self):
+		abc = self.abc
+		for s in self._new_strings:
+			abc._str_index[s] = len(abc.string_pool)
+			abc.string_pool.append(s)
+		abc.namespace_pool.extend(self._new_namespaces)
+		for multiname in self._new_multinames:
+			index = len(abc.multiname_pool)
+			abc.multiname_pool.append(multiname)
+			abc._multiname_id_index[id(multiname)] = index
+			abc._multiname_index.setdefault((multiname["name_index"], multiname["ns_index"]), index)
+
+		if self._renames:
+			renamed = {}
+			for index, new in self._renames.items():
+				old = abc.string_pool[index]
+				abc.string_pool[index] = new
+				if abc._str_index.get(old) == index:
+					del abc._str_index[old]
+					renamed[old] = new
+				abc._str_index.setdefault(new, index)
+
+			# method names are stored as strings, not indices
+			for info in abc.method_info:
+				if info["name"] in renamed:
+					info["name"] = renamed[info["name"]]
+			abc.mark_dirty("constant_pool", "method_info")
+
+	def _apply_bodies(self, bodies: list[int]):
+		abc = self.abc
+		swaps = self._swaps
+		for index in bodies:
+			code = abc.get_code(index)
+			if swaps:
+				for instr in code.instructions:
+					pools = OPERAND_POOLS.get(instr.opcode)
+					if pools is None:
+						continue
+					for position, (pool, arg) in enumerate(zip(pools, instr.args)):
+						if pool == "multiname" and arg in swaps:
+							instr.args[position] = swaps[arg]
+							code.touch(instr)
+			for edit in self._rewrites.get(index, ()):
+				edit(code)
+			code.commit(abc.method_bodies[index])
+			abc.update_limits(index)
+
+	def _verify(self, bodies: list[int]):
+		# rewritten bodies must decode and reference existing pool entries
+		abc = self.abc
+		sizes = {pool: len(getattr(abc, attr)) for pool, attr in POOLS.items()}
+		sizes["method"] = len(abc.method_info)
+		sizes["class"] = len(abc.class_pool)
+		for index in bodies:
+			for instr in abc.get_cfg(index).stack.instructions:
+				pools = OPERAND_POOLS.get(instr.opcode)
+				if pools is None:
+					continue
+				for pool, arg in zip(pools, instr.args):
+					if pool in sizes and not 0 <= arg < sizes[pool]:
+						raise ValueError(f"Body {index}: {instr.opcode.name} references {pool} {arg} out of range")
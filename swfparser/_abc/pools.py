@@ -0,0 +1,137 @@
+from .assembler import Label
+from .consts import *
+from .instruction import OPERAND_POOLS
+
+# constant pool names and the ABC attribute holding them
+POOLS = {
+	"int": "int_pool",
+	"uint": "uint_pool",
+	"double": "double_pool",
+	"string": "string_pool",
+	"namespace": "namespace_pool",
+	"ns_set": "ns_set_pool",
+	"multiname": "multiname_pool",
+}
+
+# pool addressed by a trait vindex or an optional parameter value, by its kind
+VALUE_POOLS = {
+	CONSTANT_Int: "int",
+	CONSTANT_UInt: "uint",
+	CONSTANT_Double: "double",
+	CONSTANT_Utf8: "string",
+	**{kind: "namespace" for kind in NAMESPACE_KINDS}
+}
+
+def multiname_fields(multiname: dict) -> list[tuple[str, str]]:
+	# (pool, key) of every index stored inside a multiname entry
+	fields = []
+	if "ns_index" in multiname:
+		fields.append(("namespace", "ns_index"))
+	if "name_index" in multiname:
+		fields.append(("string" if multiname["kind"] != CONSTANT_TypeName else "multiname", "name_index"))
+	if "ns_set_index" in multiname:
+		fields.append(("ns_set", "ns_set_index"))
+	return fields
+
+def walk_pool_references(abc, visit):
+	# references between constant pool entries; visit(pool, index) returns the new index
+	for namespace in abc.namespace_pool[1:]:
+		namespace["name_index"] = visit("string", namespace["name_index"])
+
+	for i in range(1, len(abc.ns_set_pool)):
+		abc.ns_set_pool[i] = [visit("namespace", index) for index in abc.ns_set_pool[i]]
+
+	for multiname in abc.multiname_pool[1:]:
+		for pool, key in multiname_fields(multiname):
+			multiname[key] = visit(pool, multiname[key])
+		if "param_types" in multiname:
+			multiname["param_types"] = [visit("multiname", index) for index in multiname["param_types"]]
+
+def walk_references(abc, visit, code: bool = True, target_pool: list[dict] = None):
+	# every reference held outside the constant pool. Method names are stored
+	# as strings, so their return value is ignored. Multinames are stored as
+	# dicts: they are swapped for target_pool[new index] when a target pool
+	# is given and left pointing at the same entry otherwise
+	multinames = abc._multiname_id_index
+	strings = abc._str_index
+
+	def ref(multiname: dict) -> dict:
+		index = visit("multiname", multinames[id(multiname)])
+		return target_pool[index] if target_pool is not None else multiname
+
+	def visit_traits(traits: list[dict]):
+		for trait in traits:
+			trait["name"] = ref(trait["name"])
+
+			kind_tag = trait["kind"] & 0x0F
+			if kind_tag in (TRAIT_SLOT, TRAIT_CONST):
+				trait["type_name"] = ref(trait["type_name"])
+				pool = VALUE_POOLS.get(trait.get("vkind")) if trait["vindex"] else None
+				if pool is not None:
+					trait["vindex"] = visit(pool, trait["vindex"])
+			elif kind_tag == TRAIT_CLASS:
+				trait["index"] = visit("class", trait["index"])
+			else:
+				trait["index"] = visit("method", trait["index"])
+
+	for method in abc.method_info:
+		visit("string", strings.get(method["name"], 0))
+		method["return_type"] = ref(method["return_type"])
+		method["params"] = [ref(param) for param in method["params"]]
+
+		if "optional_params" in method:
+			optional_params = []
+			for value, kind in method["optional_params"]:
+				pool = VALUE_POOLS.get(kind)
+				optional_params.append((visit(pool, value) if pool is not None else value, kind))
+			method["optional_params"] = optional_params
+
+	for instance in abc.instance_pool:
+		instance["name"] = ref(instance["name"])
+		instance["super"] = ref(instance["super"])
+		instance["interfaces"] = [ref(interface) for interface in instance["interfaces"]]
+		if instance["protected_ns"] is not None:
+			instance["protected_ns"] = visit("namespace", instance["protected_ns"])
+		instance["iinit"] = visit("method", instance["iinit"])
+		visit_traits(instance["traits"])
+
+	for klass in abc.class_pool:
+		klass["cinit"] = visit("method", klass["cinit"])
+		visit_traits(klass["traits"])
+
+	for script in abc.script_pool:
+		script["init"] = visit("method", script["init"])
+		visit_traits(script["traits"])
+
+	for index, body in enumerate(abc.method_bodies):
+		body["method_index"] = visit("method", body["method_index"])
+		visit_traits(body["traits"])
+
+		if not code:
+			continue
+
+		code_obj = abc.get_code(index)
+		changed = False
+
+		for exception in code_obj.exceptions:
+			for key in ("exc_type", "var_name"):
+				new = visit("multiname", exception[key])
+				if new != exception[key]:
+					exception[key] = new
+					changed = True
+
+		for instr in code_obj.items:
+			if instr.__class__ is Label:
+				continue
+			pools = OPERAND_POOLS.get(instr.opcode)
+			if pools is None:
+				continue
+
+			args = [visit(pool, arg) if pool is not None else arg for pool, arg in zip(pools, instr.args)]
+			if args != instr.args:
+				instr.args = args
+				code_obj.touch(instr)
+				changed = True
+
+		if changed:
+			code_obj.commit(body)
@@ -1,22 +1,114 @@
-from ..reader import ByteReader
+from ..reader import ByteReader, decode_leb128, decode_s24, decode_sleb128, decode_u16, decode_u32
+from ..stats import Stats
 
 from .consts import *
 from .instruction import Instruction, Opcode, Stack
 
+from time import perf_counter
+
 class ABCReader:
 	def __init__(self, data: bytes):
 		self.reader: ByteReader = ByteReader(data)
 
+		# raw byte range of every section, reused by ABCWriter for untouched ones
+		self._sections: dict[str, tuple[int, int]] = {}
+		# id(body) -> (body, start, end, code, exceptions, traits, header fields,
+		# copies of the exceptions and traits or None when edits are not tracked)
+		self._body_raw: dict[int, tuple] = {}
+		self._read_sizes: tuple[int, ...] = ()
+		# section -> copy of its entries as read, see _section_state()
+		self._read_state: dict[str, tuple] = {}
+		# copy every section on read so that write() catches in-place edits on
+		# its own; otherwise they have to be declared with mark_dirty()
+		self.track_edits: bool = False
+
+		# optional instrumentation, see swfparser.stats
+		self.stats: Stats | None = None
+
 	def read(self):
 		self.minor_version = self.reader.read_u16()
 		self.major_version = self.reader.read_u16()
 
-		self._read_constant_pool()
-		self._read_method_info()
-		self._read_metadata()
-		self._read_instances_and_classes()
-		self._read_scripts()
-		self._read_method_bodies()
+		stats = self.stats
+		for section, read_section in (
+			("constant_pool", self._read_constant_pool),
+			("method_info", self._read_method_info),
+			("metadata", self._read_metadata),
+			("instances", self._read_instances_and_classes),
+			("scripts", self._read_scripts),
+			("method_bodies", self._read_method_bodies),
+		):
+			start = self.reader.pos
+			if stats is None:
+				read_section()
+			else:
+				started = perf_counter()
+				read_section()
+				stats.record(f"abc.read.{section}", perf_counter() - started, self.reader.pos - start, self._section_count(section))
+			self._sections[section] = (start, self.reader.pos)
+
+		self._read_sizes = self._section_sizes()
+		if self.track_edits:
+			self._read_state = {section: self._section_state(section) for section in SECTION_STATES}
+
+	def _section_state(self, section: str) -> tuple:
+		# copy of a section's entries down to the pooled multinames they refer
+		# to, compared on write to catch in-place edits. Copies at read time,
+		# plain equality at write time
+		if section == "constant_pool":
+			return (
+				list(self.int_pool), list(self.uint_pool), list(self.double_pool), list(self.string_pool),
+				[dict(namespace) for namespace in self.namespace_pool],
+				[None if ns_set is None else list(ns_set) for ns_set in self.ns_set_pool],
+				[_copy_multiname(multiname) for multiname in self.multiname_pool],
+			)
+		if section == "method_info":
+			return (
+				[_copy_method(method) for method in self.method_info],
+			)
+		if section == "metadata":
+			return (
+				[{**metadata, "entries": dict(metadata["entries"])} for metadata in self.metadata],
+			)
+		if section == "instances":
+			return (
+				[
+					{**instance, "interfaces": list(instance["interfaces"]), "traits": copy_traits(instance["traits"])}
+					for instance in self.instance_pool
+				],
+				[{**klass, "traits": copy_traits(klass["traits"])} for klass in self.class_pool],
+			)
+		return (
+			[{**script, "traits": copy_traits(script["traits"])} for script in self.script_pool],
+		)
+
+	def _live_state(self, section: str) -> tuple:
+		# the entries _section_state() copied, compared against the copy
+		if section == "constant_pool":
+			return (
+				self.int_pool, self.uint_pool, self.double_pool, self.string_pool,
+				self.namespace_pool, self.ns_set_pool, self.multiname_pool,
+			)
+		if section == "instances":
+			return (self.instance_pool, self.class_pool)
+		return (getattr(self, {"scripts": "script_pool"}.get(section, section)),)
+
+	def _section_sizes(self) -> tuple[int, ...]:
+		# cheap fingerprint catching entries appended after read()
+		return (
+			len(self.int_pool), len(self.uint_pool), len(self.double_pool), len(self.string_pool),
+			len(self.namespace_pool), len(self.ns_set_pool), len(self.multiname_pool),
+			len(self.method_info), len(self.metadata), len(self.instance_pool), len(self.class_pool),
+			len(self.script_pool)
+		)
+
+	def _section_count(self, section: str) -> int:
+		# number of entries held by a section, for stats
+		if section == "constant_pool":
+			return sum(self._section_sizes()[:7])
+		if section == "instances":
+			return len(self.instance_pool) + len(self.class_pool)
+		return len(getattr(self, {"scripts": "script_pool"}.get(section, section)))
 
 	def _read_constant_pool(self):
 		int_count = self.reader.read_leb128()
@@ -202,6 +294,7 @@ class ABCReader:
 	def _read_method_bodies(self):
 		body_count = self.reader.read_leb128()
 		for _ in range(body_count):
+			start = self.reader.pos
 			method_idx  = self.reader.read_leb128()
 			max_stack   = self.reader.read_leb128()
 			local_count = self.reader.read_leb128()
@@ -224,7 +317,7 @@ class ABCReader:
 			trait_count = self.reader.read_leb128()
 			traits = [self._read_trait() for _ in range(trait_count)]
 
-			self.method_bodies.append({
+			body = {
 				'method_index': method_idx,
 				'max_stack':    max_stack,
 				'local_count':  local_count,
@@ -233,7 +326,13 @@ class ABCReader:
 				'code':         code_bytes.tobytes(),
 				'exceptions':   exceptions,
 				'traits':       traits
-			})
+			}
+			self.method_bodies.append(body)
+			self._body_raw[id(body)] = (
+				body, start, self.reader.pos, body['code'], exceptions, traits,
+				method_idx, max_stack, local_count, init_scope, max_scope,
+				*(([dict(exception) for exception in exceptions], copy_traits(traits)) if self.track_edits else (None, None)),
+			)
 
 	def _read_trait(self):
 		name_idx = self.reader.read_leb128()
@@ -255,64 +354,94 @@ class ABCReader:
 			trait['index']       = self.reader.read_leb128()
 		
 		if (kind >> 4) & 0x04:
-			# ignore metadata
+			# kept only to be written back next to the raw metadata section
 			meta_count = self.reader.read_leb128()
-			for _ in range(meta_count):
-				self.reader.read_leb128()
+			trait['metadata'] = [self.reader.read_leb128() for _ in range(meta_count)]
 
 		return trait
 	
 	@staticmethod	
 	def read_instructions(code: bytes) -> Stack:
-		reader = ByteReader(code)
 		stack = Stack(code_len=len(code))
 
-		get_op = Opcode.from_code
-		while reader.pos < len(code):
-			address = reader.pos
-
-			opcode = get_op(reader.read_u8())
-			if opcode is None:
-				raise ValueError(f"Unknown opcode on read: 0x{opcode.name:02x}")
-			
-			arg_types = []
-			if len(opcode.value) > 1:
-				arg_types.extend(opcode.value[1:])
-
-			args, targets = [], []
-			for t in arg_types:
-				match t:
-					case "u30":
-						args.append(reader.read_leb128())
-					case "u8":
-						args.append(reader.read_u8())
-					case "u16":
-						args.append(reader.read_u16())
-					case "s24":
-						op_off = reader.pos
-						target = reader.read_s24()
-
-						if opcode.name == "lookupswitch":
-							targets.append(op_off + target)
-						else:
-							targets.append(target + reader.pos)
-
-						args.append(target)
-					case "s24arr":
-						op_off = reader.pos
-
-						case_count = reader.read_leb128() + 1
-						case_offsets = [reader.read_s24() for _ in range(case_count)]
-
-						targets.extend([op_off + offset for offset in case_offsets])
-
-						args.append(case_offsets)
-					case "u32":
-						args.append(reader.read_u32())
-					case "s32":
-						args.append(reader.read_sleb128())
-					case _:
-						raise ValueError(f"Unknown arg type: {t}")
-				
-			stack.add(Instruction(opcode, address, args, targets))
-		return stack
\ No newline at end of file
+		offset = 0
+		while offset < len(code):
+			instr, offset = decode_instruction(code, offset)
+			stack.add(instr)
+		return stack
+
+# sections compared with their copy as read on write
+SECTION_STATES = ("constant_pool", "method_info", "metadata", "instances", "scripts")
+
+def _copy_multiname(multiname: dict) -> dict:
+	if "param_types" in multiname:
+		return {**multiname, "param_types": list(multiname["param_types"])}
+	return dict(multiname)
+
+def _copy_method(method: dict) -> dict:
+	method = {**method, "params": list(method["params"])}
+	if "optional_params" in method:
+		method["optional_params"] = list(method["optional_params"])
+	return method
+
+def copy_traits(traits: list[dict]) -> list[dict]:
+	# referenced multinames are shared, not copied
+	return [
+		{**trait, "metadata": list(trait["metadata"])} if "metadata" in trait else dict(trait)
+		for trait in traits
+	]
+
+# operand types per opcode, looked up once instead of through Enum.value
+_OPERAND_TYPES = {opcode: opcode.value[1:] for opcode in Opcode}
+
+def decode_instruction(code: bytes | memoryview, offset: int) -> tuple[Instruction, int]:
+	# stateless: safe to call on shared code from several threads
+	address = offset
+
+	opcode = Opcode.from_code(code[offset])
+	if opcode is None:
+		raise ValueError(f"Unknown opcode on read: 0x{code[offset]:02x}")
+	offset += 1
+
+	args, targets = [], []
+	for t in _OPERAND_TYPES[opcode]:
+		match t:
+			case "u30":
+				value, offset = decode_leb128(code, offset)
+				args.append(value)
+			case "u8":
+				args.append(code[offset])
+				offset += 1
+			case "u16":
+				value, offset = decode_u16(code, offset)
+				args.append(value)
+			case "s24":
+				target, offset = decode_s24(code, offset)
+
+				if opcode is Opcode.lookupswitch:
+					# lookupswitch offsets are relative to the instruction itself
+					targets.append(address + target)
+				else:
+					targets.append(target + offset)
+
+				args.append(target)
+			case "s24arr":
+				case_count, offset = decode_leb128(code, offset)
+				case_offsets = []
+				for _ in range(case_count + 1):
+					case_offset, offset = decode_s24(code, offset)
+					case_offsets.append(case_offset)
+
+				targets.extend([address + case_offset for case_offset in case_offsets])
+
+				args.append(case_offsets)
+			case "u32":
+				value, offset = decode_u32(code, offset)
+				args.append(value)
+			case "s32":
+				value, offset = decode_sleb128(code, offset)
+				args.append(value)
+			case _:
+				raise ValueError(f"Unknown arg type: {t}")
+
+	return Instruction(opcode, address, args, targets), offset
@@ -0,0 +1,209 @@
+from .assembler import Code, Label
+from .cfg import ControlFlowGraph
+from .consts import *
+from .instruction import OPERAND_POOLS
+from .strip import DEBUG_OPCODES
+
+from dataclasses import dataclass
+
+import hashlib
+
+# namespaces of the player and framework APIs, never renamed by obfuscators
+API_NAMESPACES = ("flash.", "mx.", "fl.", "adobe.", "air.", "__AS3__.", "http://adobe.com/")
+
+# top-level builtins living in the public namespace
+API_NAMES = frozenset((
+	"Object", "Array", "String", "Number", "int", "uint", "Boolean", "Function", "Class", "Math",
+	"Date", "RegExp", "Error", "TypeError", "RangeError", "ArgumentError", "XML", "XMLList",
+	"JSON", "Namespace", "QName", "Vector", "trace", "parseInt", "parseFloat", "isNaN", "isFinite",
+	"escape", "unescape", "encodeURIComponent", "decodeURIComponent", "length", "push", "pop",
+	"shift", "unshift", "splice", "slice", "join", "concat", "indexOf", "toString", "valueOf",
+	"charAt", "charCodeAt", "fromCharCode", "substr", "substring", "split", "replace", "toLowerCase",
+	"toUpperCase", "hasOwnProperty", "prototype", "constructor", "apply", "call",
+))
+
+# MinHash bins and LSH bands over them
+BINS = 32
+BANDS = 8
+
+def _hash64(value: str) -> int:
+	return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+def _signed(value: int) -> int:
+	# sqlite integers are signed 64-bit
+	return value - (1 << 64) if value >= 1 << 63 else value
+
+@dataclass
+class Signature:
+	kind: str # "method" or "class"
+	name: str
+	exact: bytes
+	minhash: list[int]
+
+	def bands(self) -> list[tuple[int, int]]:
+		# (band, hash) pairs. Bands of empty bins only are left out: they hash
+		# the same for every small feature set and would match everything
+		size = BINS // BANDS
+		return [
+			(band, _signed(_hash64(f"{band}:{bins}")))
+			for band in range(BANDS)
+			if (bins := self.minhash[band * size:(band + 1) * size]) != [-1] * size
+		]
+
+	def similarity(self, other: "Signature") -> float:
+		# estimated Jaccard similarity of the two feature sets
+		filled = [(a, b) for a, b in zip(self.minhash, other.minhash) if a != -1 or b != -1]
+		if not filled:
+			return 1.0
+		return sum(a == b for a, b in filled) / len(filled)
+
+def minhash(features: set[str]) -> list[int]:
+	# one permutation MinHash: each feature hash lands in one bin, keeping the
+	# minimum per bin. Empty bins stay -1
+	bins = [-1] * BINS
+	for feature in features:
+		value = _hash64(feature)
+		slot, value = value % BINS, _signed(value // BINS)
+		if bins[slot] == -1 or value < bins[slot]:
+			bins[slot] = value
+	return bins
+
+def _release_cfg(body: dict) -> ControlFlowGraph:
+	# the graph of the body without debug opcodes: a block holding only
+	# debugline would otherwise make debug and release builds differ
+	try:
+		code = Code.from_body(body)
+	except ValueError:
+		# branches into the middle of an instruction: kept as they are
+		return ControlFlowGraph.from_code(body["code"], body["exceptions"])
+	if code.filter(lambda item: item.__class__ is Label or item.opcode not in DEBUG_OPCODES):
+		return ControlFlowGraph.from_code(code.assemble(), code.resolve_exceptions())
+	return ControlFlowGraph.from_code(body["code"], body["exceptions"])
+
+def _api_name(abc, multiname: dict) -> str | None:
+	if multiname is None or "name_index" not in multiname or multiname["kind"] == CONSTANT_TypeName:
+		return None
+
+	name = abc.string_pool[multiname["name_index"]]
+	if "ns_index" in multiname:
+		namespaces = (abc.resolve_namespace(multiname["ns_index"]),)
+	elif "ns_set_index" in multiname:
+		namespaces = [abc.resolve_namespace(ns) for ns in abc.ns_set_pool[multiname["ns_set_index"]]]
+	else:
+		namespaces = ("",)
+
+	if any(namespace.startswith(API_NAMESPACES) for namespace in namespaces):
+		return name
+	if name in API_NAMES and "" in namespaces:
+		return name
+	return None
+
+class _Signer:
+	def __init__(self, abc):
+		self.abc = abc
+		self.bodies = {body["method_index"]: body for body in abc.method_bodies}
+
+	def operand(self, pool: str, index: int) -> str:
+		abc = self.abc
+		if pool == "multiname":
+			name = _api_name(abc, abc.multiname_pool[index])
+			return "mn" if name is None else f"api:{name}"
+		if pool == "string":
+			# literals are kept: obfuscators rename identifiers, not data
+			return f"str:{abc.string_pool[index]}"
+		if pool in ("int", "uint", "double"):
+			return repr(getattr(abc, f"{pool}_pool")[index])
+		return pool
+
+	def method(self, name: str, index: int) -> Signature:
+		abc = self.abc
+		info = abc.method_info[index]
+		features = {f"params:{len(info['params'])}", f"optional:{len(info.get('optional_params', ()))}"}
+		for multiname in (info["return_type"], *info["params"]):
+			api = _api_name(abc, multiname)
+			if api is not None:
+				features.add(f"type:{api}")
+
+		tokens = []
+		shape = []
+		body = self.bodies.get(index)
+		if body is not None:
+			cfg = _release_cfg(body)
+			instructions = [instr for instr in cfg.stack.instructions if instr.opcode not in DEBUG_OPCODES]
+
+			for instr in instructions:
+				pools = OPERAND_POOLS.get(instr.opcode)
+				if instr.targets:
+					operands = ["t"] * len(instr.targets)
+				elif pools is not None:
+					operands = [self.operand(pool, arg) if pool is not None else repr(arg) for pool, arg in zip(pools, instr.args)]
+				else:
+					operands = [repr(arg) for arg in instr.args]
+				tokens.append(" ".join((instr.opcode.name, *operands)))
+				for operand in operands:
+					if operand.startswith(("api:", "str:")):
+						features.add(operand)
+
+			# block graph in reverse postorder, successors as relative positions
+			order = {block: i for i, block in enumerate(cfg.reverse_postorder)}
+			for i, block in enumerate(cfg.reverse_postorder):
+				successors = ",".join(str(order[s] - i) for s in cfg.blocks[block].successors if s in order)
+				shape.append(successors)
+				features.add(f"edge:{successors}")
+			features.add(f"blocks:{len(shape).bit_length()}")
+			features.add(f"loops:{len(cfg.loop_headers)}")
+
+			names = [instr.opcode.name for instr in instructions]
+			features.update(f"op:{' '.join(names[i:i + 3])}" for i in range(len(names)))
+
+		exact = hashlib.blake2b(repr((sorted(features), tokens, shape)).encode(), digest_size=16).digest()
+		return Signature("method", name, exact, minhash(features))
+
+	def run(self) -> list[Signature]:
+		abc = self.abc
+		signatures = []
+		for index, instance in enumerate(abc.instance_pool):
+			name = abc.resolve_multiname(instance["name"])
+			klass = abc.class_pool[index]
+
+			members = [
+				self.method(f"{name}/iinit", instance["iinit"]),
+				self.method(f"{name}/cinit", klass["cinit"]),
+			]
+			features = set()
+			for prefix, traits in ((f"{name}/", instance["traits"]), (f"{name}/static ", klass["traits"])):
+				members.extend(self.trait_methods(prefix, traits))
+				for trait in traits:
+					if trait["kind"] & 0x0F in (TRAIT_SLOT, TRAIT_CONST):
+						api = _api_name(abc, trait["type_name"])
+						features.add(f"{prefix[len(name):]}slot:{api or '?'}")
+
+			for member in members:
+				features.add(f"member:{member.exact.hex()}")
+			for multiname in (instance["super"], *instance["interfaces"]):
+				api = _api_name(abc, multiname)
+				if api is not None:
+					features.add(f"extends:{api}")
+
+			exact = hashlib.blake2b(repr(sorted(features)).encode(), digest_size=16).digest()
+			signatures.append(Signature("class", name, exact, minhash(features)))
+			signatures.extend(members)
+
+		for script in abc.script_pool:
+			signatures.extend(self.trait_methods("script/", script["traits"]))
+
+		return signatures
+
+	def trait_methods(self, prefix: str, traits: list[dict]) -> list[Signature]:
+		abc = self.abc
+		return [
+			self.method(f"{prefix}{TRAIT_NAMES[trait['kind'] & 0x0F]} {abc.resolve_multiname(trait['name'])}", trait["index"])
+			for trait in traits
+			if trait["kind"] & 0x0F in (TRAIT_METHOD, TRAIT_GETTER, TRAIT_SETTER, TRAIT_FUNCTION)
+		]
+
+def signatures(abc) -> list[Signature]:
+	# rename-invariant signatures of every class and of the methods they own,
+	# named as in the ABC. Obfuscated identifiers never enter a signature: only
+	# opcode shape, operand kinds, block graph, literals and player API names do
+	return _Signer(abc).run()
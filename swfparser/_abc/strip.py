@@ -0,0 +1,82 @@
+from .assembler import Label
+from .instruction import Opcode
+from .pools import POOLS, multiname_fields, walk_pool_references, walk_references
+
+DEBUG_OPCODES = frozenset((Opcode.debug, Opcode.debugfile, Opcode.debugline))
+
+def strip_debug(abc) -> int:
+	removed = 0
+	for index, body in enumerate(abc.method_bodies):
+		code = abc.get_code(index)
+		count = code.filter(lambda item: item.__class__ is Label or item.opcode not in DEBUG_OPCODES)
+		if count:
+			code.commit(body)
+			removed += count
+	return removed
+
+def compact_pools(abc) -> dict[str, int]:
+	# mark every entry reachable from the rest of the ABC, then renumber
+	# each pool compactly and rewrite all references. Index 0 always stays
+	used = {pool: bytearray(len(getattr(abc, attr))) for pool, attr in POOLS.items()}
+	for marks in used.values():
+		if marks:
+			marks[0] = 1
+
+	def mark(pool: str, index: int) -> int:
+		marks = used.get(pool)
+		if marks is not None:
+			marks[index] = 1
+		return index
+
+	walk_references(abc, mark)
+
+	# propagate through the pools themselves: multinames -> ns_sets -> namespaces -> strings
+	multinames = used["multiname"]
+	work = [i for i in range(1, len(multinames)) if multinames[i]]
+	while work:
+		multiname = abc.multiname_pool[work.pop()]
+		for pool, key in multiname_fields(multiname):
+			if pool == "multiname" and not multinames[multiname[key]]:
+				work.append(multiname[key])
+			mark(pool, multiname[key])
+		for param in multiname.get("param_types", ()):
+			if not multinames[param]:
+				multinames[param] = 1
+				work.append(param)
+
+	for i in range(1, len(abc.ns_set_pool)):
+		if used["ns_set"][i]:
+			for ns in abc.ns_set_pool[i]:
+				mark("namespace", ns)
+
+	for i in range(1, len(abc.namespace_pool)):
+		if used["namespace"][i]:
+			mark("string", abc.namespace_pool[i]["name_index"])
+
+	remap = {}
+	removed = {}
+	for pool, attr in POOLS.items():
+		entries = getattr(abc, attr)
+		marks = used[pool]
+
+		mapping = [0] * len(entries)
+		kept = []
+		for i, entry in enumerate(entries):
+			if marks[i]:
+				mapping[i] = len(kept)
+				kept.append(entry)
+
+		remap[pool] = mapping
+		removed[pool] = len(entries) - len(kept)
+		setattr(abc, attr, kept)
+
+	def rewrite(pool: str, index: int) -> int:
+		mapping = remap.get(pool)
+		return mapping[index] if mapping is not None else index
+
+	walk_pool_references(abc, rewrite)
+	walk_references(abc, rewrite)
+
+	abc._reindex()
+	abc.mark_dirty()
+	return removed
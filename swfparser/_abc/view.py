@@ -0,0 +1,79 @@
+from . import names
+from .cfg import ControlFlowGraph
+from .instruction import Instruction
+from .reader import decode_instruction
+
+import threading
+
+class ABCView:
+	# Read-only view of a parsed ABC that can be shared by many threads. Pools
+	# and entity lists are snapshotted as tuples (the entries themselves are
+	# shared and must be treated as read-only). Bodies are decoded with the
+	# stateless decode functions and cached behind a lock that is never held
+	# while decoding
+
+	def __init__(self, abc):
+		self.name: str = abc.name
+		self.flags: int = abc.flags
+		self.minor_version: int = abc.minor_version
+		self.major_version: int = abc.major_version
+
+		self.int_pool: tuple[int, ...] = tuple(abc.int_pool)
+		self.uint_pool: tuple[int, ...] = tuple(abc.uint_pool)
+		self.double_pool: tuple[float, ...] = tuple(abc.double_pool)
+		self.string_pool: tuple[str, ...] = tuple(abc.string_pool)
+		self.namespace_pool: tuple[dict, ...] = tuple(abc.namespace_pool)
+		self.ns_set_pool: tuple[list[int] | None, ...] = tuple(abc.ns_set_pool)
+		self.multiname_pool: tuple[dict, ...] = tuple(abc.multiname_pool)
+
+		self.method_info: tuple[dict, ...] = tuple(abc.method_info)
+		self.metadata: tuple[dict, ...] = tuple(abc.metadata)
+		self.instance_pool: tuple[dict, ...] = tuple(abc.instance_pool)
+		self.class_pool: tuple[dict, ...] = tuple(abc.class_pool)
+		self.script_pool: tuple[dict, ...] = tuple(abc.script_pool)
+		self.method_bodies: tuple[dict, ...] = tuple(abc.method_bodies)
+
+		# bodies keep their code at the time of the snapshot
+		self._codes: tuple[tuple[bytes, list[dict]], ...] = tuple(
+			(body["code"], body["exceptions"]) for body in abc.method_bodies
+		)
+
+		self._lock = threading.Lock()
+		self._instructions: dict[int, tuple[Instruction, ...]] = {}
+		self._cfgs: dict[int, ControlFlowGraph] = {}
+
+	def resolve_namespace(self, index: int) -> str:
+		return names.resolve_namespace(self, index)
+
+	def resolve_multiname(self, multiname: dict | int) -> str:
+		return names.resolve_multiname(self, multiname)
+
+	def decode(self, body_index: int, offset: int) -> tuple[Instruction, int]:
+		# one instruction at a code offset, uncached
+		return decode_instruction(self._codes[body_index][0], offset)
+
+	def instructions(self, body_index: int) -> tuple[Instruction, ...]:
+		instructions = self._instructions.get(body_index)
+		if instructions is not None:
+			return instructions
+
+		code = self._codes[body_index][0]
+		decoded = []
+		offset = 0
+		while offset < len(code):
+			instr, offset = decode_instruction(code, offset)
+			decoded.append(instr)
+
+		# a concurrent decode of the same body may have won: keep the first
+		with self._lock:
+			return self._instructions.setdefault(body_index, tuple(decoded))
+
+	def cfg(self, body_index: int) -> ControlFlowGraph:
+		cfg = self._cfgs.get(body_index)
+		if cfg is not None:
+			return cfg
+
+		code, exceptions = self._codes[body_index]
+		cfg = ControlFlowGraph.from_code(code, exceptions)
+		with self._lock:
+			return self._cfgs.setdefault(body_index, cfg)
@@ -1,31 +1,129 @@
 from ..writer import ByteWriter
 
+from .assembler import encode_instruction
 from .consts import *
 from .instruction import Stack
 
+from time import perf_counter
+
+SECTIONS = ("constant_pool", "method_info", "metadata", "instances", "scripts", "method_bodies")
+
 class ABCWriter:
 	def __init__(self):
 		self.writer: ByteWriter = ByteWriter()
 
-	def write(self) -> 'ByteWriter':
+		# sections edited in place since read(), see mark_dirty()
+		self._dirty: set[str] = set()
+		self._keep_metadata: bool = False
+		# recompute the frame limits of edited bodies on write, see update_limits()
+		self.auto_limits: bool = False
+
+	def mark_dirty(self, *sections: str, body_index: int | None = None):
+		# appended entries and replaced body code/exceptions/traits are detected
+		# on their own; in-place edits of existing entries must be declared here
+		# unless track_edits was set before read(). No arguments marks everything.
+		# Marked bodies also drop their cached graph and Code
+		if body_index is not None:
+			self._body_raw.pop(id(self.method_bodies[body_index]), None)
+			with self._cache_lock:
+				self._cfg_cache.pop(body_index, None)
+				self._code_cache.pop(body_index, None)
+			return
+		sections = sections or SECTIONS
+		self._dirty.update(sections)
+		if "method_bodies" in sections:
+			with self._cache_lock:
+				self._cfg_cache.clear()
+				self._code_cache.clear()
+
+	def write(self, writer: ByteWriter | None = None) -> 'ByteWriter':
+		# serializes into the given writer (e.g. the enclosing SWF) or a new
+		# buffer; untouched sections are copied verbatim from the read data
+		self.writer = ByteWriter() if writer is None else writer
+
 		self.writer.write_u32(self.flags)
 		self.writer.write_sstring(self.name)
 
 		self.writer.write_u16(self.minor_version)
 		self.writer.write_u16(self.major_version)
 
-		self._write_constant_pool()
-		self._write_method_info()
-
-		# ignore metadata: their entries are not used by AVM2
-		self.writer.write_leb128(0)
+		if self.auto_limits:
+			self._refresh_limits()
+
+		clean = self._clean_sections()
+		self._keep_metadata = "metadata" in clean
+
+		raw = self.reader.buf
+		stats = self.stats
+		for section, write_section in (
+			("constant_pool", self._write_constant_pool),
+			("method_info", self._write_method_info),
+			("metadata", self._write_metadata),
+			("instances", self._write_instances_and_classes),
+			("scripts", self._write_scripts),
+			("method_bodies", self._write_method_bodies),
+		):
+			if stats is not None:
+				started, start = perf_counter(), len(self.writer)
+
+			if section == "method_bodies":
+				# reuses unchanged bodies on its own
+				write_section(section in clean)
+			elif section in clean:
+				raw_start, raw_end = self._sections[section]
+				self.writer.write_bytes(raw[raw_start:raw_end])
+			else:
+				write_section()
 
-		self._write_instances_and_classes()
-		self._write_scripts()
-		self._write_method_bodies()
+			if stats is not None:
+				stats.record(f"abc.write.{section}", perf_counter() - started, len(self.writer) - start, self._section_count(section))
 
 		return self.writer
 
+	def _refresh_limits(self):
+		# only bodies whose code or exceptions changed since read(): the
+		# others keep their original limits and stay byte-identical
+		for index, body in enumerate(self.method_bodies):
+			snapshot = self._body_raw.get(id(body))
+			if (
+				snapshot is None or snapshot[0] is not body
+				or body["code"] is not snapshot[3] or body["exceptions"] is not snapshot[4]
+			):
+				self.update_limits(index)
+
+	def _clean_sections(self) -> set[str]:
+		if not self._sections:
+			return set()
+
+		# sections whose entries were appended since read() are re-encoded,
+		# and so are in-place edits when track_edits copied the sections
+		dirty = set(self._dirty)
+		sizes, read_sizes = self._section_sizes(), self._read_sizes
+		if sizes != read_sizes:
+			if sizes[:7] != read_sizes[:7]:
+				dirty.add("constant_pool")
+			if sizes[7] != read_sizes[7]:
+				dirty.add("method_info")
+			if sizes[8] != read_sizes[8]:
+				dirty.add("metadata")
+			if sizes[9:11] != read_sizes[9:11]:
+				dirty.add("instances")
+			if sizes[11] != read_sizes[11]:
+				dirty.add("scripts")
+		for section, state in self._read_state.items():
+			if section not in dirty and self._live_state(section) != state:
+				dirty.add(section)
+
+		if "metadata" in dirty and self._read_sizes[8]:
+			# metadata is not re-encoded: traits referencing it have to drop their flag
+			dirty.update(("instances", "scripts", "method_bodies"))
+
+		return set(self._sections) - dirty
+
+	def _write_metadata(self):
+		# ignore metadata: their entries are not used by AVM2
+		self.writer.write_leb128(0)
+
 	def _write_constant_pool(self):
 		self.writer.write_leb128(len(self.int_pool))
 		for i in range(1, len(self.int_pool)):
@@ -131,11 +229,38 @@ class ABCWriter:
 			self.writer.write_leb128(script["init"])
 			self._write_traits(script["traits"])
 
-	def _write_method_bodies(self):
+	def _write_method_bodies(self, reuse: bool = False):
 		w = self.writer
 		w.write_leb128(len(self.method_bodies))
 
+		raw = self.reader.buf
+		body_raw = self._body_raw if reuse else {}
+		run_start = run_end = 0
+
 		for body in self.method_bodies:
+			snapshot = body_raw.get(id(body))
+			if (
+				snapshot is not None and snapshot[0] is body
+				and body["code"] is snapshot[3]
+				and body["exceptions"] is snapshot[4]
+				and body["traits"] is snapshot[5]
+				and (
+					body["method_index"], body["max_stack"], body["local_count"],
+					body["init_scope"], body["max_scope"]
+				) == snapshot[6:11]
+				# exception and trait entries edited in place, when tracked
+				and (snapshot[11] is None or (body["exceptions"] == snapshot[11] and body["traits"] == snapshot[12]))
+			):
+				# consecutive untouched bodies are copied as one slice
+				if snapshot[1] != run_end:
+					w.write_bytes(raw[run_start:run_end])
+					run_start = snapshot[1]
+				run_end = snapshot[2]
+				continue
+
+			w.write_bytes(raw[run_start:run_end])
+			run_start = run_end = 0
+
 			w.write_leb128(body["method_index"])
 			w.write_leb128(body["max_stack"])
 			w.write_leb128(body["local_count"])
@@ -153,6 +278,8 @@ class ABCWriter:
 				w.write_leb128(exception["var_name"])
 			
 			self._write_traits(body["traits"])
+
+		w.write_bytes(raw[run_start:run_end])
 	
 	def _write_traits(self, traits: list[dict[str, int]]):
 		self.writer.write_leb128(len(traits))
@@ -160,10 +287,14 @@ class ABCWriter:
 			self._write_trait(trait)
 
 	def _write_trait(self, trait: dict[str, int]):
+		kind = trait["kind"]
+		if not self._keep_metadata:
+			kind &= ~0x40
+
 		self.writer.write_leb128(self._multiname_id_index[id(trait["name"])])
-		self.writer.write_u8(trait["kind"])
+		self.writer.write_u8(kind)
 		
-		kind_tag = trait["kind"] & 0x0F
+		kind_tag = kind & 0x0F
 		if kind_tag in (TRAIT_SLOT, TRAIT_CONST):
 			self.writer.write_leb128(trait["slot_id"])
 			
@@ -178,9 +309,16 @@ class ABCWriter:
 		elif kind_tag == TRAIT_FUNCTION:
 			self.writer.write_leb128(trait["disp_id"])
 			self.writer.write_leb128(trait["index"])
+
+		if kind & 0x40:
+			metadata = trait.get("metadata", ())
+			self.writer.write_leb128(len(metadata))
+			for index in metadata:
+				self.writer.write_leb128(index)
 	
 	@staticmethod
 	def assemble_instructions(stack: Stack) -> bytes:
+		# offsets are written exactly as stored in args, see assembler.Code for relocation
 		writer = ByteWriter()
 
 		while True:
@@ -189,38 +327,6 @@ class ABCWriter:
 				break
 
 			instr.address = len(writer)
-
-			opcode_val = instr.opcode.value
-			writer.write_u8(opcode_val[0])
-
-			arg_types = []
-			if len(opcode_val) > 1:
-				arg_types.extend(opcode_val[1:])
-
-			for arg, t in zip(instr.args, arg_types):
-				match t:
-					case "u30":
-						writer.write_leb128(arg)
-					case "u8":
-						writer.write_u8(arg)
-					case "u16":
-						writer.write_u16(arg)
-					case "s24":
-						writer.write_s24(arg)
-					case "s24arr":
-						case_count = len(arg) + 1
-						writer.write_leb128(case_count)
-
-						for case_offset in arg:
-							writer.write_s24(case_offset)
-					case "u32":
-						writer.write_u32(arg)
-					case "s32":
-						writer.write_sleb128(arg)
-					case "u32":
-						writer.write_u32(arg)
-					
-					case _:
-						raise ValueError(f"Unknwon arg type for assembly: {t}")
+			encode_instruction(writer, instr)
 					
 		return bytes(writer.buf)
\ No newline at end of file
@@ -0,0 +1,287 @@
+from .reader import ByteReader
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator
+
+import os
+import re
+import struct
+import zlib
+
+DEFINE_BITS_LOSSLESS = 20
+DEFINE_BITS_JPEG2 = 21
+DEFINE_BITS_JPEG3 = 35
+DEFINE_BITS_LOSSLESS2 = 36
+DEFINE_BITS_JPEG4 = 90
+DEFINE_BINARY_DATA = 87
+DEFINE_SOUND = 14
+
+ASSET_KINDS = {
+	DEFINE_BINARY_DATA: "binary",
+	DEFINE_BITS_JPEG2: "image",
+	DEFINE_BITS_JPEG3: "image",
+	DEFINE_BITS_JPEG4: "image",
+	DEFINE_BITS_LOSSLESS: "bitmap",
+	DEFINE_BITS_LOSSLESS2: "bitmap",
+	DEFINE_SOUND: "sound",
+}
+
+_SOUND_RATES = (5512, 11025, 22050, 44100)
+_SOUND_EXTENSIONS = {1: ".adpcm", 2: ".mp3", 4: ".nelly", 5: ".nelly", 6: ".nelly", 11: ".spx"}
+
+# inflated bytes produced per step for lossless bitmaps and alpha planes
+_CHUNK = 1 << 16
+
+@dataclass
+class Asset:
+	character: int
+	tag_code: int
+	kind: str
+	name: str | None # SymbolClass name, if bound
+	filename: str
+
+def _image_extension(data: memoryview) -> str:
+	head = bytes(data[:8])
+	if head.startswith(b"\x89PNG"):
+		return ".png"
+	if head.startswith(b"GIF8"):
+		return ".gif"
+	return ".jpg"
+
+def _binary_extension(data: memoryview) -> str:
+	return ".swf" if bytes(data[:3]) in (b"FWS", b"CWS") else ".bin"
+
+def _jpeg(data: memoryview) -> memoryview:
+	# files before SWF 8 may start with an erroneous EOI/SOI pair
+	return data[4:] if bytes(data[:4]) == b"\xff\xd9\xff\xd8" else data
+
+class _Inflater:
+	# incremental zlib reader: output is produced as it is consumed
+	def __init__(self, data: memoryview):
+		self._decompressor = zlib.decompressobj()
+		self._pending = data
+		self._buf = bytearray()
+
+	def read(self, n: int) -> bytes:
+		buf = self._buf
+		while len(buf) < n:
+			chunk = self._decompressor.decompress(self._pending, max(n - len(buf), _CHUNK))
+			self._pending = self._decompressor.unconsumed_tail
+			if not chunk:
+				chunk = self._decompressor.flush()
+				if not chunk:
+					raise ValueError("Truncated zlib data")
+			buf += chunk
+		out = bytes(buf[:n])
+		del buf[:n]
+		return out
+
+	def chunks(self) -> Iterator[bytes]:
+		if self._buf:
+			yield bytes(self._buf)
+			self._buf.clear()
+		while not self._decompressor.eof:
+			chunk = self._decompressor.decompress(self._pending, _CHUNK)
+			self._pending = self._decompressor.unconsumed_tail
+			if not chunk:
+				chunk = self._decompressor.flush()
+				if not chunk:
+					return
+			yield chunk
+
+def _png_chunk(fp: BinaryIO, kind: bytes, payload: bytes):
+	fp.write(struct.pack(">I", len(payload)))
+	fp.write(kind)
+	fp.write(payload)
+	fp.write(struct.pack(">I", zlib.crc32(payload, zlib.crc32(kind))))
+
+def _write_png(fp: BinaryIO, width: int, height: int, color_type: int, rows: Iterator[bytes], palette: bytes = b"", transparency: bytes = b""):
+	# rows are compressed into IDAT chunks as they arrive
+	fp.write(b"\x89PNG\r\n\x1a\n")
+	_png_chunk(fp, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+	if palette:
+		_png_chunk(fp, b"PLTE", palette)
+	if transparency:
+		_png_chunk(fp, b"tRNS", transparency)
+
+	compressor = zlib.compressobj()
+	pending = bytearray()
+	for row in rows:
+		pending += compressor.compress(b"\x00")
+		pending += compressor.compress(row)
+		if len(pending) >= _CHUNK:
+			_png_chunk(fp, b"IDAT", bytes(pending))
+			pending.clear()
+	pending += compressor.flush()
+	_png_chunk(fp, b"IDAT", bytes(pending))
+	_png_chunk(fp, b"IEND", b"")
+
+# translation table per alpha value from premultiplied to straight color
+_UNPREMULTIPLY = [
+	bytes(min(255, (value * 255 + alpha // 2) // alpha) if alpha else 0 for value in range(256))
+	for alpha in range(256)
+]
+
+def _unpremultiply(rgba: bytearray) -> bytearray:
+	# DefineBitsLossless2 stores premultiplied colors, PNG expects straight alpha
+	alphas = rgba[3::4]
+	if alphas.count(255) != len(alphas):
+		for i, alpha in enumerate(alphas):
+			if alpha != 255:
+				p = i * 4
+				rgba[p:p + 3] = rgba[p:p + 3].translate(_UNPREMULTIPLY[alpha])
+	return rgba
+
+def _argb_rows(inflater: _Inflater, width: int, height: int, alpha: bool) -> Iterator[bytes]:
+	for _ in range(height):
+		row = inflater.read(width * 4)
+		out = bytearray(width * (4 if alpha else 3))
+		step = 4 if alpha else 3
+		out[0::step] = row[1::4]
+		out[1::step] = row[2::4]
+		out[2::step] = row[3::4]
+		if alpha:
+			out[3::4] = row[0::4]
+			_unpremultiply(out)
+		yield out
+
+def _pix15_rows(inflater: _Inflater, width: int, height: int) -> Iterator[bytes]:
+	stride = (width * 2 + 3) & ~3
+	for _ in range(height):
+		row = inflater.read(stride)
+		out = bytearray(width * 3)
+		for i in range(width):
+			pixel = row[i * 2] << 8 | row[i * 2 + 1]
+			out[i * 3] = (pixel >> 10 & 0x1F) * 255 // 31
+			out[i * 3 + 1] = (pixel >> 5 & 0x1F) * 255 // 31
+			out[i * 3 + 2] = (pixel & 0x1F) * 255 // 31
+		yield out
+
+def _colormapped_rows(inflater: _Inflater, width: int, height: int) -> Iterator[bytes]:
+	stride = (width + 3) & ~3
+	for _ in range(height):
+		yield inflater.read(stride)[:width]
+
+def _write_bitmap(data: memoryview, tag_code: int, fp: BinaryIO):
+	r = ByteReader(data)
+	r.read_u16() # character id
+	bitmap_format = r.read_u8()
+	width = r.read_u16()
+	height = r.read_u16()
+	alpha = tag_code == DEFINE_BITS_LOSSLESS2
+
+	if bitmap_format == 3:
+		colors = r.read_u8() + 1
+		inflater = _Inflater(data[r.pos:])
+		table = inflater.read(colors * (4 if alpha else 3))
+		if alpha:
+			rgba = _unpremultiply(bytearray(table))
+			palette = bytes(b for i, b in enumerate(rgba) if i % 4 != 3)
+			transparency = bytes(rgba[3::4])
+		else:
+			palette, transparency = table, b""
+		_write_png(fp, width, height, 3, _colormapped_rows(inflater, width, height), palette, transparency)
+	elif bitmap_format == 4 and not alpha:
+		_write_png(fp, width, height, 2, _pix15_rows(_Inflater(data[r.pos:]), width, height))
+	elif bitmap_format == 5:
+		rows = _argb_rows(_Inflater(data[r.pos:]), width, height, alpha)
+		_write_png(fp, width, height, 6 if alpha else 2, rows)
+	else:
+		raise ValueError(f"Unknown bitmap format: {bitmap_format}")
+
+def _image_parts(data: memoryview, tag_code: int) -> tuple[memoryview, memoryview]:
+	# (image file, zlib alpha plane)
+	if tag_code == DEFINE_BITS_JPEG2:
+		return _jpeg(data[2:]), data[:0]
+	r = ByteReader(data)
+	r.read_u16() # character id
+	alpha_offset = r.read_u32()
+	if tag_code == DEFINE_BITS_JPEG4:
+		r.read_u16() # deblocking filter
+	return _jpeg(data[r.pos:r.pos + alpha_offset]), data[r.pos + alpha_offset:]
+
+def _write_alpha(alpha: memoryview, fp: BinaryIO):
+	for chunk in _Inflater(alpha).chunks():
+		fp.write(chunk)
+
+def _write_sound(data: memoryview, fp: BinaryIO):
+	r = ByteReader(data)
+	r.read_u16() # character id
+	flags = r.read_u8()
+	r.read_u32() # sample count
+	sound_format = flags >> 4
+
+	if sound_format == 2:
+		r.read_u16() # seek samples
+		fp.write(data[r.pos:])
+	elif sound_format in (0, 3):
+		# uncompressed PCM, always little-endian in practice
+		samples = data[r.pos:]
+		channels = 2 if flags & 1 else 1
+		sample_size = 2 if flags & 2 else 1
+		rate = _SOUND_RATES[flags >> 2 & 3]
+		fp.write(b"RIFF" + struct.pack("<I", 36 + len(samples)) + b"WAVE")
+		fp.write(b"fmt " + struct.pack(
+			"<IHHIIHH", 16, 1, channels, rate, rate * channels * sample_size, channels * sample_size, sample_size * 8
+		))
+		fp.write(b"data" + struct.pack("<I", len(samples)))
+		fp.write(samples)
+	else:
+		fp.write(data[r.pos:])
+
+def _sound_extension(data: memoryview) -> str:
+	sound_format = data[2] >> 4
+	return ".wav" if sound_format in (0, 3) else _SOUND_EXTENSIONS.get(sound_format, ".snd")
+
+def _safe_name(name: str) -> str:
+	return re.sub(r"[^\w.$-]", "_", name)
+
+def iter_assets(tags: list[tuple[int, object]], symbols: dict[int, str], kinds: set[str] | None = None) -> Iterator[tuple[Asset, memoryview]]:
+	# asset tags in file order with their tag payload, nothing is copied
+	for tag_code, data in tags:
+		kind = ASSET_KINDS.get(tag_code)
+		if kind is None or (kinds is not None and kind not in kinds):
+			continue
+		data = memoryview(data)
+		character = int.from_bytes(data[:2], "little")
+		name = symbols.get(character)
+
+		if kind == "binary":
+			extension = _binary_extension(data[6:])
+		elif kind == "image":
+			extension = _image_extension(_image_parts(data, tag_code)[0])
+		elif kind == "bitmap":
+			extension = ".png"
+		else:
+			extension = _sound_extension(data)
+
+		filename = f"{character}_{_safe_name(name)}{extension}" if name else f"{character}{extension}"
+		yield Asset(character, tag_code, kind, name, filename), data
+
+def _extract(directory: str, asset: Asset, data: memoryview):
+	path = os.path.join(directory, asset.filename)
+	with open(path, "wb") as fp:
+		if asset.kind == "binary":
+			fp.write(data[6:])
+		elif asset.kind == "bitmap":
+			_write_bitmap(data, asset.tag_code, fp)
+		elif asset.kind == "sound":
+			_write_sound(data, fp)
+		else:
+			image, alpha = _image_parts(data, asset.tag_code)
+			fp.write(image)
+			if alpha:
+				# raw 8-bit alpha plane, one byte per pixel
+				with open(path + ".alpha", "wb") as alpha_fp:
+					_write_alpha(alpha, alpha_fp)
+
+def extract_assets(tags: list[tuple[int, object]], symbols: dict[int, str], directory: str, workers: int | None = None, kinds: set[str] | None = None) -> list[Asset]:
+	# writes every asset to directory on a thread pool; zlib and file writes
+	# release the GIL, so threads overlap decoding and I/O
+	os.makedirs(directory, exist_ok=True)
+	jobs = list(iter_assets(tags, symbols, kinds))
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		# list() re-raises the first failure
+		list(pool.map(lambda job: _extract(directory, *job), jobs))
+	return [asset for asset, _ in jobs]
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import struct
+import zlib
+
+_WINDOW = 32768
+
+def _zlib_header(level: int) -> bytes:
+	# CMF/FLG pair advertising the compression level, as zlib itself writes it
+	if level == 0 or level == 1:
+		return b"\x78\x01"
+	if 2 <= level <= 5:
+		return b"\x78\x5e"
+	if level >= 7:
+		return b"\x78\xda"
+	return b"\x78\x9c"
+
+def _deflate_chunk(data: memoryview, start: int, end: int, level: int) -> bytes:
+	last = end == len(data)
+	if start:
+		# prime with the previous window so matches can cross the chunk boundary
+		comp = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=data[max(0, start - _WINDOW):start])
+	else:
+		comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+	return comp.compress(data[start:end]) + comp.flush(zlib.Z_FINISH if last else zlib.Z_FULL_FLUSH)
+
+def parallel_deflate(data: bytes | bytearray | memoryview, workers: int, level: int = -1, chunk_size: int = 1 << 20) -> list[bytes]:
+	# pigz-style: independent raw deflate chunks ending on a full flush are
+	# concatenated between a zlib header and the adler32 of the whole input.
+	# zlib releases the GIL while compressing, so threads are enough
+	data = memoryview(data)
+	bounds = [(start, min(start + chunk_size, len(data))) for start in range(0, len(data), chunk_size)] or [(0, 0)]
+
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		chunks = list(pool.map(lambda bound: _deflate_chunk(data, bound[0], bound[1], level), bounds))
+
+	return [_zlib_header(level), *chunks, struct.pack(">I", zlib.adler32(data))]
@@ -0,0 +1,247 @@
+from ._abc.consts import *
+from ._abc.instruction import OPERAND_POOLS
+from ._abc.reader import ABCReader
+from .reader import ByteReader
+from .writer import ByteWriter
+
+from typing import BinaryIO, Iterator, TextIO
+
+import json
+import math
+import struct
+
+# value tags of the binary record format
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _LIST, _DICT = range(8)
+
+_U32 = struct.Struct("<I")
+
+# JSON has no NaN or infinities: such doubles are written as {"$double": "NaN"}
+_DOUBLE_KEY = "$double"
+_NON_FINITE = {"NaN": math.nan, "Infinity": math.inf, "-Infinity": -math.inf}
+
+def _value(abc, kind: int | None, index: int):
+	if kind == CONSTANT_Int:
+		return abc.int_pool[index]
+	if kind == CONSTANT_UInt:
+		return abc.uint_pool[index]
+	if kind == CONSTANT_Double:
+		return abc.double_pool[index]
+	if kind == CONSTANT_Utf8:
+		return abc.string_pool[index]
+	if kind in NAMESPACE_KINDS:
+		return abc.resolve_namespace(index)
+	return {CONSTANT_True: True, CONSTANT_False: False}.get(kind)
+
+def _operand(abc, pool: str | None, arg):
+	if pool == "multiname":
+		return abc.resolve_multiname(arg)
+	if pool == "namespace":
+		return abc.resolve_namespace(arg)
+	if pool in ("int", "uint", "double", "string"):
+		return getattr(abc, f"{pool}_pool")[arg]
+	# method and class operands stay indices into method_info and the class pool
+	return arg
+
+def disassemble(abc, body: dict) -> Iterator[list]:
+	# [address, opcode name, operands...] with pool operands resolved and
+	# branch operands replaced by absolute target addresses
+	for instr in ABCReader.read_instructions(body["code"]).instructions:
+		if instr.targets:
+			operands = instr.targets
+		else:
+			pools = OPERAND_POOLS.get(instr.opcode)
+			operands = instr.args if pools is None else [_operand(abc, pool, arg) for pool, arg in zip(pools, instr.args)]
+		yield [instr.address, instr.opcode.name, *operands]
+
+def _traits(abc, owner: str, traits: list[dict], static: bool = False) -> Iterator[dict]:
+	for trait in traits:
+		kind_tag = trait["kind"] & 0x0F
+		entity = {
+			"type": "trait",
+			"abc": abc.name,
+			"owner": owner,
+			"static": static,
+			"kind": TRAIT_NAMES.get(kind_tag, kind_tag),
+			"name": abc.resolve_multiname(trait["name"]),
+			"attributes": trait["kind"] >> 4,
+		}
+		if kind_tag in (TRAIT_SLOT, TRAIT_CONST):
+			entity["slot_id"] = trait["slot_id"]
+			entity["type_name"] = abc.resolve_multiname(trait["type_name"])
+			entity["value"] = _value(abc, trait.get("vkind"), trait["vindex"]) if trait["vindex"] else None
+		elif kind_tag == TRAIT_CLASS:
+			entity["class"] = trait["index"]
+		else:
+			entity["method"] = trait["index"]
+		yield entity
+
+def iter_entities(abc, disassemble_bodies: bool = False) -> Iterator[dict]:
+	# classes, traits, scripts and methods one at a time, with resolved names;
+	# nothing is accumulated
+	for index, instance in enumerate(abc.instance_pool):
+		name = abc.resolve_multiname(instance["name"])
+		klass = abc.class_pool[index]
+		yield {
+			"type": "class",
+			"abc": abc.name,
+			"index": index,
+			"name": name,
+			"super": abc.resolve_multiname(instance["super"]),
+			"interfaces": [abc.resolve_multiname(interface) for interface in instance["interfaces"]],
+			"flags": instance["flags"],
+			"protected_ns": None if instance["protected_ns"] is None else abc.resolve_namespace(instance["protected_ns"]),
+			"iinit": instance["iinit"],
+			"cinit": klass["cinit"],
+		}
+		yield from _traits(abc, name, instance["traits"])
+		yield from _traits(abc, name, klass["traits"], static=True)
+
+	for index, script in enumerate(abc.script_pool):
+		yield {"type": "script", "abc": abc.name, "index": index, "init": script["init"]}
+		yield from _traits(abc, f"script{index}", script["traits"])
+
+	bodies = {body["method_index"]: body for body in abc.method_bodies}
+	for index, info in enumerate(abc.method_info):
+		entity = {
+			"type": "method",
+			"abc": abc.name,
+			"index": index,
+			"name": info["name"],
+			"params": [abc.resolve_multiname(param) for param in info["params"]],
+			"return_type": abc.resolve_multiname(info["return_type"]),
+			"optional": [_value(abc, kind, value) for value, kind in info.get("optional_params", ())],
+			"flags": info["flags"],
+		}
+		body = bodies.get(index)
+		if body is not None:
+			entity["max_stack"] = body["max_stack"]
+			entity["local_count"] = body["local_count"]
+			entity["init_scope"] = body["init_scope"]
+			entity["max_scope"] = body["max_scope"]
+			entity["code_length"] = len(body["code"])
+			entity["exceptions"] = [
+				[exception["from"], exception["to"], exception["target"],
+				abc.resolve_multiname(exception["exc_type"]), abc.resolve_multiname(exception["var_name"])]
+				for exception in body["exceptions"]
+			]
+			if disassemble_bodies:
+				entity["instructions"] = list(disassemble(abc, body))
+		yield entity
+
+def _json_safe(value):
+	if isinstance(value, float):
+		if math.isfinite(value):
+			return value
+		return {_DOUBLE_KEY: "NaN" if value != value else "Infinity" if value > 0 else "-Infinity"}
+	if isinstance(value, (list, tuple)):
+		return [_json_safe(item) for item in value]
+	if isinstance(value, dict):
+		return {key: _json_safe(item) for key, item in value.items()}
+	return value
+
+def _json_double(entry: dict):
+	if len(entry) == 1 and _DOUBLE_KEY in entry:
+		return _NON_FINITE[entry[_DOUBLE_KEY]]
+	return entry
+
+def export_jsonl(abcs, fp: TextIO, disassemble_bodies: bool = False) -> int:
+	count = 0
+	for abc in abcs:
+		for entity in iter_entities(abc, disassemble_bodies):
+			try:
+				line = json.dumps(entity, separators=(",", ":"), allow_nan=False)
+			except ValueError:
+				# rare: only entities holding non-finite doubles are rewritten
+				line = json.dumps(_json_safe(entity), separators=(",", ":"), allow_nan=False)
+			fp.write(line)
+			fp.write("\n")
+			count += 1
+	return count
+
+def read_jsonl(fp: TextIO) -> Iterator[dict]:
+	# the records of export_jsonl(), non-finite doubles restored
+	for line in fp:
+		if line.strip():
+			yield json.loads(line, object_hook=_json_double)
+
+def _encode(w: ByteWriter, value):
+	if value is None:
+		w.write_u8(_NONE)
+	elif value is True or value is False:
+		w.write_u8(_TRUE if value else _FALSE)
+	elif isinstance(value, int):
+		# zigzag keeps small negative numbers short
+		w.write_u8(_INT).write_leb128(value << 1 if value >= 0 else (~value << 1) | 1)
+	elif isinstance(value, float):
+		w.write_u8(_FLOAT).write_d(value)
+	elif isinstance(value, str):
+		w.write_u8(_STR).write_string(value)
+	elif isinstance(value, (list, tuple)):
+		w.write_u8(_LIST).write_leb128(len(value))
+		for item in value:
+			_encode(w, item)
+	elif isinstance(value, dict):
+		w.write_u8(_DICT).write_leb128(len(value))
+		for key, item in value.items():
+			w.write_string(key)
+			_encode(w, item)
+	else:
+		raise ValueError(f"Unsupported value in export: {value!r}")
+
+def export_binary(abcs, fp: BinaryIO, disassemble_bodies: bool = False) -> int:
+	# each record is a u32 length followed by one tagged value
+	w = ByteWriter()
+	count = 0
+	for abc in abcs:
+		for entity in iter_entities(abc, disassemble_bodies):
+			w.clear()
+			_encode(w, entity)
+			fp.write(_U32.pack(len(w)))
+			fp.write(w.buf)
+			count += 1
+	return count
+
+def _read_varint(r: ByteReader) -> int:
+	# unbounded, unlike ByteReader.read_leb128 which stops at 35 bits
+	result = shift = 0
+	while True:
+		byte = r.read_u8()
+		result |= (byte & 0x7F) << shift
+		shift += 7
+		if not byte & 0x80:
+			return result
+
+def _read_str(r: ByteReader) -> str:
+	return r.read_bytes(_read_varint(r)).tobytes().decode()
+
+def _decode(r: ByteReader):
+	tag = r.read_u8()
+	if tag == _NONE:
+		return None
+	if tag == _FALSE or tag == _TRUE:
+		return tag == _TRUE
+	if tag == _INT:
+		value = _read_varint(r)
+		return value >> 1 if not value & 1 else ~(value >> 1)
+	if tag == _FLOAT:
+		return r.read_d()
+	if tag == _STR:
+		return _read_str(r)
+	if tag == _LIST:
+		return [_decode(r) for _ in range(_read_varint(r))]
+	if tag == _DICT:
+		return {_read_str(r): _decode(r) for _ in range(_read_varint(r))}
+	raise ValueError(f"Unknown value tag in export: {tag}")
+
+def read_binary(fp: BinaryIO) -> Iterator[dict]:
+	while True:
+		header = fp.read(4)
+		if not header:
+			return
+		if len(header) < 4:
+			raise ValueError("Truncated record header")
+		(length,) = _U32.unpack(header)
+		data = fp.read(length)
+		if len(data) < length:
+			raise ValueError("Truncated record")
+		yield _decode(ByteReader(data))
@@ -0,0 +1,113 @@
+from enum import Enum
+from types import FunctionType, MethodType, ModuleType
+
+import sys
+import tracemalloc
+
+# singletons shared by every parsed file, never attributed to one
+_SHARED = (type, ModuleType, FunctionType, MethodType, Enum, bool, type(None))
+
+def deep_sizeof(obj, seen: set[int] | None = None) -> int:
+	# Retained size estimate of obj and everything it references. Objects
+	# already in seen are not counted again, so threading one set through
+	# several calls attributes shared objects to the first caller only
+	seen = set() if seen is None else seen
+	size = 0
+	stack = [obj]
+	while stack:
+		obj = stack.pop()
+		if id(obj) in seen or isinstance(obj, _SHARED):
+			continue
+		seen.add(id(obj))
+		size += sys.getsizeof(obj)
+
+		if isinstance(obj, dict):
+			stack.extend(obj.keys())
+			stack.extend(obj.values())
+		elif isinstance(obj, (list, tuple, set, frozenset)):
+			stack.extend(obj)
+		elif isinstance(obj, memoryview):
+			# a view retains its whole underlying buffer
+			stack.append(obj.obj)
+		elif not isinstance(obj, (str, bytes, bytearray, int, float)):
+			if hasattr(obj, "__dict__"):
+				stack.append(obj.__dict__)
+			for slot in getattr(type(obj), "__slots__", ()):
+				if hasattr(obj, slot):
+					stack.append(getattr(obj, slot))
+
+	return size
+
+def abc_memory_usage(abc, seen: set[int] | None = None) -> dict[str, int]:
+	# pools first so entities referencing multiname dicts or strings are only
+	# charged for what they own
+	seen = set() if seen is None else seen
+
+	traits = [entity["traits"] for entity in (*abc.instance_pool, *abc.class_pool, *abc.script_pool, *abc.method_bodies)]
+	parts = (
+		("strings", abc.string_pool),
+		("ints", abc.int_pool),
+		("uints", abc.uint_pool),
+		("doubles", abc.double_pool),
+		("namespaces", abc.namespace_pool),
+		("ns_sets", abc.ns_set_pool),
+		("multinames", abc.multiname_pool),
+		("method_info", abc.method_info),
+		("metadata", abc.metadata),
+		("traits", traits),
+		("instances", abc.instance_pool),
+		("classes", abc.class_pool),
+		("scripts", abc.script_pool),
+		("code", [body["code"] for body in abc.method_bodies]),
+		("method_bodies", abc.method_bodies),
+		("raw", abc.reader),
+		("writer", abc.writer),
+		("caches", (
+			abc._cfg_cache, abc._code_cache, abc._body_raw, abc._sections, abc._read_state,
+			abc._multiname_index, abc._multiname_id_index, abc._str_index
+		)),
+	)
+
+	usage = {name: deep_sizeof(part, seen) for name, part in parts}
+	usage["total"] = sum(usage.values())
+	return usage
+
+def swf_memory_usage(swf, seen: set[int] | None = None) -> dict:
+	seen = set() if seen is None else seen
+
+	usage = {
+		"raw": deep_sizeof(swf.raw, seen),
+		"decompressed": deep_sizeof(swf.reader, seen),
+		"writer": deep_sizeof(swf.writer, seen),
+	}
+	# ABCs before the tag list holding them
+	usage["abcs"] = {name: abc_memory_usage(abc, seen) for name, abc in swf.abcs.items()}
+	usage["binary_data"] = deep_sizeof(swf.binary_data, seen)
+	usage["symbols"] = deep_sizeof(swf.symbols, seen)
+	usage["tags"] = deep_sizeof(swf.tags, seen)
+
+	usage["total"] = (
+		sum(value for name, value in usage.items() if name != "abcs")
+		+ sum(abc_usage["total"] for abc_usage in usage["abcs"].values())
+	)
+	return usage
+
+def parse_peak(path: str, **kwargs) -> tuple:
+	# parses path under tracemalloc, returns (SWFParser, peak bytes allocated by the parse)
+	from .swf import SWFParser
+
+	tracing = tracemalloc.is_tracing()
+	if not tracing:
+		tracemalloc.start()
+	tracemalloc.reset_peak()
+	baseline = tracemalloc.get_traced_memory()[0]
+
+	try:
+		swf = SWFParser(path, **kwargs)
+		swf.parse()
+		peak = tracemalloc.get_traced_memory()[1] - baseline
+	finally:
+		if not tracing:
+			tracemalloc.stop()
+
+	return swf, peak
@@ -0,0 +1,229 @@
+from ._abc import ABC
+from ._abc.instruction import OPERAND_POOLS, Opcode
+from ._abc.pools import POOLS
+from .reader import decode_leb128
+from .swf import SWFParser
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+import array
+import os
+
+# code sizes and pool sizes are bucketed by bit length: bucket k holds [2^(k-1), 2^k)
+_BUCKETS = 33
+
+# operand pools whose entries are counted by value, so counts merge across files
+COUNTED_POOLS = ("string", "multiname", "int", "uint", "double")
+
+# per opcode byte: operand steps as (fixed size, counted pool), size 0 for
+# variable length u30, -1 for the lookupswitch case table. None for unknown bytes
+_SIZES = {"u8": 1, "u16": 2, "s24": 3, "u32": 4, "u30": 0, "s32": 0, "s24arr": -1}
+_STEPS: list[tuple[tuple[int, str | None], ...] | None] = [None] * 256
+for _opcode in Opcode:
+	_pools = OPERAND_POOLS.get(_opcode, ())
+	_STEPS[_opcode.value[0]] = tuple(
+		(_SIZES[t], _pools[i] if i < len(_pools) and _pools[i] in COUNTED_POOLS else None)
+		for i, t in enumerate(_opcode.value[1:])
+	)
+del _opcode, _pools
+
+def _zeros(n: int) -> array.array:
+	return array.array("Q", bytes(8 * n))
+
+def _scan(code: bytes | memoryview, opcodes: array.array, refs: dict[str, array.array]) -> int | None:
+	# counts opcodes and pool references of one body straight from its bytes,
+	# returning the instruction count, or None for undecodable code. Counts
+	# are gathered locally and only added once the whole body decoded
+	pos = 0
+	end = len(code)
+	ops = bytearray()
+	hits = []
+	steps_table = _STEPS
+	try:
+		while pos < end:
+			op = code[pos]
+			steps = steps_table[op]
+			if steps is None:
+				return None
+			ops.append(op)
+			pos += 1
+			for size, pool in steps:
+				if size > 0:
+					pos += size
+				elif size == 0:
+					if pool is None:
+						while code[pos] & 0x80:
+							pos += 1
+						pos += 1
+					else:
+						value, pos = decode_leb128(code, pos)
+						hits.append((pool, value))
+				else:
+					case_count, pos = decode_leb128(code, pos)
+					pos += (case_count + 1) * 3
+	except IndexError:
+		return None
+	if pos != end:
+		return None
+
+	for op in ops:
+		opcodes[op] += 1
+	for pool, value in hits:
+		counts = refs[pool]
+		if value < len(counts):
+			counts[value] += 1
+	return len(ops)
+
+def _bucket_label(bucket: int) -> str:
+	return "0" if bucket == 0 else f"{1 << (bucket - 1)}-{(1 << bucket) - 1}"
+
+def _quantile(histogram: array.array, q: float) -> int:
+	# upper bound of the bucket holding the q-quantile
+	total = sum(histogram)
+	if not total:
+		return 0
+	seen = 0
+	for bucket, count in enumerate(histogram):
+		seen += count
+		if seen >= q * total:
+			return (1 << bucket) - 1
+	return (1 << (len(histogram) - 1)) - 1
+
+class OpcodeStats:
+	# Mergeable opcode, code size, pool size and operand counters. Counters
+	# are flat arrays indexed by opcode byte or size bucket; operands are
+	# counted by pool index per ABC and folded into value keyed Counters, so
+	# partial results from different files and processes simply add up
+
+	def __init__(self):
+		self.files: int = 0
+		self.abcs: int = 0
+		self.bodies: int = 0
+		self.invalid_bodies: int = 0
+		self.instructions: int = 0
+		self.code_bytes: int = 0
+
+		self.opcodes: array.array = _zeros(256)
+		self.body_sizes: array.array = _zeros(_BUCKETS)
+		self.pool_sizes: dict[str, array.array] = {pool: _zeros(_BUCKETS) for pool in POOLS}
+		self.pool_totals: dict[str, int] = {pool: 0 for pool in POOLS}
+		self.operands: dict[str, Counter] = {pool: Counter() for pool in COUNTED_POOLS}
+
+	def add_abc(self, abc: ABC) -> "OpcodeStats":
+		self.abcs += 1
+		for pool, attr in POOLS.items():
+			size = len(getattr(abc, attr))
+			self.pool_sizes[pool][size.bit_length()] += 1
+			self.pool_totals[pool] += size
+
+		refs = {pool: _zeros(len(getattr(abc, POOLS[pool]))) for pool in COUNTED_POOLS}
+		opcodes = self.opcodes
+		for body in abc.method_bodies:
+			code = body["code"]
+			count = _scan(code, opcodes, refs)
+			self.bodies += 1
+			self.code_bytes += len(code)
+			self.body_sizes[len(code).bit_length()] += 1
+			if count is None:
+				self.invalid_bodies += 1
+			else:
+				self.instructions += count
+
+		for pool, counts in refs.items():
+			operands = self.operands[pool]
+			for index, count in enumerate(counts):
+				if count:
+					operands[self._operand_key(abc, pool, index)] += count
+		return self
+
+	@staticmethod
+	def _operand_key(abc: ABC, pool: str, index: int) -> str:
+		if pool == "multiname":
+			return abc.resolve_multiname(index)
+		if pool == "string":
+			return abc.string_pool[index]
+		return repr(getattr(abc, POOLS[pool])[index])
+
+	def add_swf(self, swf: SWFParser) -> "OpcodeStats":
+		self.files += 1
+		for _, data in swf.tags:
+			if isinstance(data, ABC):
+				self.add_abc(data)
+		return self
+
+	def merge(self, other: "OpcodeStats") -> "OpcodeStats":
+		for attr in ("files", "abcs", "bodies", "invalid_bodies", "instructions", "code_bytes"):
+			setattr(self, attr, getattr(self, attr) + getattr(other, attr))
+		for i, count in enumerate(other.opcodes):
+			self.opcodes[i] += count
+		for i, count in enumerate(other.body_sizes):
+			self.body_sizes[i] += count
+		for pool, histogram in other.pool_sizes.items():
+			for i, count in enumerate(histogram):
+				self.pool_sizes[pool][i] += count
+			self.pool_totals[pool] += other.pool_totals[pool]
+		for pool, counter in other.operands.items():
+			self.operands[pool].update(counter)
+		return self
+
+	def summary(self, top: int = 20) -> dict:
+		opcodes = {
+			Opcode.from_code(code).name: count
+			for code, count in sorted(enumerate(self.opcodes), key=lambda item: -item[1]) if count
+		}
+		return {
+			"files": self.files,
+			"abcs": self.abcs,
+			"bodies": self.bodies,
+			"invalid_bodies": self.invalid_bodies,
+			"instructions": self.instructions,
+			"code_bytes": self.code_bytes,
+			"opcodes": opcodes,
+			"body_sizes": {
+				"histogram": {_bucket_label(b): count for b, count in enumerate(self.body_sizes) if count},
+				"mean": self.code_bytes / self.bodies if self.bodies else 0,
+				"median": _quantile(self.body_sizes, 0.5),
+				"p90": _quantile(self.body_sizes, 0.9),
+				"p99": _quantile(self.body_sizes, 0.99),
+			},
+			"pool_sizes": {
+				pool: {
+					"total": self.pool_totals[pool],
+					"histogram": {_bucket_label(b): count for b, count in enumerate(histogram) if count},
+				}
+				for pool, histogram in self.pool_sizes.items()
+			},
+			"operands": {pool: dict(counter.most_common(top)) for pool, counter in self.operands.items()},
+		}
+
+def file_stats(path: str | os.PathLike) -> OpcodeStats:
+	swf = SWFParser(path)
+	swf.parse()
+	return OpcodeStats().add_swf(swf)
+
+def _file_stats(path: str) -> tuple[str, OpcodeStats | None, str | None]:
+	try:
+		return path, file_stats(path), None
+	except Exception as e:
+		# one broken file must not abort the whole archive
+		return path, None, f"{type(e).__name__}: {e}"
+
+def collect(paths: Iterable[str | os.PathLike], workers: int | None = None) -> tuple[dict[str, OpcodeStats], OpcodeStats, dict[str, str]]:
+	# per file statistics, their archive-wide merge and the files that failed
+	# to parse. Files are processed on a process pool, partial results are
+	# merged in the parent as they arrive
+	per_file: dict[str, OpcodeStats] = {}
+	errors: dict[str, str] = {}
+	total = OpcodeStats()
+
+	paths = [os.fspath(path) for path in paths]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		for path, stats, error in pool.map(_file_stats, paths, chunksize=max(1, len(paths) // 64)):
+			if stats is None:
+				errors[path] = error
+				continue
+			per_file[path] = stats
+			total.merge(stats)
+	return per_file, total, errors
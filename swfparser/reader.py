@@ -77,4 +77,50 @@ class ByteReader:
 		while self.buf[self.pos] != 0:
 			self.pos += 1
 		self.pos += 1
-		return self.buf[start:self.pos].tobytes().decode().rstrip("\x00")
\ No newline at end of file
+		return self.buf[start:self.pos].tobytes().decode().rstrip("\x00")
+
+# Stateless, offset-based decoding: every function takes the buffer and an
+# offset and returns (value, next offset). Nothing is mutated, so one buffer
+# can be decoded from several threads at once
+
+def decode_u8(buf: bytes | memoryview, offset: int) -> tuple[int, int]:
+	return buf[offset], offset + 1
+
+def decode_u16(buf: bytes | memoryview, offset: int) -> tuple[int, int]:
+	return _U16.unpack_from(buf, offset)[0], offset + 2
+
+def decode_s24(buf: bytes | memoryview, offset: int) -> tuple[int, int]:
+	return int.from_bytes(buf[offset:offset + 3], "little", signed=True), offset + 3
+
+def decode_u32(buf: bytes | memoryview, offset: int) -> tuple[int, int]:
+	return _U32.unpack_from(buf, offset)[0], offset + 4
+
+def decode_d(buf: bytes | memoryview, offset: int) -> tuple[float, int]:
+	return _DOUBLE.unpack_from(buf, offset)[0], offset + 8
+
+def decode_leb128(buf: bytes | memoryview, offset: int) -> tuple[int, int]:
+	result = 0
+	shift = 0
+	while True:
+		byte = buf[offset]
+		offset += 1
+		result |= (byte & 0x7F) << shift
+		shift += 7
+		if not (byte & 0x80) or shift == 35:
+			return result, offset
+
+def decode_sleb128(buf: bytes | memoryview, offset: int) -> tuple[int, int]: # S32
+	result, offset = decode_leb128(buf, offset)
+	if result & (1 << 31):
+		result -= 1 << 32
+	return result, offset
+
+def decode_string(buf: bytes | memoryview, offset: int) -> tuple[str, int]:
+	length, offset = decode_leb128(buf, offset)
+	return bytes(buf[offset:offset + length]).decode(), offset + length
+
+def decode_sstring(buf: bytes | memoryview, offset: int) -> tuple[str, int]:
+	end = offset
+	while buf[end] != 0:
+		end += 1
+	return bytes(buf[offset:end]).decode(), end + 1
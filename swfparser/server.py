@@ -0,0 +1,311 @@
+from ._abc import ABC
+from .export import disassemble, iter_entities
+from .swf import SWFParser
+
+from collections import OrderedDict
+from typing import Callable
+
+import asyncio
+import hashlib
+import json
+import os
+import stat
+
+# longest request line accepted from a client
+_LIMIT = 1 << 24
+
+class _Entry:
+	# a parsed SWF held by the cache, with lazily built query indexes
+	def __init__(self, digest: str, swf: SWFParser, size: int):
+		self.digest = digest
+		self.swf = swf
+		self.size = size
+		self.abcs: list[ABC] = [data for _, data in swf.tags if isinstance(data, ABC)]
+		self._bodies: dict[int, dict[int, dict]] = {}
+		self._names: list[tuple[str, dict]] | None = None
+
+	def abc(self, name: str | None) -> ABC:
+		if name is None:
+			if not self.abcs:
+				raise ValueError("File has no ABC")
+			return self.abcs[0]
+		for abc in self.abcs:
+			if abc.name == name:
+				return abc
+		raise ValueError(f"Unknown ABC: {name}")
+
+	def body(self, abc: ABC, method: int) -> dict:
+		bodies = self._bodies.get(id(abc))
+		if bodies is None:
+			bodies = self._bodies.setdefault(id(abc), {body["method_index"]: body for body in abc.method_bodies})
+		body = bodies.get(method)
+		if body is None:
+			raise ValueError(f"Method {method} has no body")
+		return body
+
+	def names(self) -> list[tuple[str, dict]]:
+		# (lowercase name, entity) of every class and trait, built on first search
+		if self._names is None:
+			names = []
+			for abc in self.abcs:
+				for entity in iter_entities(abc):
+					if entity["type"] in ("class", "trait"):
+						names.append((entity["name"].lower(), entity))
+			self._names = names
+		return self._names
+
+class ParserCache:
+	# Parsed SWFs keyed by the blake2b of their content, evicted least
+	# recently used first once their estimated memory exceeds max_bytes.
+	# File digests are remembered by (path, mtime, size) so unchanged files
+	# are not rehashed, and concurrent loads of one file share a single parse
+
+	def __init__(self, max_bytes: int):
+		self.max_bytes = max_bytes
+		self.bytes = 0
+		self.hits = 0
+		self.misses = 0
+
+		self._entries: OrderedDict[str, _Entry] = OrderedDict()
+		self._digests: dict[str, tuple[int, int, str]] = {}
+		self._loading: dict[str, asyncio.Future] = {}
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	@staticmethod
+	def _read(path: str) -> tuple[str, bytes]:
+		with open(path, "rb") as f:
+			data = f.read()
+		return hashlib.blake2b(data, digest_size=16).hexdigest(), data
+
+	@staticmethod
+	def _parse(digest: str, data: bytes) -> _Entry:
+		swf = SWFParser(data)
+		swf.parse()
+		return _Entry(digest, swf, swf.memory_usage()["total"])
+
+	async def get(self, path: str) -> _Entry:
+		loop = asyncio.get_running_loop()
+		path = os.path.abspath(path)
+		# may block on slow or network file systems
+		info = await loop.run_in_executor(None, os.stat, path)
+
+		known = self._digests.get(path)
+		data = None
+		if known is not None and known[:2] == (info.st_mtime_ns, info.st_size):
+			digest = known[2]
+		else:
+			digest, data = await loop.run_in_executor(None, self._read, path)
+			self._digests[path] = (info.st_mtime_ns, info.st_size, digest)
+
+		entry = self._entries.get(digest)
+		if entry is not None:
+			self.hits += 1
+			self._entries.move_to_end(digest)
+			return entry
+
+		pending = self._loading.get(digest)
+		if pending is not None:
+			self.hits += 1
+			return await asyncio.shield(pending)
+
+		self.misses += 1
+		future = self._loading[digest] = loop.create_future()
+		try:
+			if data is None:
+				_, data = await loop.run_in_executor(None, self._read, path)
+			entry = await loop.run_in_executor(None, self._parse, digest, data)
+		except BaseException as e:
+			future.set_exception(e)
+			# retrieved here so a load nobody else waits on is not reported
+			future.exception()
+			raise
+		finally:
+			del self._loading[digest]
+
+		future.set_result(entry)
+		self._entries[digest] = entry
+		self.bytes += entry.size
+		self._evict(keep=digest)
+		return entry
+
+	def _evict(self, keep: str):
+		# the entry just loaded stays even when it alone exceeds the budget
+		while self.bytes > self.max_bytes and len(self._entries) > 1:
+			digest, entry = next(iter(self._entries.items()))
+			if digest == keep:
+				break
+			del self._entries[digest]
+			self.bytes -= entry.size
+
+	def stats(self) -> dict:
+		return {
+			"entries": len(self._entries),
+			"bytes": self.bytes,
+			"max_bytes": self.max_bytes,
+			"hits": self.hits,
+			"misses": self.misses,
+		}
+
+# --- queries: (entry, request) -> JSON-serializable result --------------------
+
+def _classes(entry: _Entry, request: dict) -> list[dict]:
+	abcs = entry.abcs if request.get("abc") is None else [entry.abc(request["abc"])]
+	return [entity for abc in abcs for entity in iter_entities(abc) if entity["type"] == "class"]
+
+def _index(request: dict, key: str, default: int | None = None) -> int:
+	# JSON integers only: true and false are not indices
+	value = request.get(key, default)
+	if type(value) is not int or value < 0:
+		raise ValueError(f"Bad {key}: {value!r}")
+	return value
+
+def _resolve(entry: _Entry, request: dict) -> str:
+	abc = entry.abc(request.get("abc"))
+	for key, resolve in (
+		("multiname", abc.resolve_multiname),
+		("namespace", abc.resolve_namespace),
+		("string", abc.string_pool.__getitem__),
+	):
+		if key in request:
+			index = _index(request, key)
+			if index >= len(getattr(abc, f"{key}_pool")):
+				raise ValueError(f"Bad {key}: {index!r}")
+			return resolve(index)
+	raise ValueError("Expected one of multiname, namespace or string")
+
+def _disassemble(entry: _Entry, request: dict) -> list[list]:
+	abc = entry.abc(request.get("abc"))
+	return list(disassemble(abc, entry.body(abc, _index(request, "method"))))
+
+def _search(entry: _Entry, request: dict) -> list[dict]:
+	# case-insensitive substring search over class and trait names and,
+	# with "strings": true, over the string pools
+	query = str(request["query"]).lower()
+	limit = _index(request, "limit", 100)
+	results = []
+	if not limit:
+		return results
+	for name, entity in entry.names():
+		if query in name:
+			results.append(entity)
+			if len(results) >= limit:
+				return results
+	if request.get("strings"):
+		for abc in entry.abcs:
+			for index, s in enumerate(abc.string_pool):
+				if query in s.lower():
+					results.append({"type": "string", "abc": abc.name, "index": index, "value": s})
+					if len(results) >= limit:
+						return results
+	return results
+
+QUERIES: dict[str, Callable[[_Entry, dict], object]] = {
+	"classes": _classes,
+	"resolve": _resolve,
+	"disassemble": _disassemble,
+	"search": _search,
+}
+
+class QueryServer:
+	# Line-delimited JSON over a Unix socket. Each request is an object with
+	# "op" and usually "file", answered by {"id", "ok", "result" | "error"}.
+	# Ops: classes, resolve, disassemble, search, stats and ping. Parsing and
+	# queries run on the default thread pool so the loop keeps serving
+
+	def __init__(self, path: str, max_bytes: int = 1 << 30):
+		self.path = path
+		self.cache = ParserCache(max_bytes)
+		self._server: asyncio.AbstractServer | None = None
+		# (device, inode) of the socket file this server created
+		self._inode: tuple[int, int] | None = None
+
+	async def start(self):
+		await self._remove_stale()
+		self._server = await asyncio.start_unix_server(self._client, self.path, limit=_LIMIT)
+		info = os.stat(self.path)
+		self._inode = (info.st_dev, info.st_ino)
+
+	async def _remove_stale(self):
+		# a socket left behind by a dead daemon is replaced; anything else at
+		# the path, or a socket another daemon still accepts on, is an error
+		try:
+			info = os.lstat(self.path)
+		except FileNotFoundError:
+			return
+		if not stat.S_ISSOCK(info.st_mode):
+			raise ValueError(f"{self.path} exists and is not a socket")
+		try:
+			_, writer = await asyncio.open_unix_connection(self.path)
+		except (ConnectionRefusedError, FileNotFoundError):
+			os.unlink(self.path)
+			return
+		writer.close()
+		await writer.wait_closed()
+		raise ValueError(f"Another server is listening on {self.path}")
+
+	async def serve_forever(self):
+		if self._server is None:
+			await self.start()
+		try:
+			await self._server.serve_forever()
+		finally:
+			self.close()
+
+	def close(self):
+		if self._server is not None:
+			self._server.close()
+			self._server = None
+			# the path may have been taken over meanwhile: only our own socket is removed
+			try:
+				info = os.lstat(self.path)
+				if (info.st_dev, info.st_ino) == self._inode:
+					os.unlink(self.path)
+			except FileNotFoundError:
+				pass
+			self._inode = None
+
+	async def handle(self, request: dict) -> object:
+		op = request.get("op")
+		if op == "ping":
+			return "pong"
+		if op == "stats":
+			return self.cache.stats()
+
+		query = QUERIES.get(op)
+		if query is None:
+			raise ValueError(f"Unknown op: {op!r}")
+		if "file" not in request:
+			raise ValueError("Missing file")
+		entry = await self.cache.get(request["file"])
+		return await asyncio.get_running_loop().run_in_executor(None, query, entry, request)
+
+	async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		try:
+			while line := await reader.readline():
+				request_id = None
+				try:
+					request = json.loads(line)
+					if not isinstance(request, dict):
+						raise ValueError("Request must be a JSON object")
+					request_id = request.get("id")
+					response = {"id": request_id, "ok": True, "result": await self.handle(request)}
+				except Exception as e:
+					# a bad request or file must not take the daemon down
+					response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+				writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+				await writer.drain()
+		except (ConnectionError, ValueError):
+			# disconnected, or a request line over the limit
+			pass
+		finally:
+			writer.close()
+
+def serve(path: str, max_bytes: int = 1 << 30):
+	# blocks until interrupted
+	server = QueryServer(path, max_bytes)
+	try:
+		asyncio.run(server.serve_forever())
+	except KeyboardInterrupt:
+		pass
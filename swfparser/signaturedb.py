@@ -0,0 +1,157 @@
+from ._abc.signature import Signature, signatures
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import array
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+	id INTEGER PRIMARY KEY,
+	name TEXT UNIQUE NOT NULL,
+	created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entities (
+	id INTEGER PRIMARY KEY,
+	build INTEGER NOT NULL REFERENCES builds(id) ON DELETE CASCADE,
+	kind TEXT NOT NULL,
+	name TEXT NOT NULL,
+	exact BLOB NOT NULL,
+	minhash BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entities_exact ON entities (kind, exact);
+CREATE TABLE IF NOT EXISTS bands (
+	entity INTEGER NOT NULL REFERENCES entities(id) ON DELETE CASCADE,
+	band INTEGER NOT NULL,
+	hash INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_hash ON bands (band, hash);
+CREATE INDEX IF NOT EXISTS bands_entity ON bands (entity);
+"""
+
+@dataclass
+class Match:
+	kind: str
+	name: str # name in the queried build
+	matched_name: str # name in the stored build
+	build: str
+	score: float # 1.0 for exact signature matches
+
+def _pack(bins: list[int]) -> bytes:
+	return array.array("q", bins).tobytes()
+
+def _unpack(blob: bytes) -> list[int]:
+	return array.array("q", blob).tolist()
+
+class SignatureDB:
+	# On-disk history of class and method signatures (see _abc.signature) of
+	# previous builds. A new build is matched in bulk: exact signatures through
+	# an index join, the rest through MinHash LSH bands, so no pairwise
+	# comparison against the whole history is ever needed
+
+	def __init__(self, path: str):
+		self.conn = sqlite3.connect(path)
+		self.conn.execute("PRAGMA foreign_keys = ON")
+		self.conn.executescript(_SCHEMA)
+
+	def __enter__(self) -> "SignatureDB":
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		self.conn.close()
+
+	def builds(self) -> list[str]:
+		return [name for name, in self.conn.execute("SELECT name FROM builds ORDER BY id")]
+
+	def add_build(self, name: str, abcs: Iterable) -> int:
+		with self.conn:
+			try:
+				build = self.conn.execute(
+					"INSERT INTO builds (name, created) VALUES (?, ?)", (name, time.time())
+				).lastrowid
+			except sqlite3.IntegrityError:
+				raise ValueError(f"Build already stored: {name}") from None
+
+			count = 0
+			for abc in abcs:
+				for signature in signatures(abc):
+					entity = self.conn.execute(
+						"INSERT INTO entities (build, kind, name, exact, minhash) VALUES (?, ?, ?, ?, ?)",
+						(build, signature.kind, signature.name, signature.exact, _pack(signature.minhash))
+					).lastrowid
+					self.conn.executemany(
+						"INSERT INTO bands (entity, band, hash) VALUES (?, ?, ?)",
+						[(entity, band, value) for band, value in signature.bands()]
+					)
+					count += 1
+		return count
+
+	def remove_build(self, name: str):
+		with self.conn:
+			if not self.conn.execute("DELETE FROM builds WHERE name = ?", (name,)).rowcount:
+				raise ValueError(f"Unknown build: {name}")
+
+	def match(self, abcs: Iterable, threshold: float = 0.75) -> dict[str, Match]:
+		# best historical name of every class and method of abcs, keyed by
+		# their current name. Ties go to the most recent build; signatures
+		# mapping to several names in that build are ambiguous and skipped
+		query = [signature for abc in abcs for signature in signatures(abc)]
+		conn = self.conn
+
+		conn.execute("CREATE TEMP TABLE IF NOT EXISTS query (qid INTEGER PRIMARY KEY, kind TEXT, exact BLOB)")
+		conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_bands (qid INTEGER, band INTEGER, hash INTEGER)")
+		conn.execute("DELETE FROM query")
+		conn.execute("DELETE FROM query_bands")
+		conn.executemany(
+			"INSERT INTO query (qid, kind, exact) VALUES (?, ?, ?)",
+			[(qid, signature.kind, signature.exact) for qid, signature in enumerate(query)]
+		)
+
+		matches = {}
+		candidates: dict[int, dict[int, list[str]]] = {}
+		for qid, matched_name, build_id in conn.execute(
+			"SELECT q.qid, e.name, e.build FROM query q "
+			"JOIN entities e ON e.kind = q.kind AND e.exact = q.exact"
+		):
+			candidates.setdefault(qid, {}).setdefault(build_id, []).append(matched_name)
+
+		build_names = dict(conn.execute("SELECT id, name FROM builds"))
+		for qid, by_build in candidates.items():
+			build_id = max(by_build)
+			names = set(by_build[build_id])
+			if len(names) == 1:
+				signature = query[qid]
+				matches[signature.name] = Match(signature.kind, signature.name, names.pop(), build_names[build_id], 1.0)
+
+		exact = set(candidates)
+		conn.executemany(
+			"INSERT INTO query_bands (qid, band, hash) VALUES (?, ?, ?)",
+			[
+				(qid, band, value)
+				for qid, signature in enumerate(query) if qid not in exact
+				for band, value in signature.bands()
+			]
+		)
+
+		best: dict[int, tuple[float, int, str]] = {}
+		for qid, matched_name, build_id, blob in conn.execute(
+			"SELECT DISTINCT qb.qid, e.name, e.build, e.minhash FROM query_bands qb "
+			"JOIN bands b ON b.band = qb.band AND b.hash = qb.hash "
+			"JOIN query q ON q.qid = qb.qid "
+			"JOIN entities e ON e.id = b.entity AND e.kind = q.kind"
+		):
+			signature = query[qid]
+			score = signature.similarity(Signature(signature.kind, matched_name, b"", _unpack(blob)))
+			if score >= threshold and (score, build_id) > best.get(qid, (0.0, 0, ""))[:2]:
+				best[qid] = (score, build_id, matched_name)
+
+		for qid, (score, build_id, matched_name) in best.items():
+			signature = query[qid]
+			matches[signature.name] = Match(signature.kind, signature.name, matched_name, build_names[build_id], score)
+
+		return matches
@@ -0,0 +1,53 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+# callback(phase, seconds, bytes, count) invoked for every recorded sample
+StatsCallback = Callable[[str, float, int, int], None]
+
+@dataclass
+class PhaseStats:
+	seconds: float = 0.0
+	bytes: int = 0
+	count: int = 0
+	calls: int = 0
+
+@dataclass
+class Stats:
+	# Opt-in instrumentation shared by SWFParser and its ABCs. Phases are
+	# dotted names ("abc.read.constant_pool", "swf.parse.tag.82", ...); bytes
+	# are consumed on parse/read and produced on write, count is the number
+	# of entities handled by the phase
+	phases: dict[str, PhaseStats] = field(default_factory=dict)
+	callbacks: list[StatsCallback] = field(default_factory=list)
+
+	def record(self, phase: str, seconds: float, nbytes: int = 0, count: int = 0):
+		entry = self.phases.get(phase)
+		if entry is None:
+			entry = self.phases[phase] = PhaseStats()
+		entry.seconds += seconds
+		entry.bytes += nbytes
+		entry.count += count
+		entry.calls += 1
+
+		for callback in self.callbacks:
+			callback(phase, seconds, nbytes, count)
+
+	def add_callback(self, callback: StatsCallback):
+		self.callbacks.append(callback)
+
+	def reset(self):
+		self.phases.clear()
+
+	def as_dict(self) -> dict[str, dict[str, float | int]]:
+		return {
+			phase: {"seconds": entry.seconds, "bytes": entry.bytes, "count": entry.count, "calls": entry.calls}
+			for phase, entry in self.phases.items()
+		}
+
+	def __str__(self) -> str:
+		lines = [f"{'phase':36} {'calls':>6} {'ms':>10} {'bytes':>12} {'count':>10}"]
+		for phase, entry in sorted(self.phases.items()):
+			lines.append(
+				f"{phase:36} {entry.calls:6} {entry.seconds * 1000:10.3f} {entry.bytes:12} {entry.count:10}"
+			)
+		return "\n".join(lines)
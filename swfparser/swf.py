@@ -1,15 +1,55 @@
-from ._abc import ABC
+from ._abc import ABC, Diff, Fingerprint, Hierarchy, diff, link
+from .assets import Asset, extract_assets
+from .deflate import parallel_deflate
+from .export import export_binary, export_jsonl
+from .memory import swf_memory_usage
 from .reader import ByteReader
+from .stats import Stats
 from .writer import ByteWriter
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+
+import os
 import struct
+import threading
 import zlib
 
+def _serialize_abc(abc: ABC) -> bytes:
+	return bytes(abc.write().buf)
+
+def is_swf(data: bytes | memoryview) -> bool:
+	# cheap header check for SWF files embedded in binary data
+	if len(data) < 8 or bytes(data[:3]) not in (b"FWS", b"CWS"):
+		return False
+	length = struct.unpack_from("<I", data, 4)[0]
+	# uncompressed files carry their exact length, loaders may pad the payload
+	return length >= 8 and (data[0] == 0x43 or length <= len(data))
+
+def _parse_child(job: tuple["SWFParser", int]) -> "SWFParser | None":
+	parent, tag = job
+	try:
+		return parent.child(tag)
+	except Exception as e:
+		# one malformed payload must not abort its siblings
+		with parent._children_lock:
+			parent.child_errors[tag] = f"{type(e).__name__}: {e}"
+		return None
+
 class SWFParser:
-	def __init__(self, path: str):
-		self.raw: bytes
-		with open(path, "rb") as f:
-			self.raw = f.read()
+	def __init__(self, source: str | os.PathLike | bytes | bytearray | memoryview, stats: Stats | None = None, track_edits: bool = False):
+		# a path, or the file content itself: memoryviews are used without copy
+		self.raw: bytes | bytearray | memoryview
+		if isinstance(source, (str, os.PathLike)):
+			with open(source, "rb") as f:
+				self.raw = f.read()
+		else:
+			self.raw = source
+
+		# optional instrumentation shared with every ABC, see swfparser.stats
+		self.stats: Stats | None = stats
+		# see ABCReader.track_edits
+		self.track_edits: bool = track_edits
 
 		self.abcs: dict[str, ABC] = {}
 		self.binary_data: dict[int, bytes] = {}
@@ -17,14 +57,23 @@ class SWFParser:
 
 		self.tags: list[tuple[int, bytes]] = []
 
+		# SWF files found in binary_data, parsed on first access, see child()
+		self._children: dict[int, SWFParser] = {}
+		self._children_lock = threading.Lock()
+		# tag -> error of the embedded SWFs parse_children() could not parse
+		self.child_errors: dict[int, str] = {}
+
+		started = perf_counter()
 		self.reader: ByteReader = ByteReader(self._maybe_decompress(self.raw))
+		if stats is not None:
+			stats.record("swf.decompress", perf_counter() - started, len(self.raw), len(self.reader.buf))
 		self.writer: ByteWriter = None
 
-	def _maybe_decompress(self, data: bytes) -> bytes:
-		sig = data[:3]
+	def _maybe_decompress(self, data: bytes | memoryview) -> bytes | memoryview:
+		sig = bytes(data[:3])
 		if sig == b'CWS':
 			# SWF compressed with zlib from 8th byte
-			header = data[:8]
+			header = bytes(data[:8])
 			comp = data[8:]
 			return header[:3].replace(b'C', b'F') + header[3:] + zlib.decompress(comp)
 		elif sig == b'FWS':
@@ -33,7 +82,9 @@ class SWFParser:
 			raise ValueError("Unsupported SWF signature: %s" % sig)
 
 	def parse(self):
-		self.signature = self.reader.read_bytes(3)
+		self.reader.read_bytes(3)
+		# signature of the file on disk, the reader always sees it decompressed
+		self.signature = bytes(self.raw[:3])
 		self.version = self.reader.read_u8()
 		self.reader.read_u32() # length
 
@@ -42,7 +93,11 @@ class SWFParser:
 		self.frame_count = self.reader.read_u16()
 
 		# SWF tags
+		stats = self.stats
 		while True:
+			if stats is not None:
+				started, start = perf_counter(), self.reader.pos
+
 			record = self.reader.read_u16()
 			tag_code = record >> 6
 			tag_len  = record & 0x3f
@@ -60,10 +115,17 @@ class SWFParser:
 
 			self.tags.append((tag_code, data))
 
+			if stats is not None:
+				stats.record(f"swf.parse.tag.{tag_code}", perf_counter() - started, self.reader.pos - start, 1)
+
 			if tag_code == 0: # END tag
 				break
 
-	def write(self, path: str, compress: bool | None = None):
+	def write(self, path: str, compress: bool | None = None, workers: int | None = None):
+		# workers > 1 serializes DoABC tags in worker processes and deflates in parallel chunks
+		parallel = workers is not None and workers > 1
+		serialized = self._serialize_abcs(workers) if parallel else {}
+
 		self.writer = ByteWriter()
 
 		_compress = (self.signature == b"CWS") if compress is None else bool(compress)
@@ -76,38 +138,152 @@ class SWFParser:
 		self.writer.write_u16(self.frame_rate).write_u16(self.frame_count)
 
 		# SWF tags
-		for tag_code, data in self.tags:
-			if isinstance(data, ABC):
-				data = bytes(data.write().buf)
+		stats = self.stats
+		for i, (tag_code, data) in enumerate(self.tags):
+			if stats is not None:
+				started, start = perf_counter(), len(self.writer)
+
+			if i in serialized:
+				data = serialized[i]
 
-			record  = tag_code << 6
-			tag_len = len(data)
-			if tag_len < 0x3f:
-				record |= tag_len
-				self.writer.write_u16(record)
+			if isinstance(data, ABC):
+				# serialize in place behind a long tag header patched afterwards
+				self.writer.write_u16(tag_code << 6 | 0x3f)
+				len_pos = len(self.writer)
+				self.writer.write_u32(0)
+				data.write(self.writer)
+				struct.pack_into("<I", self.writer.buf, len_pos, len(self.writer) - len_pos - 4)
 			else:
-				record |= 0x3f
-				self.writer.write_u16(record)
-				self.writer.write_u32(tag_len)
-			self.writer.write_bytes(data)
+				record  = tag_code << 6
+				tag_len = len(data)
+				if tag_len < 0x3f:
+					record |= tag_len
+					self.writer.write_u16(record)
+				else:
+					record |= 0x3f
+					self.writer.write_u16(record)
+					self.writer.write_u32(tag_len)
+				self.writer.write_bytes(data)
+
+			if stats is not None:
+				stats.record(f"swf.write.tag.{tag_code}", perf_counter() - started, len(self.writer) - start, 1)
 
 		# fix swf length
 		swf_len = len(self.writer.buf)
 		struct.pack_into("<I", self.writer.buf, 4, swf_len)
 
-		if _compress:
-			header = self.writer.buf[:8]
-			header[:3].replace(b"F", b"C")
-
-			body = self.writer.buf[8:]
-			comp = zlib.compress(body)
-			
-			self.writer.clear()
-			self.writer.write_bytes(header + comp)
-
+		started = perf_counter()
 		with open(path, "wb") as f:
-			f.write(self.writer.buf)
+			if _compress:
+				with memoryview(self.writer.buf) as buf:
+					f.write(buf[:8])
+					if parallel:
+						for piece in parallel_deflate(buf[8:], workers):
+							f.write(piece)
+					else:
+						f.write(zlib.compress(buf[8:]))
+			else:
+				f.write(self.writer.buf)
+
+			if stats is not None:
+				stats.record("swf.write.output", perf_counter() - started, f.tell(), swf_len)
 	
+	def _serialize_abcs(self, workers: int) -> dict[int, bytes]:
+		positions = [i for i, (_, data) in enumerate(self.tags) if isinstance(data, ABC)]
+		if len(positions) < 2:
+			return {}
+
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			results = pool.map(_serialize_abc, [self.tags[i][1] for i in positions])
+			return dict(zip(positions, results))
+
+	def memory_usage(self) -> dict:
+		# estimated retained bytes of the file buffers, tags and every ABC
+		return swf_memory_usage(self)
+
+	def fingerprint(self) -> Fingerprint:
+		return Fingerprint([data for _, data in self.tags if isinstance(data, ABC)])
+
+	def hierarchy(self) -> Hierarchy:
+		# classes of every ABC in tag order, linked to their SymbolClass ids
+		return Hierarchy((data for _, data in self.tags if isinstance(data, ABC)), self.symbols)
+
+	def diff(self, other: "SWFParser", opcodes: bool = True) -> Diff:
+		# classes, traits and methods added, removed or modified in other
+		return diff(self.fingerprint(), other.fingerprint(), opcodes)
+
+	def export(self, fp, binary: bool = False, disassemble: bool = False) -> int:
+		# streams every ABC entity to fp as JSON lines (text) or length-prefixed records (binary)
+		abcs = (data for _, data in self.tags if isinstance(data, ABC))
+		if binary:
+			return export_binary(abcs, fp, disassemble)
+		return export_jsonl(abcs, fp, disassemble)
+
+	def extract_assets(self, directory: str, workers: int | None = None, kinds: set[str] | None = None) -> list[Asset]:
+		# binary data, images, lossless bitmaps (as PNG) and sounds, named after their symbols
+		return extract_assets(self.tags, self.symbols, directory, workers, kinds)
+
+	def embedded_tags(self) -> list[int]:
+		# DefineBinaryData tags holding a SWF file
+		return [tag for tag, data in self.binary_data.items() if is_swf(data)]
+
+	def child(self, tag: int) -> "SWFParser":
+		# the SWF embedded in a DefineBinaryData tag, parsed on first access.
+		# An uncompressed child reads straight from this parser's buffer
+		child = self._children.get(tag)
+		if child is not None:
+			return child
+
+		data = self.binary_data[tag]
+		if not is_swf(data):
+			raise ValueError(f"Binary data {tag} is not a SWF file")
+
+		child = SWFParser(data, stats=self.stats, track_edits=self.track_edits)
+		child.parse()
+		with self._children_lock:
+			return self._children.setdefault(tag, child)
+
+	def parse_children(self, workers: int | None = None, recursive: bool = True) -> dict[int, "SWFParser"]:
+		# parses every embedded SWF on a thread pool, level by level when
+		# recursive. A malformed child does not stop the others: its error is
+		# kept in the parent's child_errors
+		with ThreadPoolExecutor(max_workers=workers) as pool:
+			level = [self]
+			while level:
+				jobs = [(parent, tag) for parent in level for tag in parent.embedded_tags()]
+				level = [child for child in pool.map(_parse_child, jobs) if child is not None]
+				if not recursive:
+					break
+		return dict(self._children)
+
+	def strip(self, debug: bool = True) -> dict[str, dict[str, int]]:
+		return {name: abc.strip(debug) for name, abc in self.abcs.items()}
+
+	def link_abcs(self, names: list[str] | None = None, name: str | None = None) -> ABC:
+		# merge several DoABC tags into one: the first linked tag is replaced
+		# by the result and the others are dropped. All but the last tag must
+		# be lazily initialized, the result takes the flags of the last one
+		positions = [
+			i for i, (tag_code, data) in enumerate(self.tags)
+			if isinstance(data, ABC) and (names is None or data.name in names)
+		]
+		if not positions:
+			raise ValueError("No ABC to link")
+
+		sources = [self.tags[i][1] for i in positions]
+		first = sources[0]
+		linked = link(sources, first.name if name is None else name, sources[-1].flags)
+
+		dropped = set(positions[1:])
+		self.tags[positions[0]] = (self.tags[positions[0]][0], linked)
+		self.tags = [tag for i, tag in enumerate(self.tags) if i not in dropped]
+
+		for abc in sources:
+			self.abcs.pop(abc.name, None)
+		self.abcs[linked.name] = linked
+
+		return linked
+
 	def _read_rect(self) -> tuple[int, bytes]:
 		first = self.reader.read_u8()
 		nbits = first >> 3
@@ -142,6 +318,8 @@ class SWFParser:
 
 		abc_data = r.read_bytes(len(data) - r.pos)
 		self.abcs[name] = abc = ABC(name, flags, abc_data)
+		abc.stats = self.stats
+		abc.track_edits = self.track_edits
 		abc.read()
 
 		return abc
\ No newline at end of file
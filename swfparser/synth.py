@@ -0,0 +1,279 @@
+from .writer import ByteWriter
+from ._abc.consts import *
+
+import random
+import struct
+import zlib
+
+# branch opcodes used by the generated bodies
+_JUMP = 0x10
+_IFFALSE = 0x12
+_IFLT = 0x15
+_LOOKUPSWITCH = 0x1b
+
+class _BodyBuilder:
+	def __init__(self):
+		self.w = ByteWriter()
+		self.labels: dict[str, int] = {}
+		self.fixups: list[tuple[int, int, str]] = []
+
+	def op(self, code: int, *u30: int) -> "_BodyBuilder":
+		self.w.write_u8(code)
+		for v in u30:
+			self.w.write_leb128(v)
+		return self
+
+	def u8(self, code: int, v: int) -> "_BodyBuilder":
+		self.w.write_u8(code).write_u8(v)
+		return self
+
+	def mark(self, name: str):
+		self.labels[name] = len(self.w)
+
+	def branch(self, code: int, name: str):
+		self.w.write_u8(code)
+		self.fixups.append((len(self.w), len(self.w) + 3, name))
+		self.w.write_s24(0)
+
+	def switch(self, default: str, cases: list[str]):
+		base = len(self.w)
+		self.w.write_u8(_LOOKUPSWITCH)
+		self.fixups.append((len(self.w), base, default))
+		self.w.write_s24(0)
+		self.w.write_leb128(len(cases) - 1)
+		for case in cases:
+			self.fixups.append((len(self.w), base, case))
+			self.w.write_s24(0)
+
+	def build(self) -> bytes:
+		buf = self.w.buf
+		for pos, base, name in self.fixups:
+			buf[pos:pos + 3] = ((self.labels[name] - base) & 0xFFFFFF).to_bytes(3, "little")
+		return bytes(buf)
+
+def generate_abc(
+	strings: int = 200,
+	multinames: int = 200,
+	classes: int = 20,
+	traits: int = 8,
+	methods: int = 100,
+	body_size: int = 20,
+	seed: int = 0
+) -> bytes:
+	rng = random.Random(seed)
+	w = ByteWriter()
+	w.write_u16(16).write_u16(46)
+
+	ints = [rng.randint(-(1 << 31), (1 << 31) - 1) for _ in range(16)]
+	uints = [rng.randint(0, (1 << 32) - 1) for _ in range(16)]
+	doubles = [rng.random() * 1000 for _ in range(16)]
+
+	string_pool = ["", "", "Object", "flash.events", "int", "Vector", "__AS3__.vec", "private"]
+	string_pool += ["s%d_%x" % (i, rng.getrandbits(24)) for i in range(strings)]
+	n_strings = len(string_pool)
+
+	# namespaces: 1 public "", 2 package flash.events, 3 private, 4 package __AS3__.vec, 5 protected
+	namespaces = [(0x16, 1), (0x16, 3), (0x05, 7), (0x16, 6), (0x18, 1)]
+	ns_sets = [[1, 2], [1, 3, 4]]
+
+	# multinames: 1 Object, 2 int, 3 Vector, 4 Vector.<int>, then generated names
+	mn = [
+		(CONSTANT_QName, 1, 2),
+		(CONSTANT_QName, 1, 4),
+		(CONSTANT_QName, 4, 5),
+		(CONSTANT_TypeName, 3, [2]),
+	]
+	for i in range(multinames):
+		name = rng.randrange(8, n_strings)
+		r = i % 10
+		if r < 6:
+			mn.append((CONSTANT_QName, rng.randrange(1, len(namespaces) + 1), name))
+		elif r == 6:
+			mn.append((CONSTANT_Multiname, name, rng.randrange(1, len(ns_sets) + 1)))
+		elif r == 7:
+			mn.append((CONSTANT_RTQName, name))
+		elif r == 8:
+			mn.append((CONSTANT_MultinameL, rng.randrange(1, len(ns_sets) + 1)))
+		else:
+			mn.append((CONSTANT_QNameA, rng.randrange(1, len(namespaces) + 1), name))
+	n_mn = len(mn) + 1
+	qnames = [i + 1 for i, m in enumerate(mn) if m[0] == CONSTANT_QName and i >= 4]
+
+	w.write_leb128(len(ints) + 1)
+	for v in ints:
+		w.write_sleb128(v)
+	w.write_leb128(len(uints) + 1)
+	for v in uints:
+		w.write_leb128(v)
+	w.write_leb128(len(doubles) + 1)
+	for v in doubles:
+		w.write_d(v)
+	w.write_leb128(n_strings)
+	for s in string_pool[1:]:
+		w.write_string(s)
+	w.write_leb128(len(namespaces) + 1)
+	for kind, name in namespaces:
+		w.write_u8(kind).write_leb128(name)
+	w.write_leb128(len(ns_sets) + 1)
+	for ns_set in ns_sets:
+		w.write_leb128(len(ns_set))
+		for ns in ns_set:
+			w.write_leb128(ns)
+	w.write_leb128(n_mn)
+	for m in mn:
+		w.write_u8(m[0])
+		if m[0] == CONSTANT_TypeName:
+			w.write_leb128(m[1]).write_leb128(len(m[2]))
+			for p in m[2]:
+				w.write_leb128(p)
+		else:
+			for v in m[1:]:
+				w.write_leb128(v)
+
+	# every class owns an iinit and a cinit, scripts own one init each
+	method_count = max(methods, classes * 2 + 1)
+	w.write_leb128(method_count)
+	for i in range(method_count):
+		param_count = rng.randrange(0, 4)
+		w.write_leb128(param_count)
+		w.write_leb128(rng.choice(qnames[:16] or [1]))
+		for _ in range(param_count):
+			w.write_leb128(rng.choice((0, 1, 2, 4)))
+		w.write_leb128(rng.randrange(8, n_strings))
+		flags = HAS_OPTIONAL if param_count and i % 7 == 0 else 0
+		w.write_u8(flags)
+		if flags & HAS_OPTIONAL:
+			w.write_leb128(1).write_leb128(rng.randrange(1, len(ints) + 1)).write_u8(0x03)
+
+	w.write_leb128(0) # metadata
+
+	trait_methods = list(range(classes * 2 + 1, method_count))
+
+	def write_traits(count: int, slot_base: int = 1):
+		w.write_leb128(count)
+		for t in range(count):
+			w.write_leb128(rng.choice(qnames))
+			if t % 2 == 0 or not trait_methods:
+				w.write_u8(TRAIT_SLOT)
+				w.write_leb128(slot_base + t)
+				w.write_leb128(rng.choice((0, 2)))
+				vindex = rng.randrange(0, len(ints) + 1)
+				w.write_leb128(vindex)
+				if vindex:
+					w.write_u8(0x03)
+			else:
+				w.write_u8(rng.choice((TRAIT_METHOD, TRAIT_GETTER, TRAIT_SETTER)))
+				w.write_leb128(0)
+				w.write_leb128(rng.choice(trait_methods))
+
+	class_names = rng.sample(qnames, min(classes, len(qnames)))
+	w.write_leb128(len(class_names))
+	for i, name in enumerate(class_names):
+		w.write_leb128(name)
+		w.write_leb128(1 if i == 0 else class_names[i - 1])
+		flags = 0x08 if i % 3 == 0 else 0
+		w.write_u8(flags)
+		if flags & 0x08:
+			w.write_leb128(5)
+		w.write_leb128(0)
+		w.write_leb128(2 * i)
+		write_traits(traits)
+	for i in range(len(class_names)):
+		w.write_leb128(2 * i + 1)
+		write_traits(traits // 2)
+
+	w.write_leb128(1)
+	w.write_leb128(classes * 2)
+	w.write_leb128(len(class_names))
+	for i, name in enumerate(class_names):
+		w.write_leb128(name).write_u8(TRAIT_CLASS).write_leb128(i + 1).write_leb128(i)
+
+	w.write_leb128(method_count)
+	for i in range(method_count):
+		code, exceptions = _generate_body(rng, body_size, n_strings, len(ints), len(uints), len(doubles), qnames)
+		w.write_leb128(i)
+		w.write_leb128(8)
+		w.write_leb128(4)
+		w.write_leb128(0)
+		w.write_leb128(2)
+		w.write_leb128(len(code)).write_bytes(code)
+		w.write_leb128(len(exceptions))
+		for ex in exceptions:
+			for v in ex:
+				w.write_leb128(v)
+		w.write_leb128(0)
+
+	return bytes(w.buf)
+
+def _generate_body(rng, size, n_strings, n_ints, n_uints, n_doubles, qnames) -> tuple[bytes, list]:
+	b = _BodyBuilder()
+	exceptions = []
+
+	b.op(0xd0).op(0x30) # getlocal_0, pushscope
+	b.op(0xf1, rng.randrange(8, n_strings)) # debugfile
+
+	for block in range(size):
+		b.op(0xf0, block + 1) # debugline
+		r = rng.randrange(8)
+		if r == 0:
+			b.u8(0x24, rng.randrange(256)).op(0x2d, rng.randrange(1, n_ints + 1)).op(0xa0).op(0x63, rng.randrange(1, 4))
+		elif r == 1:
+			b.op(0x2c, rng.randrange(1, n_strings)).op(0x85).op(0x85).op(0x29)
+		elif r == 2:
+			name = rng.choice(qnames)
+			b.op(0x5d, name).op(0x66, name).op(0x29)
+		elif r == 3:
+			b.op(0x62, 1).branch(_IFFALSE, f"skip{block}")
+			b.op(0x2e, rng.randrange(1, n_uints + 1)).op(0x2f, rng.randrange(1, n_doubles + 1)).op(0xa2).op(0x29)
+			b.mark(f"skip{block}")
+		elif r == 4:
+			b.mark(f"loop{block}")
+			b.op(0x09).op(0xc2, 2).op(0x62, 2).u8(0x24, 10).branch(_IFLT, f"loop{block}")
+		elif r == 5:
+			cases = [f"case{block}_{c}" for c in range(rng.randrange(1, 5))]
+			b.op(0x62, 3).switch(f"end{block}", cases)
+			for case in cases:
+				b.mark(case)
+				b.op(0x02).branch(_JUMP, f"end{block}")
+			b.mark(f"end{block}")
+		elif r == 6:
+			start = len(b.w)
+			b.op(0xd0).op(0x46, rng.choice(qnames), 0).op(0x29)
+			end = len(b.w)
+			b.branch(_JUMP, f"after{block}")
+			target = len(b.w)
+			b.op(0x29) # pop the caught exception
+			b.mark(f"after{block}")
+			exceptions.append((start, end, target, 0, 0))
+		else:
+			b.op(0xd1).op(0x62, 1).op(0x82).op(0x80, 1).op(0x80, 1).op(0x29).op(0x29)
+
+	b.op(0x47) # returnvoid
+	return b.build(), exceptions
+
+def generate_swf(compress: bool = False, version: int = 10, binary_data: list[bytes] | None = None, **kwargs) -> bytes:
+	abc = generate_abc(**kwargs)
+
+	tags = ByteWriter()
+	def tag(code: int, data: bytes):
+		if len(data) < 0x3f:
+			tags.write_u16(code << 6 | len(data))
+		else:
+			tags.write_u16(code << 6 | 0x3f).write_u32(len(data))
+		tags.write_bytes(data)
+
+	tag(0x45, struct.pack("<I", 0x08)) # FileAttributes: ActionScript3
+	for i, data in enumerate(binary_data or []):
+		tag(0x57, struct.pack("<HI", i + 1, 0) + data)
+	tag(0x52, struct.pack("<I", 1) + b"frame1\x00" + abc)
+	tag(0x4C, struct.pack("<HH", 1, 0) + b"Main\x00")
+	tag(0x01, b"")
+	tag(0x00, b"")
+
+	# RECT with 15-bit fields: 0, 11000, 0, 8000 twips
+	rect = bytes([0x78, 0x00, 0x05, 0x5F, 0x00, 0x00, 0x0F, 0xA0, 0x00])
+	body = rect + struct.pack("<HH", 24 << 8, 1) + bytes(tags.buf)
+	length = 8 + len(body)
+	if compress:
+		return b"CWS" + bytes([version]) + struct.pack("<I", length) + zlib.compress(body)
+	return b"FWS" + bytes([version]) + struct.pack("<I", length) + body
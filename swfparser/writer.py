@@ -19,7 +19,7 @@ class ByteWriter:
         return self
     
     def write_s24(self, v: int) -> 'ByteWriter':
-        self.buf.extend((v & 0xFFFFFF).to_bytes(3, "little", signed=True))
+        self.buf.extend((v & 0xFFFFFF).to_bytes(3, "little"))
         return self
 
     def write_u32(self, v: int) -> 'ByteWriter':
@@ -47,9 +47,8 @@ class ByteWriter:
         return self
     
     def write_sleb128(self, v: int) -> 'ByteWriter': # S32
-        if v & (1 << 31):
-            v -= 1 << 32
-        return self.write_leb128(v)
+        # encoded as the 32-bit two's complement, mirroring ByteReader.read_sleb128
+        return self.write_leb128(v & 0xFFFFFFFF)
         
     def write_string(self, s: str) -> 'ByteWriter':
         return self.write_leb128(len(s.encode())).write_bytes(s.encode())
@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from swfparser import ABC, SWFParser
+from swfparser.synth import generate_swf
+
+import pytest
+
+@pytest.fixture
+def swf_path(tmp_path) -> str:
+	path = tmp_path / "test.swf"
+	path.write_bytes(generate_swf(strings=60, multinames=60, classes=6, traits=4, methods=30, body_size=20))
+	return str(path)
+
+@pytest.fixture
+def swf(swf_path) -> SWFParser:
+	swf = SWFParser(swf_path)
+	swf.parse()
+	return swf
+
+@pytest.fixture
+def abc(swf) -> ABC:
+	return next(iter(swf.abcs.values()))
+
+def reparse(abc: ABC) -> ABC:
+	# the ABC as a player would load it after write()
+	data = bytes(abc.write().buf)
+	copy = ABC(abc.name, abc.flags, data[4 + len(abc.name.encode()) + 1:])
+	copy.read()
+	return copy
@@ -0,0 +1,66 @@
+from swfparser._abc import Code, Instruction, Label, Opcode
+from swfparser._abc.reader import ABCReader
+
+import pytest
+
+def _op(name: str, *args, targets: list[Label] = ()) -> Instruction:
+	return Instruction(getattr(Opcode, name), args=list(args), targets=list(targets))
+
+def _switch_code(cases: int) -> tuple[Code, Label, list[Label]]:
+	# loop: lookupswitch over `cases` labels, each jumping back to the loop head
+	head, default = Label(), Label()
+	labels = [Label() for _ in range(cases)]
+	items = [head, _op("getlocal_1"), _op("lookupswitch", 0, [], targets=[default, *labels])]
+	for label in labels:
+		items += [label, _op("nop"), _op("jump", 0, targets=[head])]
+	items += [default, _op("returnvoid")]
+	return Code(items), head, labels
+
+def _targets(code: bytes) -> dict[int, list[int]]:
+	return {instr.address: instr.targets for instr in ABCReader.read_instructions(code).instructions if instr.targets}
+
+def test_lookupswitch_and_backward_branches():
+	# 200 cases: the case count takes two LEB128 bytes
+	code, head, labels = _switch_code(200)
+	raw = code.assemble()
+	targets = _targets(raw)
+
+	switch = code.instructions[1]
+	assert targets[switch.address][1:] == [label.address for label in labels]
+	jumps = [instr for instr in code.instructions if instr.opcode is Opcode.jump]
+	assert all(targets[jump.address] == [head.address] for jump in jumps)
+	assert all(jump.args[0] < 0 for jump in jumps)
+
+def test_incremental_reassembly_relocates_branches():
+	original, _, _ = _switch_code(5)
+	code = Code.from_code(original.assemble())
+	before = [(instr.opcode, instr.args) for instr in ABCReader.read_instructions(code.assemble()).instructions]
+
+	code.insert(0, _op("nop"))
+	code.insert(len(code.items) - 1, _op("nop"))
+	raw = code.assemble()
+	after = ABCReader.read_instructions(raw).instructions
+	by_address = {instr.address: instr for instr in after}
+
+	# every branch still lands on the same kind of instruction
+	for instr in after:
+		for target in instr.targets:
+			assert target in by_address
+	assert [instr.opcode for instr in after if instr.opcode is not Opcode.nop] == [
+		opcode for opcode, _ in before if opcode is not Opcode.nop
+	]
+	assert Code.from_code(raw).assemble() == raw
+
+def test_removed_labels_are_rejected():
+	code, head, labels = _switch_code(3)
+	code.assemble()
+	code.remove(labels[1])
+	with pytest.raises(ValueError, match="not in the code"):
+		code.assemble()
+
+	stale = Label()
+	code = Code([_op("jump", 0, targets=[stale]), stale, _op("returnvoid")])
+	code.exceptions.append({"from": stale, "to": stale, "target": Label(), "exc_type": 0, "var_name": 0})
+	code.assemble()
+	with pytest.raises(ValueError, match="not in the code"):
+		code.resolve_exceptions()
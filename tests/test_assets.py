@@ -0,0 +1,73 @@
+from swfparser.assets import extract_assets
+
+import struct
+import wave
+import zlib
+
+def _read_png(path) -> tuple[tuple, dict[bytes, bytes], list[bytes]]:
+	# (IHDR fields, other chunks, unfiltered rows), checking every CRC
+	data = path.read_bytes()
+	assert data[:8] == b"\x89PNG\r\n\x1a\n"
+	pos, chunks, idat = 8, {}, b""
+	while pos < len(data):
+		(length,) = struct.unpack_from(">I", data, pos)
+		kind, payload = data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]
+		assert struct.unpack_from(">I", data, pos + 8 + length)[0] == zlib.crc32(payload, zlib.crc32(kind))
+		if kind == b"IDAT":
+			idat += payload
+		else:
+			chunks[kind] = payload
+		pos += 12 + length
+
+	width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+	channels = {2: 3, 3: 1, 6: 4}[color_type]
+	raw = zlib.decompress(idat)
+	stride = 1 + width * channels
+	rows = [raw[i * stride:(i + 1) * stride] for i in range(height)]
+	assert all(row[0] == 0 for row in rows)
+	return (width, height, depth, color_type), chunks, [row[1:] for row in rows]
+
+def _tags() -> list[tuple[int, bytes]]:
+	# premultiplied ARGB: (128, 64, 0, 128) is straight (128, 0, 255) at half alpha
+	argb = bytes([255, 10, 20, 30, 128, 64, 0, 128])
+	lossless2 = struct.pack("<HBHH", 1, 5, 2, 1) + zlib.compress(argb)
+	# 3x2 colormapped, rows padded to 4 bytes
+	colormapped = struct.pack("<HBHHB", 2, 3, 3, 2, 1) + zlib.compress(
+		bytes([255, 0, 0, 0, 0, 255]) + bytes([0, 1, 0, 0, 1, 1, 0, 0])
+	)
+	# 16-bit mono PCM at 44100 Hz
+	samples = struct.pack("<4h", 0, 1000, -1000, 32767)
+	sound = struct.pack("<HBI", 3, 0x3e, 4) + samples
+	jpeg = b"\xff\xd8\xff\xe0jpeg data\xff\xd9"
+	jpeg3 = struct.pack("<HI", 4, len(jpeg)) + jpeg + zlib.compress(bytes([0, 128, 255]))
+	binary = struct.pack("<HI", 5, 0) + b"payload"
+	return [(36, lossless2), (20, colormapped), (14, sound), (35, jpeg3), (87, binary), (1, b"")]
+
+def test_extract_assets(tmp_path):
+	assets = extract_assets(_tags(), {5: "com.game:Data", 1: "Icon"}, str(tmp_path), workers=4)
+	assert [(asset.character, asset.kind, asset.filename) for asset in assets] == [
+		(1, "bitmap", "1_Icon.png"), (2, "bitmap", "2.png"), (3, "sound", "3.wav"),
+		(4, "image", "4.jpg"), (5, "binary", "5_com.game_Data.bin"),
+	]
+
+	header, _, rows = _read_png(tmp_path / "1_Icon.png")
+	assert header == (2, 1, 8, 6)
+	assert rows == [bytes([10, 20, 30, 255, 128, 0, 255, 128])]
+
+	header, chunks, rows = _read_png(tmp_path / "2.png")
+	assert header == (3, 2, 8, 3)
+	assert chunks[b"PLTE"] == bytes([255, 0, 0, 0, 0, 255])
+	assert rows == [bytes([0, 1, 0]), bytes([1, 1, 0])]
+
+	with wave.open(str(tmp_path / "3.wav")) as wav:
+		assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, 44100)
+		assert wav.readframes(4) == struct.pack("<4h", 0, 1000, -1000, 32767)
+
+	assert (tmp_path / "4.jpg").read_bytes() == b"\xff\xd8\xff\xe0jpeg data\xff\xd9"
+	assert (tmp_path / "4.jpg.alpha").read_bytes() == bytes([0, 128, 255])
+	assert (tmp_path / "5_com.game_Data.bin").read_bytes() == b"payload"
+
+def test_kind_filter(tmp_path):
+	assets = extract_assets(_tags(), {}, str(tmp_path), kinds={"sound"})
+	assert [asset.filename for asset in assets] == ["3.wav"]
+	assert [path.name for path in tmp_path.iterdir()] == ["3.wav"]
@@ -0,0 +1,47 @@
+from swfparser._abc.cfg import ControlFlowGraph
+
+def _s24(offset: int) -> bytes:
+	return (offset & 0xFFFFFF).to_bytes(3, "little")
+
+# 0 getlocal_1; 1 lookupswitch default 24, cases 12, 19
+# 12 pushbyte 1; 14 pop; 15 jump 0
+# 19 nop; 20 jump 0
+# 24 returnvoid
+_SWITCH = (
+	b"\xd1" + b"\x1b" + _s24(23) + b"\x01" + _s24(11) + _s24(18)
+	+ b"\x24\x01" + b"\x29" + b"\x10" + _s24(-19)
+	+ b"\x02" + b"\x10" + _s24(-24)
+	+ b"\x47"
+)
+
+def test_lookupswitch_blocks_and_loop():
+	cfg = ControlFlowGraph.from_code(_SWITCH)
+
+	assert [block.start for block in cfg] == [0, 12, 19, 24]
+	switch, case1, case2, exit = cfg.blocks
+	assert sorted(switch.successors) == [case1.index, case2.index, exit.index]
+	assert case1.successors == case2.successors == [switch.index]
+	assert exit.successors == []
+	assert sorted(switch.predecessors) == [case1.index, case2.index]
+	assert cfg.loop_headers == {switch.index}
+	assert all(cfg.dominates(switch.index, block.index) for block in cfg)
+	assert cfg.block_at(14) is case1
+
+def test_exception_handlers():
+	# 0 getlocal_0; 1 pushscope; 2 jump 7; 6 pop (handler of 0-2); 7 returnvoid
+	code = b"\xd0\x30" + b"\x10" + _s24(1) + b"\x29\x47"
+	cfg = ControlFlowGraph.from_code(code, [{"from": 0, "to": 2, "target": 6, "exc_type": 0, "var_name": 0}])
+
+	protected = cfg.block_at(0)
+	catch = cfg.block_at(6)
+	assert catch.index in protected.handlers
+	assert cfg.block_at(7).index in catch.successors
+
+def test_in_place_exception_edits_invalidate_cached_graphs(abc):
+	index = next(i for i, body in enumerate(abc.method_bodies) if body["exceptions"])
+	cfg = abc.get_cfg(index)
+	assert abc.get_cfg(index) is cfg
+	abc.method_bodies[index]["exceptions"].clear()
+	abc.mark_dirty(body_index=index)
+	assert abc.get_cfg(index) is not cfg
+	assert not abc.get_cfg(index).exceptions
@@ -0,0 +1,55 @@
+from swfparser import SWFParser
+from swfparser._abc import Instruction, Opcode
+from swfparser._abc.diff import Fingerprint, _Hasher, diff
+
+import pytest
+
+@pytest.fixture
+def other(swf_path) -> SWFParser:
+	swf = SWFParser(swf_path)
+	swf.parse()
+	return swf
+
+def _abc(swf: SWFParser):
+	return next(iter(swf.abcs.values()))
+
+def test_pool_growth_and_strip_are_not_changes(swf, other):
+	assert not swf.diff(other)
+	abc = _abc(other)
+	abc.ensure_multiname(abc.ensure_string("unused"), 1)
+	abc.strip()
+	assert not swf.diff(other)
+
+def test_modified_method(swf, other):
+	abc = _abc(other)
+	fingerprint = Fingerprint([abc])
+	key, index = next((key, index) for key, (_, index) in fingerprint.methods.items() if key.endswith("/iinit"))
+	body = next(i for i, body in enumerate(abc.method_bodies) if body["method_index"] == index)
+	code = abc.get_code(body)
+	code.insert(0, Instruction(Opcode.nop))
+	code.commit(abc.method_bodies[body])
+
+	result = swf.diff(other)
+	assert [change.name for change in result.modified if change.kind == "method"] == [key]
+	assert [change.opcodes for change in result.modified if change.kind == "method"] == [["+0: nop"]]
+	# the enclosing class hashes its members
+	assert key.split("/")[0] in [change.name for change in result.modified if change.kind == "class"]
+	assert not result.added and not result.removed
+
+def test_renamed_class(swf, other):
+	abc = _abc(other)
+	instance = abc.instance_pool[0]
+	old = abc.resolve_multiname(instance["name"])
+	instance["name"] = abc.multiname_pool[abc.ensure_multiname(abc.ensure_string("Renamed"), instance["name"]["ns_index"])]
+	new = abc.resolve_multiname(instance["name"])
+
+	result = diff(swf.fingerprint(), other.fingerprint())
+	assert old in [change.name for change in result.removed if change.kind == "class"]
+	assert new in [change.name for change in result.added if change.kind == "class"]
+
+def test_instructions_reuse_the_hasher(swf, monkeypatch):
+	fingerprint = swf.fingerprint()
+	key = next(key for key in fingerprint.methods if key.endswith("/iinit"))
+	monkeypatch.setattr(_Hasher, "__init__", None)
+	assert fingerprint.instructions(key) == fingerprint.instructions(key)
+	assert fingerprint.instructions(key)[-1] in ("returnvoid", "returnvalue")
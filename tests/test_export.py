@@ -0,0 +1,61 @@
+from swfparser._abc import Instruction, Opcode
+from swfparser.export import _decode, _encode, export_jsonl, iter_entities, read_binary, read_jsonl
+from swfparser.reader import ByteReader
+from swfparser.writer import ByteWriter
+
+import io
+import json
+import math
+
+import pytest
+
+def test_jsonl_and_binary_round_trip(swf, abc):
+	# JSON is the reference: both formats must decode to the same records
+	entities = [json.loads(json.dumps(entity)) for entity in iter_entities(abc, True)]
+
+	text = io.StringIO()
+	assert swf.export(text, disassemble=True) == len(entities)
+	assert [json.loads(line) for line in text.getvalue().splitlines()] == entities
+
+	data = io.BytesIO()
+	assert swf.export(data, binary=True, disassemble=True) == len(entities)
+	data.seek(0)
+	assert list(read_binary(data)) == entities
+
+@pytest.mark.parametrize("value", [
+	None, True, False, 0, -1, 63, -64, 1 << 40, -(1 << 70), 1.5, -0.0, "", "é\U0001f600",
+	[1, [2, []], {"a": None}], {"nested": {"list": [True, "x"]}},
+])
+def test_binary_values(value):
+	w = ByteWriter()
+	_encode(w, value)
+	decoded = _decode(ByteReader(bytes(w.buf)))
+	assert decoded == value and type(decoded) is type(value)
+
+def test_truncated_binary_record(swf):
+	data = io.BytesIO()
+	swf.export(data, binary=True)
+	with pytest.raises(ValueError):
+		list(read_binary(io.BytesIO(data.getvalue()[:-1])))
+
+def test_non_finite_doubles_round_trip(abc):
+	index = next(i for i, body in enumerate(abc.method_bodies) if body["code"])
+	values = [math.nan, math.inf, -math.inf]
+	code = abc.get_code(index)
+	for value in values:
+		abc.double_pool.append(value)
+		code.insert(0, Instruction(Opcode.pop))
+		code.insert(0, Instruction(Opcode.pushdouble, args=[len(abc.double_pool) - 1]))
+	code.commit(abc.method_bodies[index])
+
+	text = io.StringIO()
+	export_jsonl([abc], text, disassemble_bodies=True)
+	# strict JSON: no bare NaN or Infinity tokens
+	json.loads("[" + ",".join(text.getvalue().splitlines()) + "]", parse_constant=pytest.fail)
+	text.seek(0)
+	pushed = [
+		instruction[2]
+		for entity in read_jsonl(text) for instruction in entity.get("instructions", ())
+		if instruction[1] == "pushdouble" and not math.isfinite(instruction[2])
+	]
+	assert math.isnan(pushed[2]) and pushed[:2] == [-math.inf, math.inf]
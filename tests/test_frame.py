@@ -0,0 +1,82 @@
+from conftest import reparse
+from swfparser import ABC
+from swfparser._abc import Code, Instruction, Label, Opcode
+from swfparser._abc.consts import NEED_REST
+
+import pytest
+
+def _op(name: str, *args, targets: list[Label] = ()) -> Instruction:
+	return Instruction(getattr(Opcode, name), args=list(args), targets=list(targets))
+
+def _method(abc: ABC, code: Code, params: int = 0, flags: int = 0) -> int:
+	# appends a method with the given body, returning its body index
+	abc.method_info.append({"name": "", "params": [abc.multiname_pool[0]] * params, "return_type": abc.multiname_pool[0], "flags": flags})
+	abc.method_bodies.append({
+		"method_index": len(abc.method_info) - 1, "max_stack": 0, "local_count": 0,
+		"init_scope": 3, "max_scope": 0, "code": code.assemble(), "exceptions": code.resolve_exceptions(), "traits": [],
+	})
+	return len(abc.method_bodies) - 1
+
+@pytest.fixture
+def empty() -> ABC:
+	return ABC.create("test", 1)
+
+def test_depths_before_every_instruction(empty):
+	body = _method(empty, Code([
+		_op("getlocal_0"), _op("pushscope"), _op("pushbyte", 1), _op("pushbyte", 2),
+		_op("add"), _op("setlocal", 5), _op("returnvoid"),
+	]), params=1)
+	frame = empty.analyze_frame(body)
+	assert frame.stack == [0, 1, 0, 1, 2, 1, 0]
+	assert frame.scope == [0, 0, 1, 1, 1, 1, 1]
+	assert (frame.max_stack, frame.max_scope, frame.max_register) == (2, 1, 5)
+	assert not frame.errors
+
+	empty.update_limits(body)
+	limits = empty.method_bodies[body]
+	assert (limits["max_stack"], limits["max_scope"], limits["local_count"]) == (2, 4, 6)
+
+def test_local_count_covers_parameters(empty):
+	body = _method(empty, Code([_op("returnvoid")]), params=3, flags=NEED_REST)
+	frame = empty.analyze_frame(body)
+	assert frame.max_register == -1
+	# this, three parameters and the rest array
+	assert frame.local_count(empty.method_info[-1]) == 5
+
+def test_handler_entry_state(empty):
+	start, end, handler = Label(), Label(), Label()
+	body = _method(empty, Code([
+		start, _op("getlocal_0"), _op("pushscope"), _op("pushbyte", 1), _op("pushbyte", 2), _op("pop"), _op("pop"), end,
+		_op("returnvoid"),
+		handler, _op("pop"), _op("returnvoid"),
+	], [{"from": start, "to": end, "target": handler, "exc_type": 0, "var_name": 0}]))
+	frame = empty.analyze_frame(body)
+	# the handler's pop sees the caught exception on an empty scope
+	assert (frame.stack[-2], frame.scope[-2]) == (1, 0)
+	assert frame.max_stack == 2 and not frame.errors
+
+def test_verifier_errors(empty):
+	merge = Label()
+	mismatch = _method(empty, Code([
+		_op("getlocal_0"), _op("pushtrue"), _op("iftrue", 0, targets=[merge]),
+		_op("pushbyte", 1), merge, _op("returnvoid"),
+	]))
+	assert [error.split(":")[0] for error in empty.analyze_frame(mismatch).errors] == [f"Block at {merge.address}"]
+
+	underflow = _method(empty, Code([_op("pop"), _op("popscope"), _op("getscopeobject", 0), _op("returnvoid")]))
+	errors = empty.analyze_frame(underflow).errors
+	assert [error.split(" at ")[0] for error in errors] == ["Stack underflow", "Scope underflow", "Scope 0 out of range"]
+
+def test_auto_limits_only_rewrite_edited_bodies(abc):
+	before = [(body["max_stack"], body["max_scope"], body["local_count"]) for body in abc.method_bodies]
+	code = abc.get_code(0)
+	code.insert(0, _op("nop"))
+	code.commit(abc.method_bodies[0])
+	abc.auto_limits = True
+
+	copy = reparse(abc)
+	frame = abc.analyze_frame(0)
+	edited = copy.method_bodies[0]
+	assert (edited["max_stack"], edited["max_scope"] - edited["init_scope"]) == (frame.max_stack, frame.max_scope)
+	assert edited["max_stack"] != before[0][0]
+	assert [(body["max_stack"], body["max_scope"], body["local_count"]) for body in copy.method_bodies[1:]] == before[1:]
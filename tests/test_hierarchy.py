@@ -0,0 +1,64 @@
+from swfparser import ABC
+from swfparser._abc.hierarchy import Hierarchy
+
+import pytest
+
+def _abc(*classes: tuple) -> ABC:
+	# classes as (name, super, interfaces, is interface), names in package "pkg"
+	abc = ABC.create("test", 1)
+	abc.namespace_pool.append({"kind": 0x16, "name_index": abc.ensure_string("pkg")})
+	abc.namespace_pool.append({"kind": 0x16, "name_index": 0})
+
+	def qname(name: str | None) -> dict:
+		if name is None:
+			return abc.multiname_pool[0]
+		ns = 2 if name == "Object" else 1
+		return abc.multiname_pool[abc.ensure_multiname(abc.ensure_string(name), ns)]
+
+	for name, parent, interfaces, interface in classes:
+		abc.instance_pool.append({
+			"name": qname(name), "super": qname(parent), "flags": 0x04 if interface else 0,
+			"protected_ns": None, "interfaces": [qname(i) for i in interfaces], "iinit": 0, "traits": [],
+		})
+		abc.class_pool.append({"cinit": 0, "traits": []})
+	return abc
+
+@pytest.fixture
+def hierarchy() -> Hierarchy:
+	abc = _abc(
+		("IB", None, (), True),
+		("IA", None, ("IB",), True),
+		("Base", "Object", (), False),
+		("A", "Base", ("IA",), False),
+		("B", "A", (), False),
+		("C", "Base", (), False),
+		("A", "C", (), False), # redefinition: ignored
+	)
+	return Hierarchy([abc], {7: "pkg.B"})
+
+def test_tree_and_intervals(hierarchy):
+	assert hierarchy["Object"].external and not hierarchy["pkg.A"].external
+	assert [node.name for node in hierarchy.ancestors("pkg.B")] == ["pkg.A", "pkg.Base", "Object"]
+	assert [node.name for node in hierarchy.subclasses("pkg.Base")] == ["pkg.A", "pkg.B", "pkg.C"]
+	assert [node.name for node in hierarchy.subclasses("pkg.Base", direct=True)] == ["pkg.A", "pkg.C"]
+	assert hierarchy.is_subclass("pkg.B", "Object") and hierarchy.is_subclass("pkg.B", "pkg.B")
+	assert not hierarchy.is_subclass("pkg.C", "pkg.A")
+	assert hierarchy["pkg.A"].super.name == "pkg.Base"
+
+def test_interfaces(hierarchy):
+	assert {node.name for node in hierarchy.interfaces("pkg.B")} == {"pkg.IA", "pkg.IB"}
+	assert not hierarchy.interfaces("pkg.C")
+	assert {node.name for node in hierarchy.implementors("pkg.IB")} == {"pkg.IA", "pkg.A", "pkg.B"}
+	assert hierarchy.is_subtype("pkg.B", "pkg.IB") and not hierarchy.is_subtype("pkg.C", "pkg.IB")
+
+def test_symbols_and_unknown_names(hierarchy):
+	assert hierarchy.by_symbol(7) is hierarchy["pkg.B"]
+	assert hierarchy["pkg.B"].symbols == [7]
+	assert hierarchy.by_symbol(8) is None
+	with pytest.raises(ValueError):
+		hierarchy["pkg.Missing"]
+
+def test_super_cycles_are_broken():
+	hierarchy = Hierarchy([_abc(("X", "Y", (), False), ("Y", "X", (), False))])
+	assert len(hierarchy.preorder) == 2
+	assert all(len(hierarchy.ancestors(node)) <= 1 for node in hierarchy)
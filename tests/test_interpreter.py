@@ -0,0 +1,138 @@
+from swfparser import ABC
+from swfparser._abc import Code, Instruction, Opcode
+from swfparser._abc.consts import CONSTANT_Int, HAS_OPTIONAL, NEED_ARGUMENTS, NEED_REST, TRAIT_CLASS, TRAIT_METHOD
+from swfparser._abc.interpreter import MAX_LENGTH
+
+import math
+import pytest
+
+def _method(abc: ABC, params: int, *instructions: tuple) -> int:
+	# appends a method with the given (opcode, *args) body, returning its index
+	code = Code([Instruction(getattr(Opcode, name), args=list(args)) for name, *args in instructions])
+	abc.method_info.append({"name": "", "params": [abc.multiname_pool[0]] * params, "return_type": abc.multiname_pool[0], "flags": 0})
+	abc.method_bodies.append({
+		"method_index": len(abc.method_info) - 1, "max_stack": 8, "local_count": params + 1,
+		"init_scope": 0, "max_scope": 1, "code": code.assemble(), "exceptions": [], "traits": [],
+	})
+	return len(abc.method_info) - 1
+
+def _qname(abc: ABC, name: str) -> int:
+	return abc.ensure_multiname(abc.ensure_string(name), 0)
+
+def _call(abc: ABC, receiver: str, name: str, args: int) -> tuple:
+	# receiver.name(arg 1, ..., arg n) on the method's parameters
+	return (
+		("getlex", _qname(abc, receiver)),
+		*(("getlocal", i + 1) for i in range(args)),
+		("callproperty", _qname(abc, name), args),
+		("returnvalue",),
+	)
+
+@pytest.fixture
+def abc() -> ABC:
+	return ABC.create("test", 1)
+
+def test_intrinsic_failures_are_value_errors(abc):
+	pow_method = _method(abc, 2, *_call(abc, "Math", "pow", 2))
+	floor_method = _method(abc, 0, *_call(abc, "Math", "floor", 0))
+	results = abc.interpreter().evaluate_many([(pow_method, (10, 400)), (floor_method, ()), (pow_method, (2, 10))])
+	assert results[0] == math.inf
+	assert isinstance(results[1], ValueError)
+	assert results[2] == 1024
+
+def test_radix_out_of_range(abc):
+	to_string = _method(abc, 2, ("getlocal_1",), ("getlocal_2",), ("callproperty", _qname(abc, "toString"), 1), ("returnvalue",))
+	interpreter = abc.interpreter()
+	assert interpreter.call(to_string, (255, 16)) == "ff"
+	for radix in (0, 1, 37):
+		with pytest.raises(ValueError):
+			interpreter.call(to_string, (5, radix))
+
+def test_array_results_are_not_shared(abc):
+	make = _method(abc, 0, ("pushbyte", 1), ("pushbyte", 2), ("newarray", 2), ("returnvalue",))
+	interpreter = abc.interpreter()
+	first = interpreter.call(make)
+	first[1] = 99
+	assert interpreter.call(make) == [1, 2]
+
+def test_allocations_are_capped(abc):
+	construct = _method(abc, 1, ("getlex", _qname(abc, "Array")), ("getlocal_1",), ("construct", 1), ("returnvalue",))
+	store = _method(abc, 1, ("newarray", 0), ("dup",), ("getlocal_1",), ("pushtrue",), ("setproperty", _runtime_name(abc)), ("returnvalue",))
+	interpreter = abc.interpreter()
+	assert len(interpreter.call(construct, (3,))) == 3
+	with pytest.raises(ValueError, match="out of range"):
+		interpreter.call(construct, (MAX_LENGTH + 1,))
+	with pytest.raises(ValueError, match="out of range"):
+		interpreter.call(store, (1 << 30,))
+
+def _runtime_name(abc: ABC) -> int:
+	# MultinameL: the property name is popped from the stack
+	abc.ns_set_pool.append([0])
+	abc.multiname_pool.append({"kind": 0x1B, "ns_set_index": len(abc.ns_set_pool) - 1})
+	abc._reindex()
+	return len(abc.multiname_pool) - 1
+
+def test_string_doubling_is_capped(abc):
+	# s = "ab"; while (true) s = s + s
+	double = _method(abc, 0,
+		("pushstring", abc.ensure_string("ab")), ("setlocal_1",),
+		("label",), ("getlocal_1",), ("getlocal_1",), ("add",), ("setlocal_1",), ("jump", -9),
+	)
+	abc.method_bodies[-1]["local_count"] = 2
+	with pytest.raises(ValueError, match="longer than"):
+		abc.interpreter().call(double)
+
+def _static_class(abc: ABC, name: str, method_name: str, method: int):
+	# a class named `name` with a static method `method_name`
+	abc.class_pool.append({"cinit": 0, "traits": [{"kind": TRAIT_METHOD, "name": abc.multiname_pool[_qname(abc, method_name)], "index": method}]})
+	abc.script_pool.append({"init": 0, "traits": [{"kind": TRAIT_CLASS, "name": abc.multiname_pool[_qname(abc, name)], "index": len(abc.class_pool) - 1}]})
+
+def _count_runs(interpreter) -> list[int]:
+	runs, run = [], interpreter._run
+	def counting(method, *args):
+		runs.append(method)
+		return run(method, *args)
+	interpreter._run = counting
+	return runs
+
+def test_class_static_calls_are_memoized(abc):
+	twice = _method(abc, 1, ("getlocal_1",), ("getlocal_1",), ("add",), ("returnvalue",))
+	_static_class(abc, "Util", "twice", twice)
+	caller = _method(abc, 1, *_call(abc, "Util", "twice", 1))
+	interpreter = abc.interpreter()
+	runs = _count_runs(interpreter)
+	assert interpreter.evaluate_many([(caller, (3,)), (caller, (4,))]) == [6, 8]
+	interpreter._memo = {key: value for key, value in interpreter._memo.items() if key[0] != caller}
+	assert interpreter.call(caller, (3,)) == 6
+	assert runs.count(twice) == 2
+
+def test_memo_keys_are_typed(abc):
+	to_string = _method(abc, 1, ("getlocal_1",), ("coerce_s",), ("returnvalue",))
+	interpreter = abc.interpreter()
+	assert interpreter.call(to_string, (1,)) == "1"
+	assert interpreter.call(to_string, (True,)) == "true"
+
+def test_memo_is_bounded(abc):
+	identity = _method(abc, 1, ("getlocal_1",), ("returnvalue",))
+	interpreter = abc.interpreter(max_memo=4)
+	for value in range(10):
+		assert interpreter.call(identity, (value,)) == value
+	assert len(interpreter._memo) == 4
+
+def test_optional_parameters_use_defaults(abc):
+	add = _method(abc, 2, ("getlocal_1",), ("getlocal_2",), ("add",), ("returnvalue",))
+	abc.int_pool.append(40)
+	abc.method_info[add]["flags"] |= HAS_OPTIONAL
+	abc.method_info[add]["optional_params"] = [(len(abc.int_pool) - 1, CONSTANT_Int)]
+	interpreter = abc.interpreter()
+	assert interpreter.call(add, (2,)) == 42
+	assert interpreter.call(add, (2, 3)) == 5
+	with pytest.raises(ValueError, match="expects 1 arguments"):
+		interpreter.call(add, ())
+
+@pytest.mark.parametrize("flag", [NEED_REST, NEED_ARGUMENTS])
+def test_rest_and_arguments_are_rejected(abc, flag):
+	method = _method(abc, 0, ("pushbyte", 1), ("returnvalue",))
+	abc.method_info[method]["flags"] |= flag
+	with pytest.raises(ValueError, match="rest or arguments"):
+		abc.interpreter().call(method)
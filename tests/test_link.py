@@ -0,0 +1,77 @@
+from conftest import reparse
+from swfparser import ABC
+from swfparser._abc import Code, Instruction, Opcode
+from swfparser._abc.consts import CONSTANT_QName
+from swfparser._abc.link import link
+from swfparser._abc.reader import ABCReader
+
+import pytest
+
+def _namespace(abc: ABC, kind: int, name: str) -> int:
+	abc.namespace_pool.append({"kind": kind, "name_index": abc.ensure_string(name)})
+	return len(abc.namespace_pool) - 1
+
+def _source(name: str, literal: str) -> ABC:
+	# one script whose init reads pkg::shared and its own private::secret,
+	# then pushes a literal and a double
+	abc = ABC.create(name, 1)
+	shared = abc.ensure_multiname(abc.ensure_string("shared"), _namespace(abc, 0x16, "pkg"))
+	secret = abc.ensure_multiname(abc.ensure_string("secret"), _namespace(abc, 0x05, ""))
+	abc.double_pool.append(0.5)
+	code = Code([
+		Instruction(Opcode.getlocal_0), Instruction(Opcode.pushscope),
+		Instruction(Opcode.getlex, args=[shared]), Instruction(Opcode.getlex, args=[secret]),
+		Instruction(Opcode.pushstring, args=[abc.ensure_string(literal)]),
+		Instruction(Opcode.pushdouble, args=[1]),
+		Instruction(Opcode.returnvoid),
+	])
+	abc.method_info.append({"name": "", "params": [], "return_type": abc.multiname_pool[0], "flags": 0})
+	abc.method_bodies.append({
+		"method_index": 0, "max_stack": 4, "local_count": 1, "init_scope": 0, "max_scope": 1,
+		"code": code.assemble(), "exceptions": [], "traits": [],
+	})
+	abc.script_pool.append({"init": 0, "traits": []})
+	return abc
+
+def _resolved(abc: ABC, body: dict) -> list:
+	# getlex operands as (namespace kind, namespace, name), literals by value
+	operands = []
+	for instr in ABCReader.read_instructions(body["code"]).instructions:
+		if instr.opcode is Opcode.getlex:
+			multiname = abc.multiname_pool[instr.args[0]]
+			namespace = abc.namespace_pool[multiname["ns_index"]]
+			operands.append((namespace["kind"], abc.string_pool[namespace["name_index"]], abc.string_pool[multiname["name_index"]]))
+		elif instr.opcode is Opcode.pushstring:
+			operands.append(abc.string_pool[instr.args[0]])
+		elif instr.opcode is Opcode.pushdouble:
+			operands.append(abc.double_pool[instr.args[0]])
+	return operands
+
+def test_link_merges_pools_and_rewrites_operands():
+	sources = [_source("a", "from a"), _source("b", "from b")]
+	expected = [_resolved(abc, body) for abc in sources for body in abc.method_bodies]
+
+	linked = link(sources, "linked", 1)
+
+	assert [_resolved(linked, body) for body in linked.method_bodies] == expected
+	assert [body["method_index"] for body in linked.method_bodies] == [0, 1]
+	assert [script["init"] for script in linked.script_pool] == [0, 1]
+	# shared strings, package namespaces and doubles are merged, private namespaces are not
+	assert linked.string_pool.count("shared") == 1 and linked.double_pool.count(0.5) == 1
+	kinds = [namespace["kind"] for namespace in linked.namespace_pool[1:]]
+	assert kinds.count(0x16) == 1 and kinds.count(0x05) == 2
+	qnames = [multiname for multiname in linked.multiname_pool[1:] if multiname["kind"] == CONSTANT_QName]
+	assert len(qnames) == 3
+
+	copy = reparse(linked)
+	assert [_resolved(copy, body) for body in copy.method_bodies] == expected
+
+def test_link_keeps_a_single_entry_script():
+	eager = _source("eager", "from eager")
+	eager.flags = 0
+	with pytest.raises(ValueError, match="entry script"):
+		link([eager, _source("b", "from b")], "linked", 1)
+
+	# an eager last source keeps its script last, so it still runs on load
+	linked = link([_source("a", "from a"), eager], "linked", 0)
+	assert _resolved(linked, linked.method_bodies[linked.script_pool[-1]["init"]])[-2] == "from eager"
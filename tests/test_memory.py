@@ -0,0 +1,35 @@
+from swfparser.memory import deep_sizeof, parse_peak
+
+import sys
+
+def test_shared_objects_are_charged_once():
+	s = "x" * 1000
+	first, second = [s], [s]
+	seen = set()
+	assert deep_sizeof(first, seen) == sys.getsizeof(first) + sys.getsizeof(s)
+	assert deep_sizeof(second, seen) == sys.getsizeof(second)
+
+def test_views_retain_their_buffer():
+	buf = bytearray(10000)
+	assert deep_sizeof(memoryview(buf)[:10]) >= len(buf)
+
+def test_swf_usage(swf):
+	usage = swf.memory_usage()
+	assert usage["total"] == (
+		sum(value for name, value in usage.items() if name not in ("abcs", "total"))
+		+ sum(abc["total"] for abc in usage["abcs"].values())
+	)
+	abc = next(iter(swf.abcs.values()))
+	abc_usage = usage["abcs"][abc.name]
+	assert abc_usage["total"] == sum(value for name, value in abc_usage.items() if name != "total")
+	assert abc_usage["strings"] >= sum(len(s) for s in abc.string_pool)
+	assert abc_usage["code"] >= sum(len(body["code"]) for body in abc.method_bodies)
+	# the ABC views the decompressed SWF buffer, already charged to the SWF
+	assert abc_usage["raw"] < len(abc.reader.buf)
+
+	abc.ensure_string("y" * 10000)
+	assert abc.memory_usage()["strings"] >= abc_usage["strings"] + 10000
+
+def test_parse_peak(swf_path):
+	swf, peak = parse_peak(swf_path)
+	assert swf.abcs and peak > 0
@@ -0,0 +1,11 @@
+from swfparser.opstats import OpcodeStats
+
+def test_invalid_bodies_are_not_counted(abc):
+	valid = OpcodeStats().add_abc(abc)
+	# a valid prefix followed by an unknown opcode
+	abc.method_bodies[0]["code"] += b"\xff"
+	stats = OpcodeStats().add_abc(abc)
+
+	assert stats.invalid_bodies == 1
+	assert sum(stats.opcodes) == stats.instructions
+	assert stats.instructions < valid.instructions
@@ -0,0 +1,31 @@
+from swfparser._abc import Code, Instruction, Label, Opcode
+from swfparser._abc.optimizer import optimize
+from swfparser._abc.reader import ABCReader
+
+def _op(name: str, *args, targets: list[Label] = ()) -> Instruction:
+	return Instruction(getattr(Opcode, name), args=list(args), targets=list(targets))
+
+def test_dead_handler_renumbers_newcatch():
+	skip = Label()
+	dead_from, dead_to, dead_target = Label(), Label(), Label()
+	live_from, live_to, live_target = Label(), Label(), Label()
+	code = Code([
+		_op("jump", 0, targets=[skip]),
+		dead_from, _op("pushnull"), _op("pop"), dead_to,
+		skip,
+		live_from, _op("getlocal_0"), _op("pop"), live_to,
+		_op("returnvoid"),
+		dead_target, _op("newcatch", 0), _op("pop"), _op("returnvoid"),
+		live_target, _op("newcatch", 1), _op("pop"), _op("returnvoid"),
+	], [
+		{"from": dead_from, "to": dead_to, "target": dead_target, "exc_type": 0, "var_name": 0},
+		{"from": live_from, "to": live_to, "target": live_target, "exc_type": 0, "var_name": 0},
+	])
+	optimize(code)
+
+	body = {"code": b"", "exceptions": []}
+	code.commit(body)
+	assert len(body["exceptions"]) == 1
+	catches = [instr for instr in ABCReader.read_instructions(body["code"]).instructions if instr.opcode is Opcode.newcatch]
+	assert [instr.args for instr in catches] == [[0]]
+	assert body["exceptions"][0]["target"] == catches[0].address
@@ -0,0 +1,95 @@
+from conftest import reparse
+from swfparser._abc import Instruction, Opcode
+from swfparser._abc.consts import CONSTANT_PackageNamespace
+
+import pytest
+
+def _reject(abc):
+	raise ValueError("rejected")
+
+def test_rejected_commit_restores_frame_limits(abc):
+	body = abc.method_bodies[0]
+	body["local_count"] = 10
+	body["max_stack"] = 20
+	patch = abc.patch()
+	patch.rewrite(0, lambda code: None)
+	with pytest.raises(ValueError, match="rejected"):
+		patch.commit(_reject)
+	assert (body["local_count"], body["max_stack"]) == (10, 20)
+
+def _uses(abc, body_index: int, multiname: int) -> bool:
+	return any(
+		multiname in instr.args
+		for instr in abc.get_cfg(body_index).stack.instructions
+		if instr.opcode in (Opcode.getlex, Opcode.getproperty, Opcode.callproperty, Opcode.findpropstrict)
+	)
+
+def _used_multiname(abc) -> tuple[int, int]:
+	# (body index, multiname) of some property access
+	for index in range(len(abc.method_bodies)):
+		for instr in abc.get_cfg(index).stack.instructions:
+			if instr.opcode in (Opcode.getlex, Opcode.getproperty):
+				return index, instr.args[0]
+	raise AssertionError("no property access")
+
+def test_commit_round_trips(abc):
+	body, old = _used_multiname(abc)
+	with abc.patch() as patch:
+		new = patch.multiname("renamed", "com.game")
+		assert patch.multiname("renamed", "com.game") == new
+		patch.swap_multiname(old, new)
+		patch.rename_string(abc.string_pool[10], "RENAMED")
+		patch.rewrite(body, lambda code: code.insert(0, Instruction(Opcode.nop)))
+
+	copy = reparse(abc)
+	assert copy.resolve_multiname(new) == "com.game::renamed"
+	assert copy.string_pool[10] == "RENAMED"
+	assert _uses(copy, body, new) and not _uses(copy, body, old)
+	assert copy.method_bodies[body]["code"][0] == Opcode.nop.value[0]
+
+def test_invalid_operand_rolls_everything_back(abc):
+	body, old = _used_multiname(abc)
+	code = abc.method_bodies[body]["code"]
+	strings, multinames = len(abc.string_pool), len(abc.multiname_pool)
+	renamed = abc.string_pool[10]
+
+	patch = abc.patch()
+	new = patch.multiname("renamed", "com.game")
+	patch.swap_multiname(old, new)
+	patch.rename_string(renamed, "RENAMED")
+	patch.rewrite(body, lambda code: code.insert(0, Instruction(Opcode.pushstring, args=[99999])))
+	with pytest.raises(ValueError, match="out of range"):
+		patch.commit()
+
+	assert abc.method_bodies[body]["code"] is code
+	assert (len(abc.string_pool), len(abc.multiname_pool)) == (strings, multinames)
+	assert abc.string_pool[10] == renamed and "RENAMED" not in abc._str_index
+	# nothing of the session reaches the output
+	assert bytes(abc.write().buf).endswith(abc.reader.buf.tobytes())
+
+def test_exception_in_block_discards_edits(abc):
+	strings = len(abc.string_pool)
+	with pytest.raises(RuntimeError):
+		with abc.patch() as patch:
+			patch.string("never committed")
+			raise RuntimeError
+	assert len(abc.string_pool) == strings
+	with pytest.raises(ValueError, match="closed"):
+		patch.string("late")
+
+def test_failed_commit_in_block_raises_its_own_error(abc):
+	strings = len(abc.string_pool)
+	with pytest.raises(ValueError, match="rejected"):
+		with abc.patch() as patch:
+			patch.string("never committed")
+			patch.commit(_reject)
+	assert len(abc.string_pool) == strings
+
+def test_multinames_use_package_namespaces(abc):
+	with abc.patch() as patch:
+		public = patch.multiname("name")
+		packaged = patch.multiname("name", "com.game")
+	for index in (public, packaged):
+		namespace = abc.namespace_pool[abc.multiname_pool[index]["ns_index"]]
+		assert namespace["kind"] == CONSTANT_PackageNamespace
+	assert abc.resolve_multiname(public) == "name"
@@ -0,0 +1,84 @@
+from swfparser.server import QueryServer
+from swfparser.synth import generate_swf
+
+import asyncio
+import json
+import os
+import pytest
+import socket
+
+async def _query(path: str, **request) -> dict:
+	reader, writer = await asyncio.open_unix_connection(path)
+	writer.write(json.dumps(request).encode() + b"\n")
+	response = json.loads(await reader.readline())
+	writer.close()
+	await writer.wait_closed()
+	return response
+
+@pytest.fixture
+def paths(tmp_path) -> tuple[str, str]:
+	swf = tmp_path / "test.swf"
+	swf.write_bytes(generate_swf(strings=40, multinames=40, classes=4, traits=4, methods=20, body_size=10))
+	return str(tmp_path / "query.sock"), str(swf)
+
+def test_regular_file_is_not_replaced(paths):
+	_, swf = paths
+	with pytest.raises(ValueError, match="not a socket"):
+		asyncio.run(QueryServer(swf).start())
+	assert os.path.getsize(swf) > 0
+
+def test_live_socket_is_not_taken_over(paths):
+	path, _ = paths
+	async def run():
+		first = QueryServer(path)
+		await first.start()
+		try:
+			with pytest.raises(ValueError, match="Another server"):
+				await QueryServer(path).start()
+			assert (await _query(path, op="ping"))["result"] == "pong"
+		finally:
+			first.close()
+		assert not os.path.exists(path)
+	asyncio.run(run())
+
+def test_stale_socket_is_replaced(paths):
+	path, _ = paths
+	stale = socket.socket(socket.AF_UNIX)
+	stale.bind(path)
+	stale.close()
+	async def run():
+		server = QueryServer(path)
+		await server.start()
+		try:
+			assert (await _query(path, op="ping"))["ok"]
+		finally:
+			server.close()
+	asyncio.run(run())
+
+def test_close_keeps_a_foreign_socket(paths):
+	path, _ = paths
+	async def run():
+		server = QueryServer(path)
+		await server.start()
+		os.unlink(path)
+		other = socket.socket(socket.AF_UNIX)
+		other.bind(path)
+		server.close()
+		assert os.path.exists(path)
+		other.close()
+	asyncio.run(run())
+
+def test_request_validation(paths):
+	path, swf = paths
+	async def run():
+		server = QueryServer(path)
+		await server.start()
+		try:
+			assert (await _query(path, op="search", file=swf, query="", limit=0))["result"] == []
+			assert len((await _query(path, op="search", file=swf, query="", limit=2))["result"]) == 2
+			assert not (await _query(path, op="search", file=swf, query="", limit="2"))["ok"]
+			assert not (await _query(path, op="resolve", file=swf, string=True))["ok"]
+			assert (await _query(path, op="resolve", file=swf, string=1))["ok"]
+		finally:
+			server.close()
+	asyncio.run(run())
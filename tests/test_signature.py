@@ -0,0 +1,14 @@
+from swfparser._abc.signature import BANDS, Signature, minhash, signatures
+
+def test_signatures_survive_debug_stripping(abc):
+	before = signatures(abc)
+	abc.strip()
+	after = signatures(abc)
+	assert [signature.exact for signature in before] == [signature.exact for signature in after]
+
+def test_empty_bands_are_not_indexed():
+	first = Signature("method", "a", b"", minhash({"params:0"}))
+	second = Signature("method", "b", b"", minhash({"params:1"}))
+	assert 1 <= len(first.bands()) < BANDS
+	assert not set(first.bands()) & set(second.bands())
+	assert Signature("method", "c", b"", minhash(set())).bands() == []
@@ -0,0 +1,38 @@
+from swfparser import SWFParser
+from swfparser._abc.writer import SECTIONS
+from swfparser.stats import Stats
+
+import os
+
+def test_parse_and_write_phases(swf_path, tmp_path):
+	stats = Stats()
+	samples = []
+	stats.add_callback(lambda phase, seconds, nbytes, count: samples.append(phase))
+	swf = SWFParser(swf_path, stats=stats)
+	swf.parse()
+	abc = next(iter(swf.abcs.values()))
+	assert abc.stats is stats
+
+	phases = stats.as_dict()
+	assert phases["swf.decompress"]["bytes"] == os.path.getsize(swf_path)
+	assert phases["swf.parse.tag.82"]["calls"] == 1
+	# sections cover the whole ABC but its version
+	assert sum(phases[f"abc.read.{section}"]["bytes"] for section in SECTIONS) == len(abc.reader.buf) - 4
+	assert phases["abc.read.method_bodies"]["count"] == len(abc.method_bodies)
+	assert phases["abc.read.scripts"]["count"] == len(abc.script_pool)
+
+	out = str(tmp_path / "out.swf")
+	abc.ensure_string("added")
+	swf.write(out, compress=False)
+	phases = stats.as_dict()
+	header = 4 + len(abc.name.encode()) + 1 + 4
+	assert sum(phases[f"abc.write.{section}"]["bytes"] for section in SECTIONS) + header == phases["swf.write.tag.82"]["bytes"] - 6
+	assert phases["swf.write.output"]["bytes"] == os.path.getsize(out)
+	assert len(samples) == sum(phase["calls"] for phase in phases.values())
+
+	stats.reset()
+	assert not stats.as_dict()
+
+def test_disabled_by_default(swf):
+	assert swf.stats is None
+	assert all(abc.stats is None for abc in swf.abcs.values())
@@ -0,0 +1,71 @@
+from conftest import reparse
+from swfparser import ABC
+from swfparser._abc.reader import ABCReader
+from swfparser.writer import ByteWriter
+
+def _abc() -> ABC:
+	# one script whose init references "used"; "unused" is referenced by
+	# nothing and "file.as" only by a debugfile opcode
+	w = ByteWriter()
+	w.write_u16(16).write_u16(46)
+	w.write_leb128(0).write_leb128(0).write_leb128(0) # ints, uints, doubles
+	strings = ["used", "unused", "file.as", "pkg"]
+	w.write_leb128(len(strings) + 1)
+	for s in strings:
+		w.write_string(s)
+	w.write_leb128(2).write_u8(0x16).write_leb128(4) # package namespace "pkg"
+	w.write_leb128(0) # ns_sets
+	w.write_leb128(3)
+	w.write_u8(0x07).write_leb128(1).write_leb128(1) # pkg::used
+	w.write_u8(0x07).write_leb128(1).write_leb128(2) # pkg::unused
+	w.write_leb128(1).write_leb128(0).write_leb128(0).write_leb128(0).write_u8(0) # method 0
+	w.write_leb128(0) # metadata
+	w.write_leb128(0) # classes
+	w.write_leb128(1).write_leb128(0).write_leb128(0) # script 0
+	code = bytes([
+		0xf1, 3, # debugfile "file.as"
+		0xf0, 1, # debugline 1
+		0xd0, 0x30, # getlocal_0, pushscope
+		0x5d, 1, 0x29, # findpropstrict pkg::used, pop
+		0x47, # returnvoid
+	])
+	w.write_leb128(1).write_leb128(0).write_leb128(1).write_leb128(1).write_leb128(0).write_leb128(1)
+	w.write_leb128(len(code)).write_bytes(code).write_leb128(0).write_leb128(0)
+
+	abc = ABC("test", 1, bytes(w.buf))
+	abc.read()
+	return abc
+
+def _names(abc: ABC, code: bytes) -> list:
+	# opcodes with multiname operands resolved to "namespace::name"
+	names = []
+	for instr in ABCReader.read_instructions(code).instructions:
+		if instr.opcode.name == "findpropstrict":
+			multiname = abc.multiname_pool[instr.args[0]]
+			namespace = abc.string_pool[abc.namespace_pool[multiname["ns_index"]]["name_index"]]
+			names.append(f"{namespace}::{abc.string_pool[multiname['name_index']]}")
+		else:
+			names.append(instr.opcode.name)
+	return names
+
+def test_strip_round_trip():
+	abc = _abc()
+	removed = abc.strip()
+
+	assert removed["debug"] == 2
+	assert removed["string"] == 2 and removed["multiname"] == 1
+	assert abc.string_pool == ["", "used", "pkg"]
+	expected = ["getlocal_0", "pushscope", "pkg::used", "pop", "returnvoid"]
+	assert _names(abc, abc.method_bodies[0]["code"]) == expected
+
+	copy = reparse(abc)
+	assert copy.string_pool == abc.string_pool
+	assert _names(copy, copy.method_bodies[0]["code"]) == expected
+
+def test_compact_is_idempotent():
+	abc = _abc()
+	abc.strip()
+	data = bytes(abc.write().buf)
+	abc.writer.clear()
+	assert not any(abc.strip().values())
+	assert bytes(abc.write().buf) == data
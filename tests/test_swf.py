@@ -0,0 +1,128 @@
+from swfparser import ABC, SWFParser
+from swfparser.deflate import parallel_deflate
+from swfparser.synth import generate_swf
+from swfparser.writer import ByteWriter
+
+import random
+import struct
+import zlib
+
+import pytest
+
+def _tag(w: ByteWriter, code: int, data: bytes, long: bool = False):
+	if long or len(data) >= 0x3f:
+		w.write_u16(code << 6 | 0x3f).write_u32(len(data))
+	else:
+		w.write_u16(code << 6 | len(data))
+	w.write_bytes(data)
+
+def _abc(name: str) -> ABC:
+	abc = ABC.create(name, 1)
+	for i in range(40):
+		abc.ensure_string(f"{name}_{i}")
+	return abc
+
+def _swf_bytes(*abcs: ABC) -> bytes:
+	# DoABC tags use long headers, as SWFParser.write() emits them
+	w = ByteWriter()
+	w.write_bytes(b"FWS").write_u8(10).write_u32(0)
+	w.write_bytes(bytes([0x78, 0x00, 0x05, 0x5F, 0x00, 0x00, 0x0F, 0xA0, 0x00]))
+	w.write_u16(24 << 8).write_u16(1)
+	_tag(w, 0x45, struct.pack("<I", 0x08)) # FileAttributes
+	for abc in abcs:
+		_tag(w, 0x52, bytes(abc.write().buf), long=True)
+	_tag(w, 0x01, b"") # ShowFrame
+	_tag(w, 0x00, b"")
+	struct.pack_into("<I", w.buf, 4, len(w))
+	return bytes(w.buf)
+
+def _parse(path) -> SWFParser:
+	swf = SWFParser(str(path))
+	swf.parse()
+	return swf
+
+def test_untouched_write_is_byte_identical(tmp_path):
+	data = _swf_bytes(_abc("first"), _abc("second"))
+	(tmp_path / "in.swf").write_bytes(data)
+	swf = _parse(tmp_path / "in.swf")
+
+	swf.write(str(tmp_path / "out.swf"))
+	assert (tmp_path / "out.swf").read_bytes() == data
+
+	swf.write(str(tmp_path / "out.swf"), compress=True)
+	compressed = (tmp_path / "out.swf").read_bytes()
+	assert compressed[:3] == b"CWS" and compressed[3:8] == data[3:8]
+	assert zlib.decompress(compressed[8:]) == data[8:]
+	assert _parse(tmp_path / "out.swf").signature == b"CWS"
+
+def test_edited_abcs_are_written_in_place(tmp_path):
+	(tmp_path / "in.swf").write_bytes(_swf_bytes(_abc("first"), _abc("second")))
+	swf = _parse(tmp_path / "in.swf")
+	swf.abcs["first"].ensure_string("x" * 300)
+	swf.abcs["second"].string_pool[1] = "renamed"
+	swf.abcs["second"].mark_dirty("constant_pool")
+	swf.write(str(tmp_path / "out.swf"))
+
+	copy = _parse(tmp_path / "out.swf")
+	assert copy.abcs["first"].string_pool[-1] == "x" * 300
+	assert copy.abcs["second"].string_pool[1] == "renamed"
+	assert [tag for tag, _ in copy.tags] == [tag for tag, _ in swf.tags]
+
+def test_parallel_deflate_round_trip():
+	rng = random.Random(0)
+	# repeats longer than a chunk so matches cross chunk boundaries
+	block = bytes(rng.getrandbits(8) for _ in range(3000))
+	data = block * 5 + bytes(rng.getrandbits(2) for _ in range(10000))
+	for chunk_size in (1000, 4096, len(data), 1 << 20):
+		assert zlib.decompress(b"".join(parallel_deflate(data, 4, chunk_size=chunk_size))) == data
+	assert zlib.decompress(b"".join(parallel_deflate(b"", 2))) == b""
+
+def test_parallel_write_matches_serial(tmp_path):
+	(tmp_path / "in.swf").write_bytes(_swf_bytes(_abc("first"), _abc("second"), _abc("third")))
+	swf = _parse(tmp_path / "in.swf")
+	swf.abcs["second"].ensure_string("added")
+
+	swf.write(str(tmp_path / "serial.swf"), compress=False)
+	swf.write(str(tmp_path / "parallel.swf"), compress=True, workers=2)
+	serial = (tmp_path / "serial.swf").read_bytes()
+	parallel = (tmp_path / "parallel.swf").read_bytes()
+	assert parallel[:3] == b"CWS"
+	assert zlib.decompress(parallel[8:]) == serial[8:]
+
+def _nested() -> SWFParser:
+	# tag 1: a SWF embedding another one, 2: not a SWF, 3: a compressed SWF
+	inner = generate_swf(classes=2, methods=4)
+	middle = generate_swf(binary_data=[inner], classes=3, methods=6)
+	swf = SWFParser(memoryview(generate_swf(binary_data=[middle, b"FWS not a swf", generate_swf(compress=True)])))
+	swf.parse()
+	return swf
+
+def test_children_are_parsed_lazily():
+	swf = _nested()
+	assert swf.embedded_tags() == [1, 3]
+	assert not swf._children
+
+	middle = swf.child(1)
+	assert swf.child(1) is middle
+	assert middle.embedded_tags() == [1]
+	assert len(next(iter(middle.child(1).abcs.values())).instance_pool) == 2
+	assert swf.child(3).signature == b"CWS"
+	with pytest.raises(ValueError):
+		swf.child(2)
+
+def test_parse_children_recursively():
+	swf = _nested()
+	children = swf.parse_children(workers=4)
+	assert sorted(children) == [1, 3]
+	assert sorted(children[1]._children) == [1]
+
+	swf = _nested()
+	swf.parse_children(recursive=False)
+	assert not swf.child(1)._children
+
+def test_malformed_child_does_not_stop_its_siblings():
+	broken = b"CWS\x0a" + struct.pack("<I", 100) + b"not deflate"
+	swf = SWFParser(generate_swf(binary_data=[broken, generate_swf(classes=2, methods=4)]))
+	swf.parse()
+	assert sorted(swf.parse_children()) == [2]
+	assert list(swf.child_errors) == [1] and swf.child_errors[1].startswith("error:")
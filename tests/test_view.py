@@ -0,0 +1,48 @@
+from swfparser._abc.reader import ABCReader
+from swfparser.reader import decode_leb128, decode_s24, decode_sleb128, decode_string
+from swfparser.writer import ByteWriter
+
+from concurrent.futures import ThreadPoolExecutor
+
+def test_decode_functions_are_stateless():
+	w = ByteWriter()
+	w.write_u8(0xff).write_leb128(300).write_sleb128(-5).write_s24(-70000).write_string("héllo")
+	buf = bytes(w.buf)
+
+	value, offset = decode_leb128(buf, 1)
+	assert (value, offset) == (300, 3)
+	value, offset = decode_sleb128(buf, offset)
+	assert value == -5
+	value, offset = decode_s24(buf, offset)
+	assert value == -70000
+	value, offset = decode_string(buf, offset)
+	assert (value, offset) == ("héllo", len(buf))
+	# decoding again from any offset gives the same result
+	assert decode_leb128(memoryview(buf), 1) == (300, 3)
+
+def test_view_matches_and_outlives_edits(abc):
+	view = abc.view()
+	expected = [
+		[(instr.opcode, instr.args) for instr in ABCReader.read_instructions(body["code"]).instructions]
+		for body in abc.method_bodies
+	]
+	strings = len(abc.string_pool)
+	name = view.resolve_multiname(abc.instance_pool[0]["name"])
+
+	abc.ensure_string("added later")
+	abc.method_bodies[0]["code"] = bytes([0x47]) # returnvoid
+	assert len(view.string_pool) == strings
+	assert [[(instr.opcode, instr.args) for instr in view.instructions(i)] for i in range(len(expected))] == expected
+	assert view.resolve_multiname(abc.instance_pool[0]["name"]) == name
+
+	instr, offset = view.decode(0, 0)
+	assert (instr.opcode, offset) == (view.instructions(0)[0].opcode, view.instructions(0)[1].address)
+
+def test_concurrent_readers_share_one_cache_entry(abc):
+	view = abc.view()
+	bodies = range(len(view.method_bodies))
+	with ThreadPoolExecutor(max_workers=8) as pool:
+		cfgs = list(pool.map(lambda _: [view.cfg(i) for i in bodies], range(8)))
+		instructions = list(pool.map(lambda _: [view.instructions(i) for i in bodies], range(8)))
+	assert all(all(a is b for a, b in zip(cfgs[0], other)) for other in cfgs)
+	assert all(all(a is b for a, b in zip(instructions[0], other)) for other in instructions)
@@ -0,0 +1,56 @@
+from conftest import reparse
+from swfparser import SWFParser
+
+import pytest
+
+@pytest.fixture
+def tracked(swf_path):
+	swf = SWFParser(swf_path, track_edits=True)
+	swf.parse()
+	return next(iter(swf.abcs.values()))
+
+def test_untouched_write_is_byte_identical(abc):
+	assert bytes(abc.write().buf).endswith(abc.reader.buf.tobytes())
+
+def test_in_place_pool_edits_are_written(tracked):
+	tracked.string_pool[10] = "RENAMED"
+	tracked.namespace_pool[2]["kind"] = 0x16
+	copy = reparse(tracked)
+	assert copy.string_pool[10] == "RENAMED"
+	assert copy.namespace_pool[2]["kind"] == 0x16
+	assert len(copy.string_pool) == len(tracked.string_pool)
+
+def test_in_place_trait_and_method_edits_are_written(tracked):
+	tracked.instance_pool[0]["traits"][0]["slot_id"] = 7
+	tracked.method_info[1]["params"].append(tracked.multiname_pool[3])
+	copy = reparse(tracked)
+	assert copy.instance_pool[0]["traits"][0]["slot_id"] == 7
+	assert copy.resolve_multiname(copy.method_info[1]["params"][-1]) == tracked.resolve_multiname(3)
+
+def test_in_place_exception_edits_are_written(tracked):
+	index = next(i for i, body in enumerate(tracked.method_bodies) if body["exceptions"])
+	tracked.method_bodies[index]["exceptions"][0]["exc_type"] = 3
+	copy = reparse(tracked)
+	assert copy.method_bodies[index]["exceptions"][0]["exc_type"] == 3
+	# the other bodies are still copied verbatim
+	assert [body["code"] for body in copy.method_bodies] == [body["code"] for body in tracked.method_bodies]
+
+def test_reverted_edit_reuses_raw_sections(tracked):
+	original = tracked.string_pool[10]
+	tracked.string_pool[10] = "RENAMED"
+	tracked.write()
+	tracked.string_pool[10] = original
+	assert bytes(tracked.write().buf).endswith(tracked.reader.buf.tobytes())
+
+def test_untracked_edits_are_declared(abc):
+	assert not abc._read_state
+	abc.string_pool[10] = "RENAMED"
+	assert reparse(abc).string_pool[10] != "RENAMED"
+	abc.mark_dirty("constant_pool")
+	assert reparse(abc).string_pool[10] == "RENAMED"
+
+def test_untracked_body_edits_are_declared(abc):
+	index = next(i for i, body in enumerate(abc.method_bodies) if body["exceptions"])
+	abc.method_bodies[index]["exceptions"][0]["exc_type"] = 3
+	abc.mark_dirty(body_index=index)
+	assert reparse(abc).method_bodies[index]["exceptions"][0]["exc_type"] == 3